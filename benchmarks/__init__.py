@@ -0,0 +1 @@
+"""Benchmarks for the ERP TI desktop database layer."""
@@ -0,0 +1,103 @@
+import argparse
+import sqlite3
+import statistics
+import tempfile
+import time
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from erpti.database import DatabaseManager
+
+
+class ConnectPerCallManager(DatabaseManager):
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            conn.row_factory = sqlite3.Row
+            with conn:
+                yield conn
+
+
+def populate(db_path: Path, rows: int) -> None:
+    db = DatabaseManager(str(db_path))
+    db.initialize(["TI"])
+    db.close()
+    with closing(sqlite3.connect(db_path)) as conn:
+        conn.executemany(
+            """
+            INSERT INTO users (departamento, nome, cargo, telefone, ramal, email, username)
+            VALUES (?, ?, ?, '', '', '', ?)
+            """,
+            ((f"Depto {i % 40}", f"Usuario {i}", "Analista", f"user{i}") for i in range(rows)),
+        )
+        conn.execute("INSERT INTO user_groups (nome) VALUES ('TI')")
+        conn.executemany(
+            "INSERT INTO user_group_members (group_id, user_id) VALUES (1, ?)",
+            ((user_id,) for user_id in range(1, 21)),
+        )
+        conn.execute(
+            """
+            INSERT INTO chamados (titulo, descricao, status)
+            VALUES ('Impressora', 'Sem toner', 'pendente')
+            """
+        )
+        conn.executemany(
+            """
+            INSERT INTO chamado_messages (chamado_id, canal, autor, mensagem)
+            VALUES (1, 'publico', 'TI', ?)
+            """,
+            ((f"Mensagem {i}",) for i in range(20)),
+        )
+        conn.commit()
+
+
+def time_calls(call, calls: int) -> list[float]:
+    samples = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    return samples
+
+
+def run(rows: int, calls: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        populate(db_path, rows)
+        managers = {
+            "connect por chamada": ConnectPerCallManager(str(db_path)),
+            "pool persistente": DatabaseManager(str(db_path)),
+        }
+        operations = {
+            "fetch_access_folders": lambda db: db.fetch_access_folders(),
+            "fetch_user_groups": lambda db: db.fetch_user_groups(),
+            "fetch_group_members": lambda db: db.fetch_group_members(1),
+            "fetch_chamado_messages": lambda db: db.fetch_chamado_messages(1, "publico"),
+            "add_chamado_message": lambda db: db.add_chamado_message(1, "interno", "TI", "ok", ""),
+        }
+        print(f"Banco com {rows} usuarios, {calls} chamadas por operacao (microssegundos)")
+        print(f"{'operacao':<24} {'modo':<20} {'media':>10} {'p50':>10} {'p95':>10}")
+        for op_name, operation in operations.items():
+            for mode, db in managers.items():
+                operation(db)
+                samples = sorted(time_calls(lambda: operation(db), calls))
+                p95 = samples[int(len(samples) * 0.95) - 1]
+                print(
+                    f"{op_name:<24} {mode:<20} {statistics.fmean(samples):>10.1f} "
+                    f"{statistics.median(samples):>10.1f} {p95:>10.1f}"
+                )
+        for db in managers.values():
+            db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Latencia por chamada: conexao nova x pool.")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+    run(args.rows, args.calls)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import argparse
+import json
+import multiprocessing
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Callable
+
+from benchmarks.synthetic import BENCH_PASSWORD, BENCH_USERNAME, populate
+from erpti.database import DEFAULT_ACCESS_FOLDERS, DatabaseManager
+from erpti.storage import is_busy
+
+
+STATUSES = ("pendente", "em_atendimento", "fechado")
+
+# Pesos aproximados do que um tecnico faz na tela ao longo do dia.
+MIX = {
+    "poll_changes": 40,
+    "open_chamado": 20,
+    "board_move": 15,
+    "chat_message": 15,
+    "register_row": 8,
+    "login": 2,
+}
+
+
+def _poll_changes(db: DatabaseManager, rng: random.Random, state: dict) -> None:
+    changes = db.fetch_changes_since(state["seq"])
+    if changes:
+        state["seq"] = max(int(change["seq"]) for change in changes)
+    elif changes is None:
+        state["seq"] = db.latest_change_seq()
+
+
+def _open_chamado(db: DatabaseManager, rng: random.Random, state: dict) -> None:
+    chamado_id = rng.randint(1, state["chamados"])
+    db.fetch_user_groups()
+    messages = db.fetch_chamado_messages_since(chamado_id)
+    state["seen"][chamado_id] = int(messages[-1]["id"]) if messages else 0
+
+
+def _board_move(db: DatabaseManager, rng: random.Random, state: dict) -> None:
+    status = rng.choice(STATUSES)
+    responsavel = "" if status == "pendente" else f"Tecnico {state['worker']}"
+    db.update_chamado_flow(rng.randint(1, state["chamados"]), status, responsavel)
+
+
+def _chat_message(db: DatabaseManager, rng: random.Random, state: dict) -> None:
+    chamado_id = rng.randint(1, state["chamados"])
+    canal = rng.choice(("publico", "interno"))
+    db.add_chamado_message(chamado_id, canal, f"Tecnico {state['worker']}", "Verificando.", "")
+    # Como a janela do chamado: so busca o que chegou depois da ultima mensagem vista.
+    messages = db.fetch_chamado_messages_since(chamado_id, after_id=state["seen"].get(chamado_id, 0))
+    if messages:
+        state["seen"][chamado_id] = int(messages[-1]["id"])
+
+
+def _register_row(db: DatabaseManager, rng: random.Random, state: dict) -> None:
+    db.insert_row(
+        "ips",
+        {
+            "ip": f"10.200.{state['worker']}.{rng.randint(1, 254)}",
+            "nome": f"HOST-CARGA-{state['worker']}",
+            "fabricante": "Dell",
+            "endereco_mac": "",
+        },
+    )
+
+
+def _login(db: DatabaseManager, rng: random.Random, state: dict) -> None:
+    db.authenticate_user(BENCH_USERNAME, BENCH_PASSWORD)
+
+
+OPERATIONS: dict[str, Callable[[DatabaseManager, random.Random, dict], None]] = {
+    "poll_changes": _poll_changes,
+    "open_chamado": _open_chamado,
+    "board_move": _board_move,
+    "chat_message": _chat_message,
+    "register_row": _register_row,
+    "login": _login,
+}
+
+
+def client(args: tuple[str, int, float, float, float, int]) -> dict:
+    db_path, worker, start_at, duration, think_ms, chamados = args
+    rng = random.Random(worker)
+    names = list(MIX)
+    weights = [MIX[name] for name in names]
+    db = DatabaseManager(db_path)
+    db.initialize(DEFAULT_ACCESS_FOLDERS)
+    state = {"worker": worker, "chamados": chamados, "seq": db.latest_change_seq(), "seen": {}}
+    results = {name: {"latencies": [], "busy": 0, "errors": 0} for name in names}
+
+    # Todos os processos comecam juntos para a disputa pelo lock ser real.
+    time.sleep(max(0.0, start_at - time.time()))
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        started = time.perf_counter()
+        try:
+            OPERATIONS[name](db, rng, state)
+        except sqlite3.Error as exc:
+            results[name]["busy" if is_busy(exc) else "errors"] += 1
+        else:
+            results[name]["latencies"].append((time.perf_counter() - started) * 1000)
+        if think_ms:
+            time.sleep(rng.expovariate(1 / think_ms) / 1000)
+    db.close()
+    return results
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(per_client: list[dict], duration: float) -> dict:
+    operations = {}
+    totals = {"ok": 0, "busy": 0, "errors": 0}
+    for name in MIX:
+        latencies = sorted(
+            latency for result in per_client for latency in result[name]["latencies"]
+        )
+        busy = sum(result[name]["busy"] for result in per_client)
+        errors = sum(result[name]["errors"] for result in per_client)
+        attempts = len(latencies) + busy + errors
+        operations[name] = {
+            "ok": len(latencies),
+            "busy": busy,
+            "errors": errors,
+            "busy_rate": busy / attempts if attempts else 0.0,
+            "ops_per_s": len(latencies) / duration,
+            "mean_ms": statistics.fmean(latencies) if latencies else 0.0,
+            "p50_ms": _percentile(latencies, 0.50),
+            "p95_ms": _percentile(latencies, 0.95),
+            "p99_ms": _percentile(latencies, 0.99),
+            "max_ms": latencies[-1] if latencies else 0.0,
+        }
+        totals["ok"] += len(latencies)
+        totals["busy"] += busy
+        totals["errors"] += errors
+    attempts = totals["ok"] + totals["busy"] + totals["errors"]
+    totals["ops_per_s"] = totals["ok"] / duration
+    totals["busy_rate"] = totals["busy"] / attempts if attempts else 0.0
+    return {"totals": totals, "operations": operations}
+
+
+def run(db_path: Path, clients: int, duration: float, think_ms: float) -> dict:
+    with closing(sqlite3.connect(db_path)) as conn:
+        chamados = int(conn.execute("SELECT MAX(id) FROM chamados").fetchone()[0] or 1)
+    start_at = time.time() + 1.0 + clients * 0.05
+    # spawn para o comportamento ser o mesmo no Windows, onde o app roda.
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(clients) as pool:
+        per_client = pool.map(
+            client,
+            [
+                (str(db_path), worker, start_at, duration, think_ms, chamados)
+                for worker in range(clients)
+            ],
+        )
+    return summarize(per_client, duration)
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"{'operacao':<14} {'ok':>8} {'busy':>6} {'busy %':>7} {'ops/s':>9} "
+        f"{'p50':>8} {'p95':>8} {'p99':>8} {'max':>9}",
+        file=sys.stderr,
+    )
+    for name, row in report["operations"].items():
+        print(
+            f"{name:<14} {row['ok']:>8} {row['busy']:>6} {row['busy_rate'] * 100:>6.1f}% "
+            f"{row['ops_per_s']:>9.1f} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+            f"{row['p99_ms']:>8.1f} {row['max_ms']:>9.1f}",
+            file=sys.stderr,
+        )
+    totals = report["totals"]
+    print(
+        f"total: {totals['ops_per_s']:.1f} ops/s, {totals['busy']} SQLITE_BUSY "
+        f"({totals['busy_rate'] * 100:.2f}%), {totals['errors']} outros erros",
+        file=sys.stderr,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Simula varios clientes desktop, cada um num processo, sobre o mesmo erpti.db.",
+    )
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="segundos de carga")
+    parser.add_argument("--think-ms", type=float, default=50.0, help="pausa media entre acoes")
+    parser.add_argument("--rows", type=int, default=5_000, help="linhas por tabela do banco gerado")
+    parser.add_argument("--db", type=Path, default=None, help="usa uma copia deste banco")
+    parser.add_argument("--output", type=Path, default=None, help="grava o JSON neste arquivo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "erpti.db"
+        if args.db is not None:
+            with closing(sqlite3.connect(args.db)) as source:
+                with closing(sqlite3.connect(db_path)) as target:
+                    source.backup(target)
+        else:
+            populate(db_path, args.rows)
+        report = run(db_path, args.clients, args.duration, args.think_ms)
+
+    report["config"] = {
+        "clients": args.clients,
+        "duration_s": args.duration,
+        "think_ms": args.think_ms,
+        "sqlite": sqlite3.sqlite_version,
+    }
+    print_report(report)
+    payload = json.dumps(report, indent=2)
+    if args.output is not None:
+        args.output.write_text(payload + "\n", encoding="utf-8")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
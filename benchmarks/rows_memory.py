@@ -0,0 +1,152 @@
+import argparse
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from contextlib import closing
+from pathlib import Path
+
+from benchmarks import synthetic
+from erpti.app import MODULE_DATASETS
+from erpti.database import DatabaseManager
+
+
+EQUIPMENT_COLUMNS = (
+    "id_interno",
+    "patrimonio",
+    "selo_patrimonio",
+    "equipamento",
+    "modelo",
+    "marca",
+    "serie",
+    "mem",
+    "processador",
+    "geracao",
+    "hd",
+    "mod_hd",
+)
+
+
+def populate(db_path: Path, rows: int) -> None:
+    db = DatabaseManager(str(db_path))
+    db.initialize(["TI"])
+    db.close()
+    with closing(sqlite3.connect(db_path)) as conn:
+        conn.executemany(
+            f"""
+            INSERT INTO equipments ({', '.join(EQUIPMENT_COLUMNS)})
+            VALUES ({', '.join(['?'] * len(EQUIPMENT_COLUMNS))})
+            """,
+            (
+                (
+                    f"EQ-{i:06d}",
+                    f"{100000 + i}",
+                    f"S{i:06d}",
+                    "Notebook",
+                    "Latitude 5420",
+                    "Dell",
+                    f"SN{i:010d}",
+                    "16GB",
+                    "Intel Core i5-1145G7",
+                    "11",
+                    "512GB",
+                    "NVMe",
+                )
+                for i in range(rows)
+            ),
+        )
+        conn.commit()
+
+
+def measure(label: str, work) -> None:
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = work()
+    elapsed = time.perf_counter() - started
+    # "retido" e o que continua vivo enquanto o resultado fica em memoria, como no app.
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if isinstance(result, int):
+        count, retained = result, 0
+    else:
+        count = len(result)
+    per_row = retained / count if count else 0.0
+    print(
+        f"{label:<28} {count:>9} {elapsed * 1000:>10.1f} {peak / 1024 / 1024:>12.2f} "
+        f"{retained / 1024 / 1024:>12.2f} {per_row:>10.0f}"
+    )
+
+
+def run(rows: int, batch_size: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        populate(db_path, rows)
+        db = DatabaseManager(str(db_path))
+        db.fetch_rows("equipments", ("id",))
+
+        def full_load() -> list:
+            return db.fetch_rows("equipments", EQUIPMENT_COLUMNS)
+
+        def records() -> list:
+            return db.fetch_records("equipments", EQUIPMENT_COLUMNS)
+
+        def paged() -> int:
+            count = 0
+            after_id = 0
+            while after_id is not None:
+                page, after_id = db.fetch_rows_page(
+                    "equipments", EQUIPMENT_COLUMNS, after_id, batch_size
+                )
+                count += len(page)
+            return count
+
+        def streamed() -> int:
+            return sum(1 for _row in db.iter_rows("equipments", EQUIPMENT_COLUMNS, batch_size))
+
+        print(f"{rows} equipamentos, lote de {batch_size} linhas")
+        print(
+            f"{'modo':<28} {'linhas':>9} {'tempo ms':>10} {'pico MiB':>12} "
+            f"{'retido MiB':>12} {'bytes/linha':>10}"
+        )
+        measure("fetch_rows", full_load)
+        measure("fetch_records", records)
+        measure("fetch_rows_page", paged)
+        measure("iter_rows", streamed)
+        db.close()
+
+
+def run_modules(rows: int) -> None:
+    # Os mesmos datasets que o ERPDesktopApp mantem em memoria durante a sessao.
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        synthetic.populate(db_path, rows)
+        db = DatabaseManager(str(db_path))
+        print(f"{rows} linhas por modulo")
+        print(
+            f"{'modo':<28} {'linhas':>9} {'tempo ms':>10} {'pico MiB':>12} "
+            f"{'retido MiB':>12} {'bytes/linha':>10}"
+        )
+        for table, (_attribute, columns, _widget) in MODULE_DATASETS.items():
+            measure(f"fetch_rows[{table}]", lambda: db.fetch_rows(table, columns))
+            measure(f"fetch_records[{table}]", lambda: db.fetch_records(table, columns))
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Memoria de pico: fetch_rows x paginacao x streaming.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--modules",
+        action="store_true",
+        help="mede todos os datasets do app sobre dados sinteticos",
+    )
+    args = parser.parse_args()
+    if args.modules:
+        run_modules(args.rows)
+    else:
+        run(args.rows, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import argparse
+import json
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+from benchmarks.synthetic import BENCH_PASSWORD, BENCH_USERNAME, build_legacy_db, populate
+from erpti.database import DEFAULT_ACCESS_FOLDERS, DatabaseManager
+
+
+RESULTS_SCHEMA = 1
+DEFAULT_SIZES = (1_000, 100_000)
+REGRESSION_THRESHOLD = 1.25
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "samples": len(ordered),
+        "mean_ms": statistics.fmean(ordered),
+        "p50_ms": statistics.median(ordered),
+        "p95_ms": ordered[max(0, int(round(0.95 * len(ordered))) - 1)],
+        "min_ms": ordered[0],
+        "max_ms": ordered[-1],
+    }
+
+
+def time_call(call: Callable[[], object], repeats: int) -> list[float]:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def prepared_db(rows: int, seed: int, data_dir: Path | None, work_dir: Path) -> tuple[Path, float]:
+    # A geracao de 1M de linhas leva minutos; com --data-dir o banco gerado e reaproveitado.
+    work_path = work_dir / "erpti.db"
+    cached = data_dir / f"synthetic-{rows}-{seed}.db" if data_dir else None
+    if cached is not None and cached.exists():
+        shutil.copyfile(cached, work_path)
+        return work_path, 0.0
+
+    started = time.perf_counter()
+    populate(work_path, rows, seed)
+    generated_in = time.perf_counter() - started
+    if cached is not None:
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(work_path, cached)
+    return work_path, generated_in
+
+
+def run_size(rows: int, seed: int, repeats: int, data_dir: Path | None) -> list[dict]:
+    results = []
+
+    def record(operation: str, samples: list[float]) -> None:
+        results.append({"rows": rows, "operation": operation, **summarize(samples)})
+        print(f"  {operation:<36} p50 {results[-1]['p50_ms']:>10.2f} ms", file=sys.stderr)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path, generated_in = prepared_db(rows, seed, data_dir, Path(tmp))
+        if generated_in:
+            record("generate", [generated_in * 1000])
+
+        def startup() -> None:
+            db = DatabaseManager(str(db_path))
+            try:
+                db.initialize(DEFAULT_ACCESS_FOLDERS)
+            finally:
+                db.close()
+
+        record("initialize", time_call(startup, repeats))
+
+        db = DatabaseManager(str(db_path))
+        try:
+            db.initialize(DEFAULT_ACCESS_FOLDERS)
+            for table, columns in (
+                ("users", ("id", "nome", "departamento", "email")),
+                ("equipments", ("id", "id_interno", "patrimonio", "modelo", "serie")),
+                ("chamados", ("id", "titulo", "status", "responsavel")),
+            ):
+                record(
+                    f"fetch_rows[{table}]",
+                    time_call(lambda: db.fetch_rows(table, columns), repeats),
+                )
+
+            ip_row = {"ip": "10.255.0.1", "nome": "BENCH", "fabricante": "Dell", "endereco_mac": ""}
+            record("insert_row", time_call(lambda: db.insert_row("ips", ip_row), repeats * 20))
+            record(
+                "authenticate_user",
+                time_call(lambda: db.authenticate_user(BENCH_USERNAME, BENCH_PASSWORD), repeats),
+            )
+            record(
+                "fetch_chamado_messages",
+                time_call(lambda: db.fetch_chamado_messages(1, "publico"), repeats * 20),
+            )
+            record(
+                "fetch_chamado_messages_since",
+                time_call(lambda: db.fetch_chamado_messages_since(1), repeats * 20),
+            )
+            latest = db.fetch_chamado_messages_since(1)
+            after_id = int(latest[-1]["id"]) if latest else 0
+            record(
+                "fetch_chamado_messages_since[poll]",
+                time_call(lambda: db.fetch_chamado_messages_since(1, after_id=after_id), repeats * 20),
+            )
+
+            legacy_path = Path(tmp) / "legacy.sqlite3"
+            build_legacy_db(legacy_path, rows, seed)
+            record(
+                "import_legacy_chamados",
+                time_call(lambda: db.import_legacy_chamados(str(legacy_path)), 1),
+            )
+            record(
+                "import_legacy_chamados[reimport]",
+                time_call(lambda: db.import_legacy_chamados(str(legacy_path)), repeats),
+            )
+        finally:
+            db.close()
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(previous: dict, current: dict, threshold: float) -> int:
+    baseline = {(row["rows"], row["operation"]): row for row in previous["results"]}
+    regressions = 0
+    print(
+        f"{'linhas':>9} {'operacao':<36} {'antes':>10} {'agora':>10} {'razao':>7}",
+        file=sys.stderr,
+    )
+    for row in current["results"]:
+        before = baseline.get((row["rows"], row["operation"]))
+        if before is None or not before["p50_ms"]:
+            continue
+        ratio = row["p50_ms"] / before["p50_ms"]
+        flag = "  REGRESSAO" if ratio >= threshold else ""
+        regressions += bool(flag)
+        print(
+            f"{row['rows']:>9} {row['operation']:<36} {before['p50_ms']:>10.2f} "
+            f"{row['p50_ms']:>10.2f} {ratio:>6.2f}x{flag}",
+            file=sys.stderr,
+        )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Mede as operacoes principais do DatabaseManager sobre dados sinteticos.",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_SIZES),
+        help="linhas por tabela (ex.: 1000 100000 1000000)",
+    )
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", type=Path, default=None, help="cache dos bancos gerados")
+    parser.add_argument("--output", type=Path, default=None, help="grava o JSON neste arquivo")
+    parser.add_argument("--compare", type=Path, default=None, help="JSON de uma execucao anterior")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    report = {
+        "schema": RESULTS_SCHEMA,
+        "revision": git_revision(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "repeats": args.repeats,
+        "results": [],
+    }
+    for rows in args.sizes:
+        print(f"{rows} linhas por tabela", file=sys.stderr)
+        report["results"].extend(run_size(rows, args.seed, args.repeats, args.data_dir))
+
+    payload = json.dumps(report, indent=2)
+    if args.output is not None:
+        args.output.write_text(payload + "\n", encoding="utf-8")
+    else:
+        print(payload)
+
+    if args.compare is not None:
+        previous = json.loads(args.compare.read_text(encoding="utf-8"))
+        if compare(previous, report, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,370 @@
+import argparse
+import random
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Callable
+
+from erpti.database import DEFAULT_ACCESS_FOLDERS, DatabaseManager
+
+
+BENCH_USERNAME = "bench"
+BENCH_PASSWORD = "bench-senha"
+MESSAGES_PER_CHAMADO = 20
+
+FIRST_NAMES = (
+    "Ana", "Bruno", "Carla", "Diego", "Eduarda", "Felipe", "Gabriela", "Henrique",
+    "Isabela", "Joao", "Larissa", "Marcos", "Natalia", "Otavio", "Paula", "Rafael",
+    "Sabrina", "Thiago", "Vanessa", "Wagner",
+)
+LAST_NAMES = (
+    "Almeida", "Barbosa", "Cardoso", "Costa", "Ferreira", "Gomes", "Lima", "Martins",
+    "Oliveira", "Pereira", "Ribeiro", "Rodrigues", "Santos", "Silva", "Souza",
+)
+CARGOS = ("Analista", "Assistente", "Coordenador", "Engenheiro", "Estagiario", "Gerente")
+EQUIPMENT_MODELS = (
+    ("Notebook", "Dell", "Latitude 5420"),
+    ("Notebook", "Lenovo", "ThinkPad E14"),
+    ("Desktop", "HP", "ProDesk 400 G7"),
+    ("Desktop", "Dell", "OptiPlex 3080"),
+    ("Monitor", "LG", "24MK430H"),
+)
+PROCESSORS = ("Intel Core i5-1145G7", "Intel Core i7-10700", "AMD Ryzen 5 5600G")
+SOFTWARES = ("AutoCAD", "Office 365", "Windows 11 Pro", "Adobe Acrobat", "SketchUp", "Protheus")
+INSUMOS = ("Toner HP 85A", "Cabo HDMI", "Mouse USB", "Teclado USB", "Papel A4", "Cartucho Epson")
+FORNECEDORES = ("Kalunga", "Dell Brasil", "Pichau", "Kabum", "Mercado Livre")
+TIPOS_CHAMADO = ("Incidente", "Requisicao", "Duvida", "Acesso")
+URGENCIAS = ("Baixa", "Media", "Alta", "Critica")
+STATUS_CHAMADO = ("pendente", "pendente", "em_atendimento", "fechado", "fechado", "fechado")
+ASSUNTOS = (
+    "Impressora sem toner",
+    "Sem acesso a rede",
+    "VPN nao conecta",
+    "Outlook travando",
+    "Instalar AutoCAD",
+    "Senha expirada",
+    "Monitor piscando",
+    "Pasta compartilhada sem permissao",
+)
+
+
+def _person(rng: random.Random) -> tuple[str, str]:
+    return rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+
+def _date(rng: random.Random) -> str:
+    return f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(2019, 2025)}"
+
+
+def _users(rng: random.Random, i: int) -> tuple:
+    first, last = _person(rng)
+    return (
+        rng.choice(DEFAULT_ACCESS_FOLDERS),
+        f"{first} {last} {i}",
+        rng.choice(CARGOS),
+        "Usuario",
+        f"{first.lower()}.{last.lower()}{i}",
+        f"(11) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+        str(2000 + i % 8000),
+        f"{first.lower()}.{last.lower()}{i}@empresa.com.br",
+    )
+
+
+def _equipments(rng: random.Random, i: int) -> tuple:
+    equipamento, marca, modelo = rng.choice(EQUIPMENT_MODELS)
+    return (
+        f"EQ-{i:07d}",
+        str(100000 + i),
+        f"S{i:07d}",
+        equipamento,
+        modelo,
+        marca,
+        f"SN{rng.getrandbits(40):010X}",
+        rng.choice(("8GB", "16GB", "32GB")),
+        rng.choice(PROCESSORS),
+        str(rng.randint(8, 13)),
+        rng.choice(("256GB", "512GB", "1TB")),
+        rng.choice(("SSD", "NVMe", "HDD")),
+    )
+
+
+def _ips(rng: random.Random, i: int) -> tuple:
+    return (
+        f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+        f"HOST-{i:07d}",
+        rng.choice(("Dell", "HP", "Lenovo", "Cisco", "Ubiquiti")),
+        ":".join(f"{rng.getrandbits(8):02X}" for _ in range(6)),
+    )
+
+
+def _contacts(rng: random.Random, i: int) -> tuple:
+    first, last = _person(rng)
+    return (
+        str(1000 + i),
+        first,
+        last,
+        f"{first.lower()}.{last.lower()}{i}@empresa.com.br",
+        rng.choice(DEFAULT_ACCESS_FOLDERS),
+        rng.choice(("Ativo", "Ativo", "Ativo", "Inativo")),
+    )
+
+
+def _softwares(rng: random.Random, i: int) -> tuple:
+    return (
+        rng.choice(SOFTWARES),
+        f"HOST-{rng.randint(0, max(i, 1)):07d}",
+        rng.choice(DEFAULT_ACCESS_FOLDERS),
+        "-".join(f"{rng.getrandbits(20):05X}" for _ in range(5)),
+        f"licencas{i % 50}@empresa.com.br",
+    )
+
+
+def _insumos(rng: random.Random, i: int) -> tuple:
+    first, last = _person(rng)
+    return (
+        rng.choice(INSUMOS),
+        _date(rng),
+        str(rng.randint(1, 20)),
+        f"{first} {last}",
+        rng.choice(DEFAULT_ACCESS_FOLDERS),
+    )
+
+
+def _requisicoes(rng: random.Random, i: int) -> tuple:
+    qtd = rng.randint(1, 10)
+    valor = rng.randint(1_000, 900_000) / 100
+    return (
+        rng.choice(INSUMOS + SOFTWARES),
+        str(qtd),
+        f"{valor:.2f}",
+        f"{valor * qtd:.2f}",
+        _date(rng),
+        rng.choice(("Sim", "Nao", "")),
+        rng.choice(("Sim", "Nao", "")),
+        str(rng.randint(10_000, 999_999)),
+        rng.choice(("Compra", "Reposicao", "Licenca")),
+        rng.choice(FORNECEDORES),
+        f"https://loja.example.com/produto/{i}",
+    )
+
+
+def _emprestimos(rng: random.Random, i: int) -> tuple:
+    first, last = _person(rng)
+    equipamento, marca, modelo = rng.choice(EQUIPMENT_MODELS)
+    return (
+        f"{first} {last}",
+        f"{equipamento} {marca} {modelo}",
+        f"TERMO-{i:07d}",
+        f"termos/termo_{i:07d}.pdf",
+        rng.choice(("Emprestado", "Devolvido")),
+        _date(rng),
+    )
+
+
+def _chamados(rng: random.Random, i: int) -> tuple:
+    first, last = _person(rng)
+    status = rng.choice(STATUS_CHAMADO)
+    assunto = rng.choice(ASSUNTOS)
+    return (
+        f"{assunto} #{i}",
+        f"{assunto}. Usuario relata o problema desde {_date(rng)} no setor "
+        f"{rng.choice(DEFAULT_ACCESS_FOLDERS)}.",
+        f"{first} {last}",
+        rng.choice(TIPOS_CHAMADO),
+        rng.choice(URGENCIAS),
+        "",
+        "" if status == "pendente" else f"{rng.choice(FIRST_NAMES)} TI",
+        status,
+    )
+
+
+def _messages(chamados: int) -> Callable[[random.Random, int], tuple]:
+    with_messages = max(1, chamados // MESSAGES_PER_CHAMADO)
+
+    def build(rng: random.Random, i: int) -> tuple:
+        first, _last = _person(rng)
+        return (
+            1 + i % with_messages,
+            rng.choice(("publico", "publico", "interno")),
+            first,
+            rng.choice(
+                (
+                    "Pode reiniciar a maquina, por favor?",
+                    "Reiniciei e continua igual.",
+                    "Chamado encaminhado para o fornecedor.",
+                    "Troquei o cabo de rede, testar agora.",
+                    "Resolvido, obrigado!",
+                )
+            ),
+        )
+
+    return build
+
+
+TABLES: dict[str, tuple[tuple[str, ...], Callable[[random.Random, int], tuple]]] = {
+    "users": (
+        ("departamento", "nome", "cargo", "perfil", "username", "telefone", "ramal", "email"),
+        _users,
+    ),
+    "equipments": (
+        (
+            "id_interno",
+            "patrimonio",
+            "selo_patrimonio",
+            "equipamento",
+            "modelo",
+            "marca",
+            "serie",
+            "mem",
+            "processador",
+            "geracao",
+            "hd",
+            "mod_hd",
+        ),
+        _equipments,
+    ),
+    "ips": (("ip", "nome", "fabricante", "endereco_mac"), _ips),
+    "emails": (("nro", "nome", "sobrenome", "email", "grupo", "situacao"), _contacts),
+    "ramais": (("nro", "nome", "sobrenome", "email", "grupo", "situacao"), _contacts),
+    "softwares": (("nome", "computador", "setor", "serial", "conta"), _softwares),
+    "insumos": (("insumo", "data", "qtd", "nome", "departamento"), _insumos),
+    "requisicoes": (
+        (
+            "solicitacao",
+            "qtd",
+            "valor",
+            "total",
+            "requisitado",
+            "aprovado",
+            "recebido",
+            "nf",
+            "tipo",
+            "fornecedor",
+            "link",
+        ),
+        _requisicoes,
+    ),
+    "emprestimos": (
+        ("nome", "equipamento", "documento", "arquivo", "situacao", "data"),
+        _emprestimos,
+    ),
+    "chamados": (
+        ("titulo", "descricao", "autor", "tipo", "urgencia", "arquivo", "responsavel", "status"),
+        _chamados,
+    ),
+}
+
+
+def populate(
+    db_path: Path,
+    rows: int,
+    seed: int = 0,
+    progress: Callable[[str], None] | None = None,
+) -> None:
+    db = DatabaseManager(str(db_path))
+    db.initialize(DEFAULT_ACCESS_FOLDERS)
+    tables = dict(TABLES)
+    tables["chamado_messages"] = (("chamado_id", "canal", "autor", "mensagem"), _messages(rows))
+
+    with closing(sqlite3.connect(db_path)) as conn:
+        for table, (columns, build) in tables.items():
+            started = time.perf_counter()
+            rng = random.Random(f"{seed}:{table}")
+            placeholders = ", ".join(["?"] * len(columns))
+            conn.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                (build(rng, i) for i in range(rows)),
+            )
+            conn.commit()
+            if progress is not None:
+                progress(f"{table}: {rows} linhas em {time.perf_counter() - started:.1f} s")
+
+        conn.execute("INSERT INTO user_groups (nome) VALUES ('TI')")
+        conn.executemany(
+            "INSERT INTO user_group_members (group_id, user_id) VALUES (1, ?)",
+            ((user_id,) for user_id in range(1, min(rows, 20) + 1)),
+        )
+        conn.commit()
+
+    # Todos os usuarios ficam com o mesmo hash: PBKDF2 por linha tornaria a geracao inviavel.
+    password_hash = db._hash_password(BENCH_PASSWORD)
+    with closing(sqlite3.connect(db_path)) as conn:
+        conn.execute("UPDATE users SET senha_hash = ?", (password_hash,))
+        conn.execute("UPDATE users SET username = ? WHERE id = 1", (BENCH_USERNAME,))
+        conn.commit()
+    db.backfill_typed_columns()
+    db.prune_change_log()
+    db.close()
+
+
+def build_legacy_db(path: Path, tickets: int, seed: int = 0) -> None:
+    rng = random.Random(f"{seed}:legacy")
+    users = max(1, tickets // 10)
+    with closing(sqlite3.connect(path)) as conn:
+        conn.executescript(
+            """
+            CREATE TABLE auth_user (
+                id INTEGER PRIMARY KEY, username TEXT, first_name TEXT, last_name TEXT
+            );
+            CREATE TABLE tickets_ticket (
+                id INTEGER PRIMARY KEY, title TEXT, description TEXT, created_by_id INTEGER,
+                assigned_to_id INTEGER, ticket_type TEXT, urgency TEXT, status TEXT
+            );
+            CREATE TABLE tickets_ticketattachment (
+                id INTEGER PRIMARY KEY, ticket_id INTEGER, file TEXT
+            );
+            CREATE INDEX tickets_ticketattachment_ticket_id
+                ON tickets_ticketattachment(ticket_id);
+            """
+        )
+        conn.executemany(
+            "INSERT INTO auth_user VALUES (?, ?, ?, ?)",
+            (
+                (user_id, f"user{user_id}", *_person(rng))
+                for user_id in range(1, users + 1)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO tickets_ticket VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    ticket_id,
+                    rng.choice(ASSUNTOS),
+                    f"Chamado aberto no sistema antigo ({ticket_id})",
+                    rng.randint(1, users),
+                    rng.randint(1, users),
+                    rng.choice(TIPOS_CHAMADO),
+                    rng.choice(URGENCIAS),
+                    rng.choice(("new", "in_progress", "resolved", "resolved")),
+                )
+                for ticket_id in range(1, tickets + 1)
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO tickets_ticketattachment (ticket_id, file) VALUES (?, ?)",
+            (
+                (ticket_id, f"anexos/{ticket_id}.png")
+                for ticket_id in range(1, tickets + 1)
+                if rng.random() < 0.3
+            ),
+        )
+        conn.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Gera um erpti.db com dados sinteticos.")
+    parser.add_argument("db_path", type=Path)
+    parser.add_argument("--rows", type=int, default=1_000, help="linhas por tabela")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--legacy", type=Path, default=None, help="gera tambem um helpdesk antigo")
+    args = parser.parse_args()
+    if args.db_path.exists():
+        parser.error(f"{args.db_path} ja existe")
+    populate(args.db_path, args.rows, args.seed, progress=print)
+    if args.legacy is not None:
+        build_legacy_db(args.legacy, args.rows, args.seed)
+
+
+if __name__ == "__main__":
+    main()
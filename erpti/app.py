@@ -1,38 +1,187 @@
+import logging
+import time
+from bisect import bisect_left
+from datetime import date, timedelta
 import tkinter as tk
 from tkinter import filedialog
 from tkinter import messagebox
 from tkinter import ttk
 
-from erpti.database import DatabaseManager
-
-
-DEFAULT_ACCESS_FOLDERS = [
-    "Comun",
-    "Almoxarifado",
-    "Contabil",
-    "Comercial",
-    "Compras",
-    "Contratos",
-    "Financeiro",
-    "Fiscal",
-    "Eventos",
-    "Gerencia",
-    "Manutencao",
-    "Obras",
-    "Obras PCP",
-    "Orcamentos",
-    "Planejamento",
-    "Qualidade",
-    "Producao",
-    "Projetos",
-    "Projetos PCP",
-    "RH",
-    "Romaneios",
-    "SAC",
-    "Seguranca Trabalho",
-    "Terceiros",
-    "TI",
-]
+from erpti.attachments import is_attachment_ref
+from erpti.database import DEFAULT_ACCESS_FOLDERS, DatabaseManager
+from erpti.migrations import STATS_METRICS
+from erpti.records import record_type
+from erpti.values import TYPED_COLUMNS, format_cents, format_date, parse_cents, parse_date, parse_quantity
+
+
+logger = logging.getLogger(__name__)
+
+LOGIN_POLL_MS = 30
+LOGIN_LATENCY_BUDGET_MS = 800
+
+# tabela -> (atributo com os dados em memoria, colunas carregadas, Treeview do modulo)
+MODULE_DATASETS = {
+    "users": (
+        "users_data",
+        (
+            "id",
+            "departamento",
+            "nome",
+            "cargo",
+            "perfil",
+            "username",
+            "senha",
+            "senha_hash",
+            "telefone",
+            "ramal",
+            "email",
+        ),
+        None,
+    ),
+    "equipments": (
+        "equipment_data",
+        (
+            "id",
+            "id_interno",
+            "patrimonio",
+            "selo_patrimonio",
+            "equipamento",
+            "modelo",
+            "marca",
+            "serie",
+            "mem",
+            "processador",
+            "geracao",
+            "hd",
+            "mod_hd",
+        ),
+        "equipment_table",
+    ),
+    "ips": ("ip_data", ("id", "ip", "nome", "fabricante", "endereco_mac"), "ip_table"),
+    "emails": (
+        "email_data",
+        ("id", "nro", "nome", "sobrenome", "email", "grupo", "situacao"),
+        "email_table",
+    ),
+    "ramais": (
+        "ramal_data",
+        ("id", "nro", "nome", "sobrenome", "email", "grupo", "situacao"),
+        "ramal_table",
+    ),
+    "softwares": (
+        "software_data",
+        ("id", "nome", "computador", "setor", "serial", "conta"),
+        "software_table",
+    ),
+    "insumos": (
+        "insumo_data",
+        ("id", "insumo", "data", "qtd", "nome", "departamento"),
+        "insumo_table",
+    ),
+    "requisicoes": (
+        "requisicao_data",
+        (
+            "id",
+            "solicitacao",
+            "qtd",
+            "valor",
+            "total",
+            "requisitado",
+            "aprovado",
+            "recebido",
+            "nf",
+            "tipo",
+            "fornecedor",
+            "link",
+        ),
+        "requisicao_table",
+    ),
+    "emprestimos": (
+        "emprestimo_data",
+        ("id", "nome", "equipamento", "documento", "arquivo", "situacao", "data"),
+        "emprestimo_table",
+    ),
+    "chamados": (
+        "chamado_data",
+        (
+            "id",
+            "titulo",
+            "descricao",
+            "autor",
+            "tipo",
+            "urgencia",
+            "arquivo",
+            "responsavel",
+            "status",
+            "legacy_source",
+            "legacy_id",
+        ),
+        None,
+    ),
+}
+CHANGE_POLL_MS = 5000
+MAX_INCREMENTAL_CHANGES = 2000
+CLOSED_STATUSES = ("fechado", "finalizado", "resolved")
+CLOSED_PAGE_SIZE = 200
+USERS_PAGE_SIZE = 200
+STATS_TABLES = frozenset(spec.table for spec in STATS_METRICS.values())
+SPEND_WINDOW_DAYS = 30
+CHAT_POLL_MS = 3000
+ATTACHMENT_SCAN_MS = 10 * 60 * 1000
+TYPED_FIELD_HINTS = {
+    parse_quantity: "numero inteiro",
+    parse_cents: "valor em reais, ex.: 1.234,56",
+    parse_date: "data no formato dd/mm/aaaa",
+}
+
+
+def _top_entries(counts: dict[str, int], empty_label: str = "", limit: int = 3) -> str:
+    ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return ", ".join(f"{key or empty_label} ({value})" for key, value in ranked)
+
+
+def _format_count(value: int) -> str:
+    return f"{value:,}".replace(",", ".")
+
+
+def _format_money(cents: int) -> str:
+    return "R$ " + format_cents(cents)
+
+
+def _dashboard_kpis(stats: dict[str, dict[str, int]], spend: dict[str, int]) -> list[tuple[str, str, str]]:
+    status = stats.get("chamados_status", {})
+    marcas = stats.get("equipments_marca", {})
+    insumos = stats.get("insumos_departamento", {})
+    emprestimos = stats.get("emprestimos_situacao", {})
+    aprovacao = stats.get("requisicoes_aprovado", {})
+    return [
+        (
+            "Chamados abertos",
+            _format_count(sum(value for key, value in status.items() if key not in CLOSED_STATUSES)),
+            _top_entries(stats.get("chamados_abertos_responsavel", {}), "Sem responsavel"),
+        ),
+        ("Equipamentos", _format_count(sum(marcas.values())), _top_entries(marcas, "Sem marca")),
+        (
+            "Insumos consumidos",
+            _format_count(sum(insumos.values())),
+            _top_entries(insumos, "Sem departamento"),
+        ),
+        (
+            "Emprestimos abertos",
+            _format_count(sum(value for key, value in emprestimos.items() if key != "devolvido")),
+            f"{emprestimos.get('devolvido', 0)} devolvidos",
+        ),
+        (
+            "Requisicoes aguardando",
+            _format_count(aprovacao.get("esperando", 0) + aprovacao.get("", 0)),
+            f"{aprovacao.get('sim', 0)} aprovadas, {aprovacao.get('nao', 0)} recusadas",
+        ),
+        (
+            f"Compras {SPEND_WINDOW_DAYS} dias",
+            _format_money(spend["total_centavos"]),
+            f"{spend['requisicoes']} requisicoes, {spend['quantidade']} itens",
+        ),
+    ]
 
 
 class ERPDesktopApp(tk.Tk):
@@ -47,6 +196,8 @@ class ERPDesktopApp(tk.Tk):
         self._fullscreen = False
         self.bind("<F11>", self._toggle_fullscreen)
         self.bind("<Escape>", self._exit_fullscreen)
+        # Atalho escondido para suporte: estatisticas do banco.
+        self.bind("<Control-Shift-D>", self._open_diagnostics_dialog)
 
         self.modules = [
             ("Usuarios", "Controle de usuarios"),
@@ -67,6 +218,8 @@ class ERPDesktopApp(tk.Tk):
         self._configure_styles()
 
         self.current_user = tk.StringVar(value="Administrador")
+        self._login_future = None
+        self._attachment_scan = None
         self.users_data = []
         self.equipment_data = []
         self.ip_data = []
@@ -80,103 +233,143 @@ class ERPDesktopApp(tk.Tk):
         self.access_folders = []
 
         self.db = DatabaseManager("erpti.db")
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
         self.db.initialize(DEFAULT_ACCESS_FOLDERS)
         self._load_data_from_db()
         self._show_login()
+        self._schedule_change_poll()
+        self.after(ATTACHMENT_SCAN_MS, self._scan_attachments_in_background)
 
     def _load_data_from_db(self) -> None:
-        self.users_data = self.db.fetch_rows(
-            "users",
-            (
-                "id",
-                "departamento",
-                "nome",
-                "cargo",
-                "perfil",
-                "username",
-                "senha",
-                "senha_hash",
-                "telefone",
-                "ramal",
-                "email",
-            ),
-        )
+        self._change_seq = self.db.latest_change_seq()
+        for table, (attribute, columns, _widget) in MODULE_DATASETS.items():
+            setattr(self, attribute, self.db.fetch_records(table, columns))
         self._sync_user_group_labels()
-        self.equipment_data = self.db.fetch_rows(
-            "equipments",
-            (
-                "id_interno",
-                "patrimonio",
-                "selo_patrimonio",
-                "equipamento",
-                "modelo",
-                "marca",
-                "serie",
-                "mem",
-                "processador",
-                "geracao",
-                "hd",
-                "mod_hd",
-            ),
-        )
-        self.ip_data = self.db.fetch_rows(
-            "ips",
-            ("ip", "nome", "fabricante", "endereco_mac"),
-        )
-        self.email_data = self.db.fetch_rows(
-            "emails",
-            ("nro", "nome", "sobrenome", "email", "grupo", "situacao"),
-        )
-        self.ramal_data = self.db.fetch_rows(
-            "ramais",
-            ("nro", "nome", "sobrenome", "email", "grupo", "situacao"),
-        )
-        self.software_data = self.db.fetch_rows(
-            "softwares",
-            ("nome", "computador", "setor", "serial", "conta"),
-        )
-        self.insumo_data = self.db.fetch_rows(
-            "insumos",
-            ("insumo", "data", "qtd", "nome", "departamento"),
-        )
-        self.requisicao_data = self.db.fetch_rows(
-            "requisicoes",
-            (
-                "solicitacao",
-                "qtd",
-                "valor",
-                "total",
-                "requisitado",
-                "aprovado",
-                "recebido",
-                "nf",
-                "tipo",
-                "fornecedor",
-                "link",
-            ),
-        )
-        self.emprestimo_data = self.db.fetch_rows(
-            "emprestimos",
-            ("nome", "equipamento", "documento", "arquivo", "situacao", "data"),
-        )
-        self.chamado_data = self.db.fetch_rows(
-            "chamados",
-            (
-                "id",
-                "titulo",
-                "descricao",
-                "autor",
-                "tipo",
-                "urgencia",
-                "arquivo",
-                "responsavel",
-                "status",
-                "legacy_source",
-                "legacy_id",
-            ),
-        )
         self.access_folders = self.db.fetch_access_folders()
 
+    def _remember_row(self, table: str, row: dict[str, object]) -> None:
+        attribute, columns, _widget = MODULE_DATASETS[table]
+        getattr(self, attribute).append(record_type(table, columns).from_mapping(row))
+
+    def _widget_alive(self, attribute: str) -> bool:
+        widget = getattr(self, attribute, None)
+        return widget is not None and bool(widget.winfo_exists())
+
+    def _schedule_change_poll(self) -> None:
+        self.after(CHANGE_POLL_MS, self._poll_changes)
+
+    def _poll_changes(self) -> None:
+        try:
+            self._apply_changes()
+        finally:
+            self._schedule_change_poll()
+
+    def _scan_attachments_in_background(self) -> None:
+        # Nada na abertura: um lote de anexos vencidos a cada ATTACHMENT_SCAN_MS. Com varios
+        # clientes abertos, os lotes se dividem entre eles em vez de cada um conferir tudo.
+        previous = self._attachment_scan
+        if previous is None or previous.done():
+            if previous is not None and previous.exception() is not None:
+                logger.error("Falha na verificacao de anexos", exc_info=previous.exception())
+            self._attachment_scan = self.db.scan_attachments_async()
+        self.after(ATTACHMENT_SCAN_MS, self._scan_attachments_in_background)
+
+    def _apply_changes(self) -> None:
+        changes = self.db.fetch_changes_since(self._change_seq)
+        if changes is None or len(changes) > MAX_INCREMENTAL_CHANGES:
+            self._load_data_from_db()
+            self._refresh_all_modules()
+            return
+        if not changes:
+            return
+
+        self._change_seq = max(int(change["seq"]) for change in changes)
+        changed_by_table: dict[str, dict[int, str]] = {}
+        for change in changes:
+            changed_by_table.setdefault(change["table_name"], {})[int(change["row_id"])] = change["op"]
+
+        for table, row_ops in changed_by_table.items():
+            if table not in MODULE_DATASETS:
+                continue
+            attribute, columns, _widget = MODULE_DATASETS[table]
+            fresh = {
+                int(row["id"]): row
+                for row in self.db.fetch_records_by_ids(
+                    table,
+                    columns,
+                    [row_id for row_id, op in row_ops.items() if op != "D"],
+                )
+            }
+            rows = [row for row in getattr(self, attribute) if int(row["id"]) not in row_ops]
+            rows.extend(fresh.values())
+            rows.sort(key=lambda row: int(row["id"]))
+            setattr(self, attribute, rows)
+
+        if {"users", "user_groups", "user_group_members"} & changed_by_table.keys():
+            self._sync_user_group_labels()
+        if "access_folders" in changed_by_table:
+            self.access_folders = self.db.fetch_access_folders()
+        self._refresh_all_modules(changed_by_table.keys(), changed_by_table)
+
+    def _refresh_all_modules(self, tables=None, changed_by_table=None) -> None:
+        tables = set(MODULE_DATASETS) | {"access_folders"} if tables is None else set(tables)
+        if tables & {"users", "user_groups", "user_group_members"} and self._widget_alive("users_table"):
+            self._refresh_users_table()
+        if "access_folders" in tables and self._widget_alive("access_listbox"):
+            self._refresh_access_list()
+        if tables & STATS_TABLES and self._widget_alive("kpi_frame"):
+            self._refresh_dashboard_stats()
+        if "chamados" in tables and getattr(self, "chamado_lists", None):
+            if next(iter(self.chamado_lists.values())).winfo_exists():
+                self._refresh_chamado_board()
+        for table, (attribute, columns, widget) in MODULE_DATASETS.items():
+            if not (widget and table in tables and self._widget_alive(widget)):
+                continue
+            if changed_by_table and table in changed_by_table:
+                self._update_treeview_rows(
+                    getattr(self, widget), getattr(self, attribute), columns[1:], changed_by_table[table]
+                )
+            else:
+                self._refill_treeview(getattr(self, widget), getattr(self, attribute), columns[1:])
+
+    def _refresh_dashboard_stats(self) -> None:
+        for child in self.kpi_frame.winfo_children():
+            child.destroy()
+        spend = self.db.fetch_requisicoes_totals(
+            start=(date.today() - timedelta(days=SPEND_WINDOW_DAYS)).isoformat()
+        )
+        kpis = _dashboard_kpis(self.db.fetch_dashboard_stats(), spend)
+        for column, (title, value, detail) in enumerate(kpis):
+            self.kpi_frame.columnconfigure(column, weight=1)
+            ttk.Label(self.kpi_frame, text=title, style="Sub.TLabel").grid(row=0, column=column, sticky="w")
+            ttk.Label(self.kpi_frame, text=value, style="Title.TLabel").grid(row=1, column=column, sticky="w")
+            ttk.Label(self.kpi_frame, text=detail, style="Sub.TLabel", wraplength=220).grid(
+                row=2, column=column, sticky="nw", padx=(0, 12)
+            )
+
+    def _refill_treeview(self, table: ttk.Treeview, rows: list[dict[str, str]], columns: tuple) -> None:
+        table.delete(*table.get_children())
+        for row in rows:
+            table.insert("", "end", iid=str(row["id"]), values=tuple(row[column] for column in columns))
+
+    def _update_treeview_rows(
+        self, table: ttk.Treeview, rows: list[dict[str, str]], columns: tuple, row_ops: dict[int, str]
+    ) -> None:
+        # Os itens usam o id da linha como iid e seguem a ordem de rows (por id). Aplicando as
+        # mudancas em ordem crescente de id, a posicao em rows vale como indice no Treeview.
+        for row_id in sorted(row_ops):
+            iid = str(row_id)
+            index = bisect_left(rows, row_id, key=lambda row: int(row["id"]))
+            if index == len(rows) or int(rows[index]["id"]) != row_id:
+                if table.exists(iid):
+                    table.delete(iid)
+                continue
+            values = tuple(rows[index][column] for column in columns)
+            if table.exists(iid):
+                table.item(iid, values=values)
+            else:
+                table.insert("", index, iid=iid, values=values)
+
     def _sync_user_group_labels(self) -> None:
         group_map = self.db.fetch_user_group_map()
         for user in self.users_data:
@@ -286,11 +479,25 @@ class ERPDesktopApp(tk.Tk):
         self.login_password.pack(fill="x", ipady=6)
         self.login_password.bind("<Return>", lambda _event: self._login())
 
-        ttk.Button(card, text="Entrar", command=self._login, style="Action.TButton").pack(
-            fill="x", pady=(28, 0)
-        )
+        self.login_button = ttk.Button(card, text="Entrar", command=self._login, style="Action.TButton")
+        self.login_button.pack(fill="x", pady=(28, 0))
+        self.login_progress = ttk.Progressbar(card, mode="indeterminate")
+
+    def _set_login_busy(self, busy: bool) -> None:
+        if busy:
+            self.login_button.state(["disabled"])
+            self.login_button.configure(text="Autenticando...")
+            self.login_progress.pack(fill="x", pady=(10, 0))
+            self.login_progress.start(12)
+        else:
+            self.login_progress.stop()
+            self.login_progress.pack_forget()
+            self.login_button.configure(text="Entrar")
+            self.login_button.state(["!disabled"])
 
     def _login(self) -> None:
+        if self._login_future is not None:
+            return
         username = self.login_user.get().strip()
         senha = self.login_password.get().strip()
 
@@ -300,7 +507,35 @@ class ERPDesktopApp(tk.Tk):
             self._show_dashboard()
             return
 
-        auth_user = self.db.authenticate_user(username, senha)
+        # O PBKDF2 roda em thread de trabalho; o resultado volta ao loop do Tk via after().
+        self._set_login_busy(True)
+        self._login_future = self.db.authenticate_user_async(username, senha)
+        self.after(LOGIN_POLL_MS, self._poll_login, username, time.perf_counter())
+
+    def _poll_login(self, username: str, started: float) -> None:
+        future = self._login_future
+        if not future.done():
+            self.after(LOGIN_POLL_MS, self._poll_login, username, started)
+            return
+
+        self._login_future = None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms > LOGIN_LATENCY_BUDGET_MS:
+            logger.warning(
+                "Login levou %.0f ms (orcamento de %d ms)",
+                elapsed_ms,
+                LOGIN_LATENCY_BUDGET_MS,
+            )
+        self._set_login_busy(False)
+        try:
+            auth_user = future.result()
+        except Exception:
+            logger.exception("Falha ao autenticar usuario")
+            messagebox.showerror("Erro no login", "Nao foi possivel validar o login no banco de dados.")
+            return
+        self._finish_login(username, auth_user)
+
+    def _finish_login(self, username: str, auth_user: dict[str, str] | None) -> None:
         if auth_user:
             self.current_user.set(auth_user.get("nome") or auth_user.get("username") or username)
             self._show_dashboard()
@@ -350,6 +585,10 @@ class ERPDesktopApp(tk.Tk):
             row=1, column=1, sticky="e", pady=(4, 0)
         )
 
+        self.kpi_frame = ttk.Frame(header, style="Card.TFrame")
+        self.kpi_frame.grid(row=2, column=0, columnspan=2, sticky="ew", pady=(14, 0))
+        self._refresh_dashboard_stats()
+
         self.notebook = ttk.Notebook(container)
         self.notebook.grid(row=1, column=0, sticky="nsew")
 
@@ -526,6 +765,8 @@ class ERPDesktopApp(tk.Tk):
 
         self.users_table = ttk.Treeview(users_table_frame, columns=columns, show="headings", height=12)
         self._users_sort_reverse = {column: False for column in columns}
+        self._users_sort = None
+        self._users_after = None
         self.users_table.heading(
             "nome",
             text="Nome completo",
@@ -555,6 +796,14 @@ class ERPDesktopApp(tk.Tk):
         users_scroll = ttk.Scrollbar(users_table_frame, orient="vertical", command=self.users_table.yview)
         users_scroll.grid(row=0, column=1, sticky="ns")
         self.users_table.configure(yscrollcommand=users_scroll.set)
+
+        self.users_more_button = ttk.Button(
+            users_table_frame,
+            text="Carregar mais",
+            command=self._load_users_page,
+            style="Action.TButton",
+        )
+        self.users_more_button.grid(row=1, column=0, sticky="e", pady=(10, 0))
         self._refresh_users_table()
 
         tab.columnconfigure(0, weight=1)
@@ -583,30 +832,21 @@ class ERPDesktopApp(tk.Tk):
         }
 
         self.db.insert_row("users", user_to_save)
-        self.users_data = self.db.fetch_rows(
-            "users",
-            (
-                "id",
-                "departamento",
-                "nome",
-                "cargo",
-                "perfil",
-                "username",
-                "senha",
-                "senha_hash",
-                "telefone",
-                "ramal",
-                "email",
-            ),
-        )
-        self._sync_user_group_labels()
-        self._refresh_users_table()
+        self._apply_changes()
         return True
 
     def _refresh_users_table(self) -> None:
         if not hasattr(self, "users_table"):
             return
+        if self._users_sort is not None:
+            # Recarrega as paginas ja exibidas na ordem do banco.
+            shown = len(self.users_table.get_children())
+            self.users_table.delete(*self.users_table.get_children())
+            self._users_after = None
+            self._load_users_page(max(shown, USERS_PAGE_SIZE))
+            return
         self.users_table.delete(*self.users_table.get_children())
+        self.users_more_button.state(["disabled"])
         for user in self.users_data:
             self.users_table.insert(
                 "",
@@ -622,16 +862,42 @@ class ERPDesktopApp(tk.Tk):
     def _sort_users_table(self, column: str) -> None:
         if not hasattr(self, "users_table"):
             return
-        rows = [
-            (self.users_table.set(item_id, column).lower(), item_id)
-            for item_id in self.users_table.get_children("")
-        ]
         reverse = self._users_sort_reverse.get(column, False)
-        rows.sort(reverse=reverse)
-        for index, (_value, item_id) in enumerate(rows):
-            self.users_table.move(item_id, "", index)
+        if column == "perfil":
+            # A coluna Grupos vem de fetch_user_group_map, nao de users.perfil.
+            self._users_sort = None
+            self.users_data.sort(key=lambda user: str(user.get("perfil", "")).lower(), reverse=reverse)
+        else:
+            self._users_sort = (column, reverse)
+        self._refresh_users_table()
         self._users_sort_reverse[column] = not reverse
 
+    def _load_users_page(self, limit: int | None = None) -> None:
+        if self._users_sort is None:
+            return
+        column, descending = self._users_sort
+        page, self._users_after = self.db.query_rows(
+            "users",
+            ("id", "nome", "cargo", "departamento"),
+            order_by=column,
+            descending=descending,
+            limit=limit or USERS_PAGE_SIZE,
+            after=self._users_after,
+        )
+        group_map = self.db.fetch_user_group_map()
+        for user in page:
+            self.users_table.insert(
+                "",
+                "end",
+                values=(
+                    user["nome"],
+                    user["cargo"] or "",
+                    user["departamento"],
+                    group_map.get(int(user["id"]), ""),
+                ),
+            )
+        self.users_more_button.state(["!disabled"] if self._users_after is not None else ["disabled"])
+
     def _open_user_groups_dialog(self) -> None:
         dialog = tk.Toplevel(self)
         dialog.title("Grupos de usuarios")
@@ -829,24 +1095,7 @@ class ERPDesktopApp(tk.Tk):
             refresh_users()
             if selected_label in state["user_map"]:
                 user_combo_var.set(selected_label)
-            self.users_data = self.db.fetch_rows(
-                "users",
-                (
-                    "id",
-                    "departamento",
-                    "nome",
-                    "cargo",
-                    "perfil",
-                    "username",
-                    "senha",
-                    "senha_hash",
-                    "telefone",
-                    "ramal",
-                    "email",
-                ),
-            )
-            self._sync_user_group_labels()
-            self._refresh_users_table()
+            self._apply_changes()
 
         ttk.Button(left, text="Cadastrar grupo", style="Action.TButton", command=add_group).grid(
             row=3, column=0, sticky="ew", pady=(8, 0)
@@ -1037,6 +1286,7 @@ class ERPDesktopApp(tk.Tk):
             self.equipment_table.insert(
                 "",
                 "end",
+                iid=str(equipment["id"]),
                 values=(
                     equipment["id_interno"],
                     equipment["patrimonio"],
@@ -1061,11 +1311,12 @@ class ERPDesktopApp(tk.Tk):
             messagebox.showwarning("Campos obrigatorios", "Preencha todos os campos do equipamento.")
             return False
 
-        self.db.insert_row("equipments", equipment_row)
-        self.equipment_data.append(equipment_row)
+        row_id = self.db.insert_row("equipments", equipment_row)
+        self._remember_row("equipments", {"id": row_id, **equipment_row})
         self.equipment_table.insert(
             "",
             "end",
+            iid=str(row_id),
             values=(
                 equipment_row["id_interno"],
                 equipment_row["patrimonio"],
@@ -1121,6 +1372,7 @@ class ERPDesktopApp(tk.Tk):
             self.ip_table.insert(
                 "",
                 "end",
+                iid=str(ip_row["id"]),
                 values=(ip_row["ip"], ip_row["nome"], ip_row["fabricante"], ip_row["endereco_mac"]),
             )
 
@@ -1132,11 +1384,12 @@ class ERPDesktopApp(tk.Tk):
             messagebox.showwarning("Campos obrigatorios", "Preencha IP, nome, fabricante e endereco MAC.")
             return False
 
-        self.db.insert_row("ips", ip_row)
-        self.ip_data.append(ip_row)
+        row_id = self.db.insert_row("ips", ip_row)
+        self._remember_row("ips", {"id": row_id, **ip_row})
         self.ip_table.insert(
             "",
             "end",
+            iid=str(row_id),
             values=(ip_row["ip"], ip_row["nome"], ip_row["fabricante"], ip_row["endereco_mac"]),
         )
         return True
@@ -1185,6 +1438,7 @@ class ERPDesktopApp(tk.Tk):
             self.email_table.insert(
                 "",
                 "end",
+                iid=str(email_row["id"]),
                 values=(
                     email_row["nro"],
                     email_row["nome"],
@@ -1206,11 +1460,12 @@ class ERPDesktopApp(tk.Tk):
             )
             return False
 
-        self.db.insert_row("emails", email_row)
-        self.email_data.append(email_row)
+        row_id = self.db.insert_row("emails", email_row)
+        self._remember_row("emails", {"id": row_id, **email_row})
         self.email_table.insert(
             "",
             "end",
+            iid=str(row_id),
             values=(
                 email_row["nro"],
                 email_row["nome"],
@@ -1266,6 +1521,7 @@ class ERPDesktopApp(tk.Tk):
             self.ramal_table.insert(
                 "",
                 "end",
+                iid=str(ramal_row["id"]),
                 values=(
                     ramal_row["nro"],
                     ramal_row["nome"],
@@ -1287,11 +1543,12 @@ class ERPDesktopApp(tk.Tk):
             )
             return False
 
-        self.db.insert_row("ramais", ramal_row)
-        self.ramal_data.append(ramal_row)
+        row_id = self.db.insert_row("ramais", ramal_row)
+        self._remember_row("ramais", {"id": row_id, **ramal_row})
         self.ramal_table.insert(
             "",
             "end",
+            iid=str(row_id),
             values=(
                 ramal_row["nro"],
                 ramal_row["nome"],
@@ -1344,6 +1601,7 @@ class ERPDesktopApp(tk.Tk):
             self.software_table.insert(
                 "",
                 "end",
+                iid=str(software_row["id"]),
                 values=(
                     software_row["nome"],
                     software_row["computador"],
@@ -1364,11 +1622,12 @@ class ERPDesktopApp(tk.Tk):
             )
             return False
 
-        self.db.insert_row("softwares", software_row)
-        self.software_data.append(software_row)
+        row_id = self.db.insert_row("softwares", software_row)
+        self._remember_row("softwares", {"id": row_id, **software_row})
         self.software_table.insert(
             "",
             "end",
+            iid=str(row_id),
             values=(
                 software_row["nome"],
                 software_row["computador"],
@@ -1420,6 +1679,7 @@ class ERPDesktopApp(tk.Tk):
             self.insumo_table.insert(
                 "",
                 "end",
+                iid=str(insumo_row["id"]),
                 values=(
                     insumo_row["insumo"],
                     insumo_row["data"],
@@ -1432,6 +1692,31 @@ class ERPDesktopApp(tk.Tk):
         tab.columnconfigure(0, weight=1)
         tab.rowconfigure(3, weight=1)
 
+    def _normalize_typed_fields(
+        self,
+        table: str,
+        row: dict[str, str],
+        optional: tuple[str, ...] = (),
+    ) -> bool:
+        invalid = []
+        for column in TYPED_COLUMNS[table]:
+            text = row[column.source]
+            if column.source in optional and text.strip() in ("", "-"):
+                continue
+            value = column.parse(text)
+            if value is None:
+                invalid.append(f"{column.source}: {TYPED_FIELD_HINTS[column.parse]}")
+            elif column.parse is parse_cents:
+                row[column.source] = format_cents(value)
+            elif column.parse is parse_date:
+                row[column.source] = format_date(value)
+            else:
+                row[column.source] = str(value)
+        if invalid:
+            messagebox.showwarning("Campos invalidos", "Corrija os campos:\n" + "\n".join(invalid))
+            return False
+        return True
+
     def _register_insumo(self, insumo_row: dict[str, str]) -> bool:
         if not all(insumo_row.values()):
             messagebox.showwarning(
@@ -1439,12 +1724,15 @@ class ERPDesktopApp(tk.Tk):
                 "Preencha insumo, data, qtd, nome e departamento.",
             )
             return False
+        if not self._normalize_typed_fields("insumos", insumo_row):
+            return False
 
-        self.db.insert_row("insumos", insumo_row)
-        self.insumo_data.append(insumo_row)
+        row_id = self.db.insert_row("insumos", insumo_row)
+        self._remember_row("insumos", {"id": row_id, **insumo_row})
         self.insumo_table.insert(
             "",
             "end",
+            iid=str(row_id),
             values=(
                 insumo_row["insumo"],
                 insumo_row["data"],
@@ -1526,6 +1814,7 @@ class ERPDesktopApp(tk.Tk):
             self.requisicao_table.insert(
                 "",
                 "end",
+                iid=str(requisicao_row["id"]),
                 values=(
                     requisicao_row["solicitacao"],
                     requisicao_row["qtd"],
@@ -1551,12 +1840,16 @@ class ERPDesktopApp(tk.Tk):
                 "Preencha todos os campos da requisicao (sem aprovado2).",
             )
             return False
+        # Requisicao ainda nao recebida: "-" no campo de data de recebimento.
+        if not self._normalize_typed_fields("requisicoes", requisicao_row, optional=("recebido",)):
+            return False
 
-        self.db.insert_row("requisicoes", requisicao_row)
-        self.requisicao_data.append(requisicao_row)
+        row_id = self.db.insert_row("requisicoes", requisicao_row)
+        self._remember_row("requisicoes", {"id": row_id, **requisicao_row})
         self.requisicao_table.insert(
             "",
             "end",
+            iid=str(row_id),
             values=(
                 requisicao_row["solicitacao"],
                 requisicao_row["qtd"],
@@ -1617,6 +1910,7 @@ class ERPDesktopApp(tk.Tk):
             self.emprestimo_table.insert(
                 "",
                 "end",
+                iid=str(emprestimo_row["id"]),
                 values=(
                     emprestimo_row["nome"],
                     emprestimo_row["equipamento"],
@@ -1637,12 +1931,15 @@ class ERPDesktopApp(tk.Tk):
                 "Preencha nome, equipamento, documento, arquivo, situacao e data.",
             )
             return False
+        if not self._normalize_typed_fields("emprestimos", emprestimo_row):
+            return False
 
-        self.db.insert_row("emprestimos", emprestimo_row)
-        self.emprestimo_data.append(emprestimo_row)
+        row_id = self.db.insert_row("emprestimos", emprestimo_row)
+        self._remember_row("emprestimos", {"id": row_id, **emprestimo_row})
         self.emprestimo_table.insert(
             "",
             "end",
+            iid=str(row_id),
             values=(
                 emprestimo_row["nome"],
                 emprestimo_row["equipamento"],
@@ -1674,6 +1971,17 @@ class ERPDesktopApp(tk.Tk):
             style="Logout.TButton",
             command=self._open_closed_chamados_window,
         ).grid(row=0, column=1, sticky="w", padx=(8, 0))
+        actions.columnconfigure(2, weight=1)
+        self.chamado_search_var = tk.StringVar()
+        search_entry = ttk.Entry(actions, textvariable=self.chamado_search_var, font=("Segoe UI", 11))
+        search_entry.grid(row=0, column=2, sticky="e", padx=(8, 0))
+        search_entry.bind("<Return>", lambda _event: self._search_chamados())
+        ttk.Button(
+            actions,
+            text="Buscar",
+            style="Action.TButton",
+            command=self._search_chamados,
+        ).grid(row=0, column=3, sticky="e", padx=(8, 0))
 
         board = ttk.Frame(tab, style="Card.TFrame")
         board.grid(row=3, column=0, sticky="nsew")
@@ -1800,23 +2108,7 @@ class ERPDesktopApp(tk.Tk):
                 return
 
         imported, skipped = self.db.import_legacy_chamados(legacy_path)
-        self.chamado_data = self.db.fetch_rows(
-            "chamados",
-            (
-                "id",
-                "titulo",
-                "descricao",
-                "autor",
-                "tipo",
-                "urgencia",
-                "arquivo",
-                "responsavel",
-                "status",
-                "legacy_source",
-                "legacy_id",
-            ),
-        )
-        self._refresh_chamado_board()
+        self._apply_changes()
         messagebox.showinfo(
             "Importacao concluida",
             f"Chamados importados: {imported}\nChamados ja existentes: {skipped}",
@@ -1835,6 +2127,9 @@ class ERPDesktopApp(tk.Tk):
                 "Preencha titulo, descricao, tipo e urgencia.",
             )
             return False
+        arquivo = self._store_attachment(arquivo)
+        if arquivo is None:
+            return False
 
         new_id = self.db.insert_chamado(
             titulo,
@@ -1846,7 +2141,8 @@ class ERPDesktopApp(tk.Tk):
             "pendente",
             "",
         )
-        self.chamado_data.append(
+        self._remember_row(
+            "chamados",
             {
                 "id": new_id,
                 "titulo": titulo,
@@ -1857,11 +2153,41 @@ class ERPDesktopApp(tk.Tk):
                 "arquivo": arquivo,
                 "responsavel": "",
                 "status": "pendente",
-            }
+            },
         )
         self._refresh_chamado_board()
         return True
 
+    def _store_attachment(self, path: str) -> str | None:
+        if not path or is_attachment_ref(path):
+            return path
+        try:
+            return self.db.store_attachment(path)
+        except OSError as exc:
+            messagebox.showerror("Anexo", f"Nao foi possivel anexar o arquivo:\n{exc}")
+            return None
+
+    def _attachment_label(self, arquivo: str) -> str:
+        if not is_attachment_ref(arquivo):
+            return arquivo
+        info = self.db.fetch_attachment(arquivo)
+        if not info:
+            return arquivo
+        return f"{info['nome']} ({int(info['tamanho']) / 1024:.0f} KB)"
+
+    def _save_attachment(self, arquivo: str) -> None:
+        info = self.db.fetch_attachment(arquivo)
+        destination = filedialog.asksaveasfilename(
+            title="Salvar anexo",
+            initialfile=info["nome"] if info else "",
+        )
+        if not destination:
+            return
+        try:
+            self.db.export_attachment(arquivo, destination)
+        except OSError as exc:
+            messagebox.showerror("Anexo", f"Nao foi possivel salvar o anexo:\n{exc}")
+
     def _open_new_chamado_dialog(self) -> None:
         dialog = tk.Toplevel(self)
         dialog.title("Novo chamado")
@@ -2034,11 +2360,15 @@ class ERPDesktopApp(tk.Tk):
 
     def _open_chamado_details(self, chamado_id: int) -> None:
         chamado = next((c for c in self.chamado_data if int(c["id"]) == int(chamado_id)), None)
+        if not chamado:
+            # Fechados ha mais tempo ficam no arquivo, fora de chamado_data.
+            chamado = self.db.fetch_chamado(int(chamado_id))
         if not chamado:
             return
+        archived = bool(chamado.get("arquivado"))
 
         dialog = tk.Toplevel(self)
-        dialog.title(f"Detalhes do chamado #{chamado_id}")
+        dialog.title(f"Detalhes do chamado #{chamado_id}{' (arquivado)' if archived else ''}")
         width = 980
         height = 720
         dialog.geometry(f"{width}x{height}")
@@ -2068,7 +2398,7 @@ class ERPDesktopApp(tk.Tk):
             ("Responsavel", chamado.get("responsavel", "") or "-"),
             ("Tipo", chamado.get("tipo", "")),
             ("Urgencia", chamado.get("urgencia", "")),
-            ("Arquivo", chamado.get("arquivo", "")),
+            ("Arquivo", self._attachment_label(chamado.get("arquivo", ""))),
         ]
         for row, (label, value) in enumerate(details):
             ttk.Label(frame, text=label, style="Sub.TLabel").grid(
@@ -2092,9 +2422,15 @@ class ERPDesktopApp(tk.Tk):
             closed_statuses = {"fechado", "finalizado", "resolved"}
             if str(chamado.get("status", "")).strip().lower() not in closed_statuses:
                 return
+            if archived and not self.db.unarchive_chamado(chamado_id):
+                messagebox.showerror("Chamado", f"Chamado #{chamado_id} nao encontrado no arquivo.")
+                return
             chamado["status"] = "pendente"
             chamado["responsavel"] = ""
             self.db.update_chamado_flow(chamado_id, "pendente", "")
+            if archived:
+                # Sem esperar o proximo poll: o chamado volta para chamado_data pelo change_log.
+                self._apply_changes()
             self._refresh_chamado_board()
             messagebox.showinfo("Chamado reaberto", f"Chamado #{chamado_id} voltou para pendentes.")
             dialog.destroy()
@@ -2111,6 +2447,14 @@ class ERPDesktopApp(tk.Tk):
             command=action_command,
         ).grid(row=0, column=2, sticky="e", padx=(10, 0))
 
+        if is_attachment_ref(chamado.get("arquivo", "")):
+            ttk.Button(
+                frame,
+                text="Salvar anexo",
+                style="Action.TButton",
+                command=lambda: self._save_attachment(chamado["arquivo"]),
+            ).grid(row=len(details) - 1, column=2, sticky="e", padx=(10, 0))
+
         ttk.Label(frame, text="Descricao", style="Sub.TLabel").grid(
             row=6, column=0, sticky="nw", padx=(0, 10), pady=(2, 6)
         )
@@ -2211,34 +2555,57 @@ class ERPDesktopApp(tk.Tk):
         )
 
         is_ti_user = self._is_current_user_in_ti_group()
+        if archived:
+            # Chamado arquivado e so leitura; para conversar, reabrir primeiro.
+            public_input.grid_remove()
+            interno_input.grid_remove()
         if not is_ti_user:
             interno_input.grid_remove()
             interno_text.configure(state="normal")
             interno_text.insert("1.0", "Apenas usuarios do grupo TI visualizam o chat interno.\n")
             interno_text.configure(state="disabled")
 
+        def insert_attachment(widget: tk.Text, arquivo: str) -> None:
+            tag = f"anexo_{arquivo}"
+            widget.insert(tk.END, f"  anexo: {self._attachment_label(arquivo)}\n", (tag,))
+            if is_attachment_ref(arquivo):
+                widget.tag_configure(tag, foreground="#7CC4FA", underline=True)
+                widget.tag_bind(tag, "<Button-1>", lambda _event: self._save_attachment(arquivo))
+
+        channels = ("publico", "interno") if is_ti_user else ("publico",)
+        text_by_channel = {"publico": public_text, "interno": interno_text}
+        last_message_id = 0
+
         def load_messages() -> None:
-            public_msgs = self.db.fetch_chamado_messages(chamado_id, "publico")
-            interno_msgs = self.db.fetch_chamado_messages(chamado_id, "interno")
-
-            public_text.configure(state="normal")
-            public_text.delete("1.0", tk.END)
-            for msg in public_msgs:
-                line = f"[{msg['criado_em']}] {msg['autor']}: {msg['mensagem']}\n"
-                public_text.insert(tk.END, line)
+            # So acrescenta o que chegou depois da ultima mensagem exibida.
+            nonlocal last_message_id
+            messages = self.db.fetch_chamado_messages_since(
+                chamado_id, channels, last_message_id, archived=archived
+            )
+            if not messages:
+                return
+            touched = set()
+            for msg in messages:
+                widget = text_by_channel[msg["canal"]]
+                if widget not in touched:
+                    widget.configure(state="normal")
+                    touched.add(widget)
+                widget.insert(tk.END, f"[{msg['criado_em']}] {msg['autor']}: {msg['mensagem']}\n")
                 if msg.get("arquivo"):
-                    public_text.insert(tk.END, f"  anexo: {msg['arquivo']}\n")
-            public_text.configure(state="disabled")
-
-            interno_text.configure(state="normal")
-            if is_ti_user:
-                interno_text.delete("1.0", tk.END)
-                for msg in interno_msgs:
-                    line = f"[{msg['criado_em']}] {msg['autor']}: {msg['mensagem']}\n"
-                    interno_text.insert(tk.END, line)
-                    if msg.get("arquivo"):
-                        interno_text.insert(tk.END, f"  anexo: {msg['arquivo']}\n")
-            interno_text.configure(state="disabled")
+                    insert_attachment(widget, msg["arquivo"])
+            for widget in touched:
+                widget.configure(state="disabled")
+                widget.see(tk.END)
+            last_message_id = int(messages[-1]["id"])
+
+        def poll_messages() -> None:
+            # Agendado na janela principal: a janela do chamado pode fechar a qualquer momento.
+            if not dialog.winfo_exists():
+                return
+            try:
+                load_messages()
+            finally:
+                self.after(CHAT_POLL_MS, poll_messages)
 
         def send_public() -> None:
             message = public_message_var.get().strip()
@@ -2246,6 +2613,9 @@ class ERPDesktopApp(tk.Tk):
             if not message:
                 messagebox.showwarning("Campo obrigatorio", "Digite a mensagem no chat publico.")
                 return
+            file_path = self._store_attachment(file_path)
+            if file_path is None:
+                return
             self.db.add_chamado_message(chamado_id, "publico", current_author, message, file_path)
             public_message_var.set("")
             public_file_var.set("")
@@ -2259,6 +2629,9 @@ class ERPDesktopApp(tk.Tk):
             if not message:
                 messagebox.showwarning("Campo obrigatorio", "Digite a mensagem no chat interno.")
                 return
+            file_path = self._store_attachment(file_path)
+            if file_path is None:
+                return
             self.db.add_chamado_message(chamado_id, "interno", current_author, message, file_path)
             interno_message_var.set("")
             interno_file_var.set("")
@@ -2272,6 +2645,200 @@ class ERPDesktopApp(tk.Tk):
         )
 
         load_messages()
+        if not archived:
+            self.after(CHAT_POLL_MS, poll_messages)
+
+    def _search_chamados(self) -> None:
+        query = self.chamado_search_var.get().strip()
+        if not query:
+            messagebox.showwarning("Campo obrigatorio", "Digite o termo da busca.")
+            return
+        results = self.db.search_chamados(
+            query,
+            limit=100,
+            include_internal=self._is_current_user_in_ti_group(),
+        )
+
+        dialog = tk.Toplevel(self)
+        dialog.title(f"Busca: {query}")
+        width = 900
+        height = 520
+        dialog.geometry(f"{width}x{height}")
+        dialog.configure(bg="#0A1B2A")
+        dialog.transient(self)
+        dialog.update_idletasks()
+
+        parent_x = self.winfo_rootx()
+        parent_y = self.winfo_rooty()
+        parent_w = self.winfo_width()
+        parent_h = self.winfo_height()
+        pos_x = parent_x + (parent_w - width) // 2
+        pos_y = parent_y + (parent_h - height) // 2
+        dialog.geometry(f"{width}x{height}+{max(pos_x, 0)}+{max(pos_y, 0)}")
+
+        frame = ttk.Frame(dialog, style="Card.TFrame", padding=14)
+        frame.pack(fill="both", expand=True, padx=10, pady=10)
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(1, weight=1)
+
+        ttk.Label(
+            frame,
+            text=f"{len(results)} chamado(s) encontrado(s)",
+            style="Sub.TLabel",
+        ).grid(row=0, column=0, sticky="w", pady=(0, 8))
+
+        columns = ("id", "titulo", "status", "origem", "trecho")
+        table = ttk.Treeview(frame, columns=columns, show="headings")
+        table.heading("id", text="ID")
+        table.heading("titulo", text="Titulo")
+        table.heading("status", text="Status")
+        table.heading("origem", text="Encontrado em")
+        table.heading("trecho", text="Trecho")
+        table.column("id", width=70)
+        table.column("titulo", width=220)
+        table.column("status", width=110)
+        table.column("origem", width=110)
+        table.column("trecho", width=360)
+        table.grid(row=1, column=0, sticky="nsew")
+
+        scroll = ttk.Scrollbar(frame, orient="vertical", command=table.yview)
+        scroll.grid(row=1, column=1, sticky="ns")
+        table.configure(yscrollcommand=scroll.set)
+
+        for hit in results:
+            table.insert(
+                "",
+                "end",
+                values=(
+                    hit["id"],
+                    hit["titulo"],
+                    f"{hit['status']} (arquivado)" if hit["arquivado"] else hit["status"],
+                    hit["origem"],
+                    hit["trecho"],
+                ),
+            )
+
+        def open_selected(_event=None) -> None:
+            selection = table.selection()
+            if not selection:
+                return
+            values = table.item(selection[0], "values")
+            if not values:
+                return
+            self._open_chamado_details(int(values[0]))
+
+        table.bind("<Double-Button-1>", open_selected)
+
+    def _open_diagnostics_dialog(self, _event=None) -> None:
+        dialog = tk.Toplevel(self)
+        dialog.title("Diagnostico do banco")
+        width = 1000
+        height = 560
+        dialog.geometry(f"{width}x{height}")
+        dialog.configure(bg="#0A1B2A")
+        dialog.transient(self)
+        dialog.update_idletasks()
+
+        parent_x = self.winfo_rootx()
+        parent_y = self.winfo_rooty()
+        parent_w = self.winfo_width()
+        parent_h = self.winfo_height()
+        pos_x = parent_x + (parent_w - width) // 2
+        pos_y = parent_y + (parent_h - height) // 2
+        dialog.geometry(f"{width}x{height}+{max(pos_x, 0)}+{max(pos_y, 0)}")
+
+        frame = ttk.Frame(dialog, style="Card.TFrame", padding=14)
+        frame.pack(fill="both", expand=True, padx=10, pady=10)
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(1, weight=1)
+
+        summary_var = tk.StringVar()
+        ttk.Label(frame, textvariable=summary_var, style="Sub.TLabel").grid(
+            row=0, column=0, sticky="w", pady=(0, 8)
+        )
+
+        headings = {
+            "metodo": "Metodo",
+            "count": "Chamadas",
+            "p50_ms": "p50 ms",
+            "p95_ms": "p95 ms",
+            "p99_ms": "p99 ms",
+            "max_ms": "Max ms",
+            "rows": "Linhas",
+            "pool_wait_ms": "Espera pool ms",
+            "begin_commit_ms": "BEGIN/COMMIT ms",
+            "errors": "Erros",
+        }
+        table = ttk.Treeview(frame, columns=tuple(headings), show="headings")
+        for column, heading in headings.items():
+            table.heading(column, text=heading)
+            table.column(column, width=90, anchor="e")
+        table.column("metodo", width=200, anchor="w")
+        table.grid(row=1, column=0, sticky="nsew")
+
+        scroll = ttk.Scrollbar(frame, orient="vertical", command=table.yview)
+        scroll.grid(row=1, column=1, sticky="ns")
+        table.configure(yscrollcommand=scroll.set)
+
+        actions = ttk.Frame(frame, style="Card.TFrame")
+        actions.grid(row=2, column=0, columnspan=2, sticky="ew", pady=(10, 0))
+
+        def refresh() -> None:
+            table.delete(*table.get_children())
+            stats = self.db.query_stats()
+            for name, row in sorted(stats.items(), key=lambda item: item[1]["total_ms"], reverse=True):
+                table.insert(
+                    "",
+                    "end",
+                    values=(
+                        name,
+                        row["count"],
+                        f"{row['p50_ms']:.1f}",
+                        f"{row['p95_ms']:.1f}",
+                        f"{row['p99_ms']:.1f}",
+                        f"{row['max_ms']:.1f}",
+                        row["rows"],
+                        f"{row['pool_wait_ms']:.1f}",
+                        f"{row['begin_commit_ms']:.1f}",
+                        row["errors"],
+                    ),
+                )
+            cache = self.db.cache_stats()
+            instrumentation = self.db.instrumentation
+            if instrumentation is None:
+                status = "Instrumentacao desligada"
+            else:
+                status = (
+                    f"Consultas lentas (>= {instrumentation.slow_query_ms:.0f} ms): "
+                    f"{instrumentation.slow_queries} em {instrumentation.slow_log_path}"
+                )
+            summary_var.set(
+                f"{status} | Cache: {cache['hits']} acertos, {cache['misses']} faltas, "
+                f"{cache['invalidations']} invalidacoes"
+            )
+            enable_button.configure(state="disabled" if instrumentation else "normal")
+
+        def enable() -> None:
+            self.db.enable_instrumentation()
+            refresh()
+
+        def reset() -> None:
+            self.db.reset_query_stats()
+            refresh()
+
+        ttk.Button(actions, text="Atualizar", style="Action.TButton", command=refresh).pack(side="left")
+        ttk.Button(actions, text="Zerar", style="Action.TButton", command=reset).pack(
+            side="left", padx=(8, 0)
+        )
+        enable_button = ttk.Button(
+            actions,
+            text="Ativar instrumentacao",
+            style="Action.TButton",
+            command=enable,
+        )
+        enable_button.pack(side="left", padx=(8, 0))
+
+        refresh()
 
     def _move_chamado_to_status(self, chamado_id: int, target_status: str) -> None:
         new_status = "pendente"
@@ -2335,23 +2902,27 @@ class ERPDesktopApp(tk.Tk):
         scroll.grid(row=0, column=1, sticky="ns")
         table.configure(yscrollcommand=scroll.set)
 
-        closed_statuses = {"fechado", "finalizado", "resolved"}
-        closed_calls = [
-            c for c in self.chamado_data if str(c.get("status", "")).strip().lower() in closed_statuses
-        ]
-        for chamado in closed_calls:
-            table.insert(
-                "",
-                "end",
-                values=(
-                    chamado.get("id"),
-                    chamado.get("titulo", ""),
-                    chamado.get("autor", ""),
-                    chamado.get("tipo", ""),
-                    chamado.get("urgencia", ""),
-                    chamado.get("responsavel", ""),
-                ),
+        more_button = ttk.Button(frame, text="Carregar mais", style="Action.TButton")
+        more_button.grid(row=1, column=0, sticky="e", pady=(10, 0))
+        state = {"after": None}
+
+        def load_page() -> None:
+            page, state["after"] = self.db.query_rows(
+                "chamados",
+                columns,
+                [("status", "in", CLOSED_STATUSES)],
+                descending=True,
+                limit=CLOSED_PAGE_SIZE,
+                after=state["after"],
+                include_archive=True,
             )
+            for chamado in page:
+                table.insert("", "end", values=tuple(chamado[column] for column in columns))
+            if state["after"] is None:
+                more_button.state(["disabled"])
+
+        more_button.configure(command=load_page)
+        load_page()
 
         def open_selected(_event=None) -> None:
             selection = table.selection()
@@ -2371,3 +2942,7 @@ class ERPDesktopApp(tk.Tk):
     def _exit_fullscreen(self, _event=None):
         self._fullscreen = False
         self.attributes("-fullscreen", False)
+
+    def _on_close(self) -> None:
+        self.db.close()
+        self.destroy()
@@ -0,0 +1,126 @@
+import sqlite3
+from pathlib import Path
+
+
+SCHEMA = "archive"
+ARCHIVE_AFTER_DAYS = 180
+ARCHIVE_BATCH = 200
+# Tabelas que tambem existem no arquivo e podem ser lidas junto com o banco principal.
+ARCHIVED_TABLES = frozenset({"chamados"})
+CHAMADO_COLUMNS = (
+    "id",
+    "titulo",
+    "descricao",
+    "autor",
+    "tipo",
+    "urgencia",
+    "arquivo",
+    "responsavel",
+    "status",
+    "legacy_source",
+    "legacy_id",
+    "fechado_em",
+)
+MESSAGE_COLUMNS = ("id", "chamado_id", "canal", "autor", "mensagem", "arquivo", "criado_em")
+ATTACHMENT_COLUMNS = ("sha256", "nome", "tamanho", "criado_em", "verificado_em", "integro")
+
+
+def archive_path(db_path: Path) -> Path:
+    return db_path.with_name(f"{db_path.stem}_archive.db")
+
+
+def ensure_schema(conn: sqlite3.Connection, schema: str = SCHEMA) -> None:
+    # Mesmas colunas do banco principal, sem AUTOINCREMENT: os ids vem de la e
+    # continuam valendo nas referencias, na busca e na volta de um chamado reaberto.
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {schema}.chamados (
+            id INTEGER PRIMARY KEY,
+            titulo TEXT NOT NULL,
+            descricao TEXT NOT NULL,
+            autor TEXT NOT NULL DEFAULT '',
+            tipo TEXT NOT NULL DEFAULT '',
+            urgencia TEXT NOT NULL DEFAULT '',
+            arquivo TEXT NOT NULL DEFAULT '',
+            responsavel TEXT NOT NULL DEFAULT '',
+            status TEXT NOT NULL,
+            legacy_source TEXT NOT NULL DEFAULT '',
+            legacy_id INTEGER DEFAULT NULL,
+            fechado_em TEXT,
+            arquivado_em TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {schema}.chamado_messages (
+            id INTEGER PRIMARY KEY,
+            chamado_id INTEGER NOT NULL,
+            canal TEXT NOT NULL,
+            autor TEXT NOT NULL,
+            mensagem TEXT NOT NULL,
+            arquivo TEXT NOT NULL DEFAULT '',
+            criado_em TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {schema}.attachments (
+            sha256 TEXT PRIMARY KEY,
+            nome TEXT NOT NULL,
+            tamanho INTEGER NOT NULL,
+            criado_em TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            verificado_em TEXT,
+            integro INTEGER NOT NULL DEFAULT 1
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE INDEX IF NOT EXISTS {schema}.idx_chamado_messages_chamado_canal
+        ON chamado_messages(chamado_id, canal, id)
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE INDEX IF NOT EXISTS {schema}.idx_chamados_status_nocase
+        ON chamados(status COLLATE NOCASE)
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE INDEX IF NOT EXISTS {schema}.idx_chamados_legacy
+        ON chamados(legacy_source, legacy_id)
+        """
+    )
+    # Busca textual igual a do banco principal (migracao 7). Os registros nao
+    # mudam depois de arquivados, entao bastam os triggers de insert e delete.
+    for table, columns in (("chamados", ("titulo", "descricao")), ("chamado_messages", ("mensagem",))):
+        listed = ", ".join(columns)
+        conn.execute(
+            f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {schema}.{table}_fts USING fts5(
+                {listed},
+                content='{table}',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+            """
+        )
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {schema}.{table}_fts_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {table}_fts (rowid, {listed})
+                VALUES (new.id, {', '.join(f'new.{column}' for column in columns)});
+            END
+            """
+        )
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {schema}.{table}_fts_ad AFTER DELETE ON {table} BEGIN
+                INSERT INTO {table}_fts ({table}_fts, rowid, {listed})
+                VALUES ('delete', old.id, {', '.join(f'old.{column}' for column in columns)});
+            END
+            """
+        )
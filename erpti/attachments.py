@@ -0,0 +1,88 @@
+import hashlib
+import mmap
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+
+ATTACHMENT_PREFIX = "sha256:"
+CHUNK_SIZE = 1024 * 1024
+
+
+def is_attachment_ref(value: str) -> bool:
+    return value.startswith(ATTACHMENT_PREFIX) and len(value) == len(ATTACHMENT_PREFIX) + 64
+
+
+def digest_from_ref(ref: str) -> str:
+    if not is_attachment_ref(ref):
+        raise ValueError(f"Referencia de anexo invalida: {ref!r}")
+    return ref[len(ATTACHMENT_PREFIX):]
+
+
+class AttachmentStore:
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+
+    def path_for(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def put(self, source: str | Path) -> tuple[str, int]:
+        temp_dir = self.root / "tmp"
+        temp_dir.mkdir(parents=True, exist_ok=True)
+        hasher = hashlib.sha256()
+        size = 0
+        fd, temp_name = tempfile.mkstemp(dir=temp_dir)
+        try:
+            with open(source, "rb") as reader, os.fdopen(fd, "wb") as writer:
+                buffer = bytearray(CHUNK_SIZE)
+                view = memoryview(buffer)
+                while True:
+                    read = reader.readinto(buffer)
+                    if not read:
+                        break
+                    hasher.update(view[:read])
+                    writer.write(view[:read])
+                    size += read
+                writer.flush()
+                os.fsync(writer.fileno())
+
+            digest = hasher.hexdigest()
+            target = self.path_for(digest)
+            if target.exists():
+                os.unlink(temp_name)
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(temp_name, target)
+            return digest, size
+        except BaseException:
+            if os.path.exists(temp_name):
+                os.unlink(temp_name)
+            raise
+
+    @contextmanager
+    def open(self, digest: str) -> Iterator[memoryview]:
+        path = self.path_for(digest)
+        with open(path, "rb") as handle:
+            if os.fstat(handle.fileno()).st_size == 0:
+                yield memoryview(b"")
+                return
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    yield view
+                finally:
+                    view.release()
+
+    def export(self, digest: str, destination: str | Path) -> None:
+        # copyfile usa sendfile/copy_file_range quando o sistema oferece.
+        shutil.copyfile(self.path_for(digest), destination)
+
+    def verify(self, digest: str) -> bool:
+        try:
+            with self.open(digest) as data:
+                return hashlib.sha256(data).hexdigest() == digest
+        except FileNotFoundError:
+            return False
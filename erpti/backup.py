@@ -0,0 +1,184 @@
+import gzip
+import logging
+import lzma
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from contextlib import closing, contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator
+
+
+logger = logging.getLogger(__name__)
+
+PAGES_PER_STEP = 256
+STEP_SLEEP = 0.05
+KEEP_SNAPSHOTS = 7
+MAX_RESTARTS = 3
+COPY_CHUNK_SIZE = 1024 * 1024
+COMPRESSIONS: dict[str, Callable] = {
+    "": open,
+    "gz": gzip.open,
+    "xz": lzma.open,
+}
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def _suffix(compression: str) -> str:
+    return f".db.{compression}" if compression else ".db"
+
+
+def _open_for(path: Path) -> Callable:
+    for compression, opener in COMPRESSIONS.items():
+        if compression and path.name.endswith(_suffix(compression)):
+            return opener
+    return open
+
+
+def integrity_errors(path: Path) -> list[str]:
+    try:
+        with closing(sqlite3.connect(path)) as conn:
+            rows = conn.execute("PRAGMA integrity_check").fetchall()
+    except sqlite3.DatabaseError as exc:
+        # Arquivo estragado a ponto de o SQLite nem conseguir verificar.
+        return [str(exc)]
+    messages = [row[0] for row in rows]
+    return [] if messages == ["ok"] else messages
+
+
+def list_snapshots(directory: Path, stem: str) -> list[Path]:
+    snapshots = [
+        path
+        for path in Path(directory).glob(f"{stem}-*.db*")
+        if any(path.name.endswith(_suffix(compression)) for compression in COMPRESSIONS)
+    ]
+    return sorted(snapshots, key=lambda path: path.name)
+
+
+def snapshot_timestamp() -> str:
+    return datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+
+
+def companion_snapshot(snapshot: Path, stem: str, companion_stem: str) -> Path:
+    # Snapshots tirados juntos compartilham o carimbo de data e hora e a compressao.
+    snapshot = Path(snapshot)
+    return snapshot.with_name(companion_stem + snapshot.name.removeprefix(stem))
+
+
+def rotate_snapshots(directory: Path, stem: str, keep: int) -> list[Path]:
+    snapshots = list_snapshots(directory, stem)
+    removed = snapshots[:-keep] if keep > 0 else []
+    for path in removed:
+        path.unlink()
+    return removed
+
+
+def create_snapshot(
+    source: sqlite3.Connection,
+    directory: Path,
+    stem: str,
+    compression: str = "gz",
+    keep: int = KEEP_SNAPSHOTS,
+    pages_per_step: int = PAGES_PER_STEP,
+    step_sleep: float = STEP_SLEEP,
+    progress: Callable[[int, int], None] | None = None,
+    timestamp: str | None = None,
+) -> Path:
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Compressao de backup desconhecida: {compression!r}")
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    timestamp = timestamp or snapshot_timestamp()
+    target = directory / f"{stem}-{timestamp}{_suffix(compression)}"
+
+    restarts = 0
+    last_remaining: int | None = None
+
+    def on_step(_status: int, remaining: int, total: int) -> None:
+        nonlocal restarts, last_remaining
+        if progress is not None:
+            progress(total - remaining, total)
+        # Escrita de outra conexao faz o SQLite recomecar a copia do zero.
+        if last_remaining is not None and remaining > last_remaining:
+            restarts += 1
+            if restarts > MAX_RESTARTS:
+                raise _TooManyRestarts
+        last_remaining = remaining
+        # Entre os passos o lock de leitura fica livre para os escritores.
+        if remaining:
+            time.sleep(step_sleep)
+
+    fd, raw_name = tempfile.mkstemp(dir=directory, prefix=f".{stem}-", suffix=".partial")
+    os.close(fd)
+    raw_path = Path(raw_name)
+    try:
+        with closing(sqlite3.connect(raw_path)) as snapshot:
+            try:
+                source.backup(snapshot, pages=pages_per_step, progress=on_step)
+            except _TooManyRestarts:
+                # Banco muito movimentado: copia tudo num passo so, segurando o
+                # lock de leitura apenas pelo tempo da copia.
+                logger.info("Backup reiniciado %d vezes; copiando em passo unico", restarts)
+                source.backup(snapshot)
+        errors = integrity_errors(raw_path)
+        if errors:
+            raise RuntimeError("Backup gerado com erros de integridade: " + "; ".join(errors[:5]))
+
+        partial = target.with_name(f".{target.name}.partial")
+        with open(raw_path, "rb") as reader, COMPRESSIONS[compression](partial, "wb") as writer:
+            shutil.copyfileobj(reader, writer, COPY_CHUNK_SIZE)
+        os.replace(partial, target)
+    finally:
+        raw_path.unlink(missing_ok=True)
+        target.with_name(f".{target.name}.partial").unlink(missing_ok=True)
+
+    removed = rotate_snapshots(directory, stem, keep)
+    logger.info(
+        "Backup %s criado em %.1f s (%d bytes, %d antigos removidos)",
+        target.name,
+        time.perf_counter() - started,
+        target.stat().st_size,
+        len(removed),
+    )
+    return target
+
+
+@contextmanager
+def expanded_snapshot(snapshot: Path) -> Iterator[Path]:
+    snapshot = Path(snapshot)
+    with tempfile.TemporaryDirectory(dir=snapshot.parent) as tmp:
+        expanded = Path(tmp) / "snapshot.db"
+        with _open_for(snapshot)(snapshot, "rb") as reader, open(expanded, "wb") as writer:
+            shutil.copyfileobj(reader, writer, COPY_CHUNK_SIZE)
+        yield expanded
+
+
+def verify_snapshot(snapshot: Path) -> list[str]:
+    with expanded_snapshot(snapshot) as expanded:
+        return integrity_errors(expanded)
+
+
+def restore_snapshot(
+    snapshot: Path,
+    target: sqlite3.Connection,
+    pages_per_step: int = PAGES_PER_STEP,
+) -> None:
+    with expanded_snapshot(snapshot) as expanded:
+        errors = integrity_errors(expanded)
+        if errors:
+            raise RuntimeError(
+                f"Backup {Path(snapshot).name} esta corrompido: " + "; ".join(errors[:5])
+            )
+        # Restaurar pela API de backup respeita os locks de quem estiver conectado.
+        with closing(sqlite3.connect(expanded)) as source:
+            source.backup(target, pages=pages_per_step)
+    errors = target.execute("PRAGMA integrity_check").fetchall()
+    if [row[0] for row in errors] != ["ok"]:
+        raise RuntimeError("Banco restaurado falhou no integrity_check.")
@@ -1,23 +1,566 @@
 import sqlite3
 import hashlib
+import functools
 import hmac
+import inspect
+import logging
 import os
+import re
+import socket
+import threading
+import time
 from base64 import urlsafe_b64decode, urlsafe_b64encode
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import AbstractContextManager, closing, contextmanager, nullcontext
+from itertools import repeat
 from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from erpti import archive, backup, migrations, storage
+from erpti.attachments import ATTACHMENT_PREFIX, AttachmentStore, digest_from_ref, is_attachment_ref
+from erpti.instrumentation import SLOW_QUERY_MS, Instrumentation, InstrumentedConnection
+from erpti.queries import Filter, build_select, order_key
+from erpti.records import Record, record_type
+from erpti.values import TYPED_COLUMNS, typed_values
 try:
     from sqlcipher3 import dbapi2 as sqlcipher3
 except ImportError:
     sqlcipher3 = None
 
 
+logger = logging.getLogger(__name__)
+
+# Pastas de rede cadastradas na primeira inicializacao do banco.
+DEFAULT_ACCESS_FOLDERS = [
+    "Comun",
+    "Almoxarifado",
+    "Contabil",
+    "Comercial",
+    "Compras",
+    "Contratos",
+    "Financeiro",
+    "Fiscal",
+    "Eventos",
+    "Gerencia",
+    "Manutencao",
+    "Obras",
+    "Obras PCP",
+    "Orcamentos",
+    "Planejamento",
+    "Qualidade",
+    "Producao",
+    "Projetos",
+    "Projetos PCP",
+    "RH",
+    "Romaneios",
+    "SAC",
+    "Seguranca Trabalho",
+    "Terceiros",
+    "TI",
+]
+
+
+def _pbkdf2_hash(password: str, pepper: str, iterations: int) -> str:
+    salt = os.urandom(16)
+    derived = hashlib.pbkdf2_hmac(
+        "sha256",
+        (password + pepper).encode("utf-8"),
+        salt,
+        iterations,
+    )
+    salt_b64 = urlsafe_b64encode(salt).decode("ascii")
+    hash_b64 = urlsafe_b64encode(derived).decode("ascii")
+    return f"pbkdf2_sha256${iterations}${salt_b64}${hash_b64}"
+
+
+def _timed_pbkdf2(password: bytes, salt: bytes, iterations: int) -> float:
+    started = time.perf_counter()
+    hashlib.pbkdf2_hmac("sha256", password, salt, iterations)
+    return time.perf_counter() - started
+
+
+_WRITE_ACTIONS = frozenset(
+    {
+        sqlite3.SQLITE_INSERT,
+        sqlite3.SQLITE_UPDATE,
+        sqlite3.SQLITE_DELETE,
+        sqlite3.SQLITE_TRANSACTION,
+        sqlite3.SQLITE_SAVEPOINT,
+    }
+)
+
+
+def _deny_writes(action: int, *_args) -> int:
+    return sqlite3.SQLITE_DENY if action in _WRITE_ACTIONS else sqlite3.SQLITE_OK
+
+
+def _legacy_checksum(*values) -> str:
+    payload = "\x1f".join("" if value is None else str(value) for value in values)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _retry_on_busy(method: Callable) -> Callable:
+    @functools.wraps(method)
+    def wrapper(self: "DatabaseManager", *args, **kwargs):
+        if getattr(self._local, "conn", None) is not None:
+            # Dentro de uma transacao maior: quem repete e o chamador.
+            return method(self, *args, **kwargs)
+        # Um prazo so para todas as tentativas: busy_timeout_ms no total, nao por tentativa.
+        deadline = time.monotonic() + self.storage.busy_timeout_ms / 1000
+        delays = storage.backoff_delays(self.storage)
+        try:
+            while True:
+                try:
+                    return method(self, *args, **kwargs)
+                except sqlite3.OperationalError as exc:
+                    if not storage.is_busy(exc):
+                        raise
+                    delay = next(delays, None)
+                    if delay is None or time.monotonic() + delay >= deadline:
+                        raise
+                    logger.info(
+                        "Banco ocupado em %s; nova tentativa em %.0f ms",
+                        method.__name__,
+                        delay * 1000,
+                    )
+                    time.sleep(delay)
+                    # A proxima tentativa espera no busy handler so o que sobrou do prazo.
+                    self._local.busy_timeout_ms = max(1, int((deadline - time.monotonic()) * 1000))
+        finally:
+            self._local.busy_timeout_ms = None
+
+    return wrapper
+
+
 class DatabaseManager:
     DB_KEY = "Sidertec01"
     PASSWORD_PEPPER = "Sidertec01"
     PASSWORD_ITERATIONS = 200_000
+    MIN_PASSWORD_ITERATIONS = 100_000
+    PASSWORD_TIME_BUDGET_MS = 250
+    POOL_SIZE = 4
+    POOL_TIMEOUT = 30.0
+    STATEMENT_CACHE_SIZE = 128
+    HEALTH_CHECK_INTERVAL = 30.0
+    ATTACHMENT_SCAN_BATCH = 200
+    ATTACHMENT_RESCAN_DAYS = 30
+    TYPED_BACKFILL_BATCH = 500
+    CHANGE_LOG_KEEP = 100_000
+    INSTRUMENT_ENV = "ERPTI_INSTRUMENT"
+    UNINSTRUMENTED_METHODS = frozenset(
+        {
+            "close",
+            "enable_instrumentation",
+            "query_stats",
+            "reset_query_stats",
+            "cache_stats",
+            "invalidate_cache",
+        }
+    )
+    LEGACY_SOURCE = "old_tickets"
+    LEGACY_TICKETS_SQL = """
+        SELECT
+            t.id AS legacy_id,
+            COALESCE(t.title, '') AS titulo,
+            COALESCE(t.description, '') AS descricao,
+            COALESCE(
+                NULLIF(
+                    COALESCE(NULLIF(TRIM(u.first_name || ' ' || u.last_name), ''), u.username, ''),
+                    ''
+                ),
+                'Solicitante'
+            ) AS autor,
+            COALESCE(t.ticket_type, '') AS tipo,
+            COALESCE(t.urgency, '') AS urgencia,
+            COALESCE(
+                (
+                    SELECT GROUP_CONCAT(a.file, '; ')
+                    FROM legacy.tickets_ticketattachment a
+                    WHERE a.ticket_id = t.id
+                ),
+                ''
+            ) AS arquivo,
+            CASE
+                WHEN LOWER(TRIM(COALESCE(t.status, ''))) IN ('in_progress', 'em_atendimento')
+                THEN COALESCE(NULLIF(TRIM(au.first_name || ' ' || au.last_name), ''), au.username, '')
+                ELSE ''
+            END AS responsavel,
+            CASE
+                WHEN LOWER(TRIM(COALESCE(t.status, ''))) IN ('resolved', 'fechado', 'finalizado')
+                THEN 'fechado'
+                WHEN LOWER(TRIM(COALESCE(t.status, ''))) IN ('in_progress', 'em_atendimento')
+                THEN 'em_atendimento'
+                ELSE 'pendente'
+            END AS status
+        FROM legacy.tickets_ticket t
+        LEFT JOIN legacy.auth_user u ON u.id = t.created_by_id
+        LEFT JOIN legacy.auth_user au ON au.id = t.assigned_to_id
+    """
+    # {schema}: "" no banco principal, "archive." no arquivo de chamados fechados.
+    SEARCH_CHAMADOS_SQL = """
+        SELECT
+            c.id,
+            c.titulo,
+            c.status,
+            c.responsavel,
+            origem,
+            trecho,
+            MIN(score) AS best_score
+        FROM (
+            SELECT * FROM (
+                SELECT
+                    rowid AS chamado_id,
+                    'chamado' AS origem,
+                    snippet(chamados_fts, -1, '[', ']', '...', 12) AS trecho,
+                    rank AS score
+                FROM {schema}chamados_fts
+                WHERE chamados_fts MATCH ?
+                ORDER BY rank
+                LIMIT ?
+            )
+            UNION ALL
+            SELECT * FROM (
+                SELECT
+                    m.chamado_id,
+                    m.canal,
+                    snippet(chamado_messages_fts, 0, '[', ']', '...', 12),
+                    chamado_messages_fts.rank
+                FROM {schema}chamado_messages_fts
+                JOIN {schema}chamado_messages m ON m.id = chamado_messages_fts.rowid
+                WHERE chamado_messages_fts MATCH ? AND (? OR m.canal <> 'interno')
+                ORDER BY chamado_messages_fts.rank
+                LIMIT ?
+            )
+        )
+        JOIN {schema}chamados c ON c.id = chamado_id
+        GROUP BY c.id
+        ORDER BY best_score
+        LIMIT ?
+    """
 
-    def __init__(self, db_path: str = "erpti.db") -> None:
+    def __init__(
+        self,
+        db_path: str = "erpti.db",
+        instrument: bool | None = None,
+        storage_profile: storage.StorageProfile | None = None,
+    ) -> None:
         self.db_path = Path(db_path)
+        self.storage = storage_profile or storage.profile_from_env(self.db_path)
+        self._checkpoint_timer: threading.Timer | None = None
+        self._checkpoints_stopped = False
+        self._stopping = threading.Event()
+        self._owner_thread = threading.get_ident()
+        self._owner_conn: sqlite3.Connection | None = None
+        self._owner_checked_at = 0.0
+        self._local = threading.local()
+        self._pool_lock = threading.Lock()
+        self._pool_slots = threading.BoundedSemaphore(self.POOL_SIZE)
+        self._pool_idle: list[tuple[sqlite3.Connection, float]] = []
+        self._executor: ThreadPoolExecutor | None = None
+        self._password_iterations: int | None = None
+        self.attachments = AttachmentStore(self.db_path.with_name(f"{self.db_path.stem}_anexos"))
+        self.backup_dir = self.db_path.with_name(f"{self.db_path.stem}_backups")
+        self.archive_path = archive.archive_path(self.db_path)
+        self._cache_lock = threading.Lock()
+        self._cache: dict[tuple, object] = {}
+        self._cache_versions: dict[int, int] = {}
+        self._cache_generation = 0
+        self._cache_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+        self.instrumentation: Instrumentation | None = None
         self._migrate_from_encrypted_if_needed()
+        if instrument is None:
+            instrument = os.environ.get(self.INSTRUMENT_ENV, "") not in {"", "0"}
+        if instrument:
+            self.enable_instrumentation()
+
+    def _open_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.storage.busy_timeout_ms / 1000,
+            cached_statements=self.STATEMENT_CACHE_SIZE,
+            check_same_thread=False,
+            factory=sqlite3.Connection if self.instrumentation is None else InstrumentedConnection,
+        )
+        if self.instrumentation is not None:
+            conn.instrumentation = self.instrumentation
+        conn.row_factory = sqlite3.Row
+        for pragma in storage.connection_pragmas(self.storage):
+            conn.execute(pragma)
+        with self._cache_lock:
+            self._cache_versions.pop(id(conn), None)
+        return conn
+
+    def _ensure_healthy(
+        self, conn: sqlite3.Connection | None, checked_at: float
+    ) -> tuple[sqlite3.Connection, float]:
+        now = time.monotonic()
+        if conn is not None and now - checked_at < self.HEALTH_CHECK_INTERVAL:
+            return conn, checked_at
+        if conn is not None:
+            try:
+                conn.execute("SELECT 1").fetchone()
+                return conn, now
+            except sqlite3.Error:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+        return self._open_connection(), now
+
+    def _checkout(self) -> tuple[sqlite3.Connection, bool]:
+        if threading.get_ident() == self._owner_thread:
+            self._owner_conn, self._owner_checked_at = self._ensure_healthy(
+                self._owner_conn, self._owner_checked_at
+            )
+            return self._owner_conn, False
+
+        started = time.perf_counter()
+        if not self._pool_slots.acquire(timeout=self.POOL_TIMEOUT):
+            raise RuntimeError("Nenhuma conexao livre no pool do banco de dados.")
+        if self.instrumentation is not None:
+            self.instrumentation.add_pool_wait(time.perf_counter() - started)
+        with self._pool_lock:
+            conn, checked_at = self._pool_idle.pop() if self._pool_idle else (None, 0.0)
+        try:
+            conn, checked_at = self._ensure_healthy(conn, checked_at)
+        except BaseException:
+            self._pool_slots.release()
+            raise
+        self._local.checked_at = checked_at
+        return conn, True
+
+    def _checkin(self, conn: sqlite3.Connection, pooled: bool, broken: bool) -> None:
+        if not pooled:
+            if broken:
+                self._owner_checked_at = 0.0
+            return
+        with self._pool_lock:
+            self._pool_idle.append((conn, 0.0 if broken else self._local.checked_at))
+        self._pool_slots.release()
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            try:
+                yield held
+            except sqlite3.DatabaseError as exc:
+                if getattr(self._local, "streaming", 0) and exc.sqlite_errorcode == sqlite3.SQLITE_AUTH:
+                    raise RuntimeError("Escrita no banco enquanto iter_rows ainda esta aberto.") from exc
+                raise
+            return
+
+        conn, pooled = self._checkout()
+        self._local.conn = conn
+        broken = False
+        changes_before = conn.total_changes
+        busy_timeout_ms = getattr(self._local, "busy_timeout_ms", None)
+        try:
+            if busy_timeout_ms is not None:
+                conn.execute(f"PRAGMA busy_timeout = {busy_timeout_ms}")
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except BaseException as exc:
+            broken = (
+                isinstance(exc, sqlite3.Error)
+                and not isinstance(exc, sqlite3.IntegrityError)
+                and not storage.is_busy(exc)
+            )
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except sqlite3.Error:
+                broken = True
+            raise
+        finally:
+            self._local.conn = None
+            if busy_timeout_ms is not None:
+                try:
+                    conn.execute(f"PRAGMA busy_timeout = {int(self.storage.busy_timeout_ms)}")
+                except sqlite3.Error:
+                    broken = True
+            if conn.total_changes != changes_before:
+                self.invalidate_cache()
+            self._checkin(conn, pooled, broken)
+
+    def invalidate_cache(self) -> None:
+        with self._cache_lock:
+            if self._cache:
+                self._cache_stats["invalidations"] += 1
+            self._cache.clear()
+            self._cache_generation += 1
+
+    def cache_stats(self) -> dict[str, int]:
+        with self._cache_lock:
+            return {**self._cache_stats, "entries": len(self._cache)}
+
+    def _cached(self, key: tuple, loader: Callable[[sqlite3.Connection], object]) -> object:
+        with self._connection() as conn:
+            # data_version muda quando outra conexao (ou processo) grava no banco.
+            version = int(conn.execute("PRAGMA data_version").fetchone()[0])
+            with self._cache_lock:
+                if self._cache_versions.get(id(conn)) != version:
+                    self._cache_versions[id(conn)] = version
+                    if self._cache:
+                        self._cache_stats["invalidations"] += 1
+                    self._cache.clear()
+                    self._cache_generation += 1
+                if key in self._cache:
+                    self._cache_stats["hits"] += 1
+                    return self._cache[key]
+                self._cache_stats["misses"] += 1
+                generation = self._cache_generation
+            value = loader(conn)
+            # Uma invalidacao durante a carga deixa o valor velho: devolve sem guardar.
+            current = int(conn.execute("PRAGMA data_version").fetchone()[0])
+            with self._cache_lock:
+                if current == version and generation == self._cache_generation:
+                    self._cache[key] = value
+            return value
+
+    def _background(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.POOL_SIZE,
+                    thread_name_prefix="erpti-db",
+                )
+            return self._executor
+
+    def close(self) -> None:
+        with self._pool_lock:
+            self._checkpoints_stopped = True
+            timer, self._checkpoint_timer = self._checkpoint_timer, None
+        if timer is not None:
+            timer.cancel()
+        self._stopping.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        with self._pool_lock:
+            idle = [conn for conn, _checked_at in self._pool_idle]
+            self._pool_idle = []
+        if self._owner_conn is not None:
+            idle.append(self._owner_conn)
+            self._owner_conn = None
+        for conn in idle:
+            conn.close()
+        if self.instrumentation is not None:
+            self.instrumentation.close()
+
+    def enable_instrumentation(
+        self,
+        slow_query_ms: float = SLOW_QUERY_MS,
+        log_path: str | None = None,
+    ) -> None:
+        if self.instrumentation is not None:
+            self.instrumentation.slow_query_ms = slow_query_ms
+            return
+        if log_path is None:
+            log_path = self.db_path.with_name(f"{self.db_path.stem}_slow_queries.log")
+        instrumentation = Instrumentation(Path(log_path), slow_query_ms)
+        for name, _function in inspect.getmembers(type(self), inspect.isfunction):
+            if name.startswith("_") or name in self.UNINSTRUMENTED_METHODS:
+                continue
+            setattr(self, name, instrumentation.wrap(name, getattr(self, name)))
+        self.instrumentation = instrumentation
+
+        # Conexoes ja abertas nao medem comandos; as proximas serao instrumentadas.
+        with self._pool_lock:
+            idle = [conn for conn, _checked_at in self._pool_idle]
+            self._pool_idle = []
+        if self._owner_conn is not None and getattr(self._local, "conn", None) is None:
+            idle.append(self._owner_conn)
+            self._owner_conn = None
+        for conn in idle:
+            conn.close()
+
+    def query_stats(self) -> dict[str, dict[str, float]]:
+        if self.instrumentation is None:
+            return {}
+        return self.instrumentation.snapshot()
+
+    def reset_query_stats(self) -> None:
+        if self.instrumentation is not None:
+            self.instrumentation.reset()
+
+    def create_backup(
+        self,
+        directory: str | None = None,
+        compression: str = "gz",
+        keep: int = backup.KEEP_SNAPSHOTS,
+        pages_per_step: int = backup.PAGES_PER_STEP,
+        step_sleep: float = backup.STEP_SLEEP,
+        progress: Callable[[int, int], None] | None = None,
+    ) -> Path:
+        directory = Path(directory) if directory else self.backup_dir
+        timestamp = backup.snapshot_timestamp()
+        options = dict(
+            compression=compression,
+            keep=keep,
+            pages_per_step=pages_per_step,
+            step_sleep=step_sleep,
+            progress=progress,
+            timestamp=timestamp,
+        )
+        # Conexao propria: o backup em passos nao deve ocupar o pool.
+        source = self._open_connection()
+        try:
+            snapshot = backup.create_snapshot(source, directory, self.db_path.stem, **options)
+        finally:
+            source.close()
+        # O arquivo vem depois do principal: um chamado movido entre as duas copias
+        # aparece nas duas (as leituras preferem o principal), nunca em nenhuma.
+        if self.archive_path.exists():
+            with closing(self._open_archive_connection()) as source:
+                backup.create_snapshot(source, directory, self.archive_path.stem, **options)
+        return snapshot
+
+    def list_backups(self, directory: str | None = None) -> list[Path]:
+        return backup.list_snapshots(Path(directory) if directory else self.backup_dir, self.db_path.stem)
+
+    def _archive_snapshot(self, snapshot: Path) -> Path | None:
+        companion = backup.companion_snapshot(snapshot, self.db_path.stem, self.archive_path.stem)
+        return companion if companion.exists() else None
+
+    def _open_archive_connection(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.archive_path, timeout=self.storage.busy_timeout_ms / 1000)
+
+    def restore_backup(self, snapshot: str) -> None:
+        archive_snapshot = self._archive_snapshot(Path(snapshot))
+        if archive_snapshot is not None:
+            # Confere o arquivo antes de tocar no principal: os dois voltam juntos ou nenhum.
+            errors = backup.verify_snapshot(archive_snapshot)
+            if errors:
+                raise RuntimeError(
+                    f"Backup {archive_snapshot.name} esta corrompido: " + "; ".join(errors[:5])
+                )
+        last_seq = self.latest_change_seq()
+        target = self._open_connection()
+        try:
+            backup.restore_snapshot(Path(snapshot), target)
+            # Os clientes conectados precisam recarregar tudo: o historico de
+            # alteracoes voltou no tempo junto com o banco.
+            target.execute(
+                "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'change_log'",
+                (last_seq,),
+            )
+            target.execute("INSERT INTO change_log (table_name, row_id, op) VALUES ('*', 0, 'R')")
+            target.commit()
+        finally:
+            target.close()
+        if archive_snapshot is not None:
+            with closing(self._open_archive_connection()) as target:
+                backup.restore_snapshot(archive_snapshot, target)
+        elif self.archive_path.exists():
+            logger.warning(
+                "Backup %s sem copia de %s; o arquivo atual foi mantido",
+                Path(snapshot).name,
+                self.archive_path.name,
+            )
+        self.invalidate_cache()
+        self._password_iterations = None
 
     def _escape_sql_value(self, value: str) -> str:
         return value.replace("'", "''")
@@ -42,245 +585,110 @@ class DatabaseManager:
             cursor.execute("DETACH DATABASE plaintext")
 
     def initialize(self, default_access_folders: list[str]) -> None:
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._connection() as conn:
+            self._configure_journal(conn)
+            if migrations.current_version(conn) < migrations.SCHEMA_VERSION:
+                migrations.apply_pending(self, conn, default_access_folders)
+        self.backfill_typed_columns()
+        if self.storage.journal_mode == "wal" and self.storage.checkpoint_interval_s > 0:
+            self._schedule_checkpoint()
 
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    departamento TEXT NOT NULL,
-                    nome TEXT NOT NULL,
-                    cargo TEXT NOT NULL DEFAULT '',
-                    perfil TEXT NOT NULL DEFAULT '',
-                    username TEXT NOT NULL DEFAULT '',
-                    senha TEXT NOT NULL DEFAULT '',
-                    telefone TEXT NOT NULL,
-                    ramal TEXT NOT NULL,
-                    email TEXT NOT NULL
-                )
-                """
-            )
-            user_columns = {row[1] for row in cursor.execute("PRAGMA table_info(users)").fetchall()}
-            if "perfil" not in user_columns:
-                cursor.execute("ALTER TABLE users ADD COLUMN perfil TEXT NOT NULL DEFAULT ''")
-            if "cargo" not in user_columns:
-                cursor.execute("ALTER TABLE users ADD COLUMN cargo TEXT NOT NULL DEFAULT ''")
-            if "username" not in user_columns:
-                cursor.execute("ALTER TABLE users ADD COLUMN username TEXT NOT NULL DEFAULT ''")
-            if "senha" not in user_columns:
-                cursor.execute("ALTER TABLE users ADD COLUMN senha TEXT NOT NULL DEFAULT ''")
-            if "senha_hash" not in user_columns:
-                cursor.execute("ALTER TABLE users ADD COLUMN senha_hash TEXT NOT NULL DEFAULT ''")
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS access_folders (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT NOT NULL UNIQUE
-                )
-                """
-            )
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS user_groups (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT NOT NULL UNIQUE
-                )
-                """
-            )
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS user_group_members (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    group_id INTEGER NOT NULL,
-                    user_id INTEGER NOT NULL,
-                    UNIQUE(group_id, user_id),
-                    FOREIGN KEY(group_id) REFERENCES user_groups(id),
-                    FOREIGN KEY(user_id) REFERENCES users(id)
-                )
-                """
-            )
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS equipments (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    id_interno TEXT NOT NULL,
-                    patrimonio TEXT NOT NULL,
-                    selo_patrimonio TEXT NOT NULL,
-                    equipamento TEXT NOT NULL,
-                    modelo TEXT NOT NULL,
-                    marca TEXT NOT NULL,
-                    serie TEXT NOT NULL,
-                    mem TEXT NOT NULL,
-                    processador TEXT NOT NULL,
-                    geracao TEXT NOT NULL,
-                    hd TEXT NOT NULL,
-                    mod_hd TEXT NOT NULL
-                )
-                """
-            )
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS ips (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    ip TEXT NOT NULL,
-                    nome TEXT NOT NULL,
-                    fabricante TEXT NOT NULL,
-                    endereco_mac TEXT NOT NULL
-                )
-                """
-            )
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS emails (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nro TEXT NOT NULL,
-                    nome TEXT NOT NULL,
-                    sobrenome TEXT NOT NULL,
-                    email TEXT NOT NULL,
-                    grupo TEXT NOT NULL,
-                    situacao TEXT NOT NULL
-                )
-                """
-            )
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS ramais (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nro TEXT NOT NULL,
-                    nome TEXT NOT NULL,
-                    sobrenome TEXT NOT NULL,
-                    email TEXT NOT NULL,
-                    grupo TEXT NOT NULL,
-                    situacao TEXT NOT NULL
-                )
-                """
-            )
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS softwares (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT NOT NULL,
-                    computador TEXT NOT NULL,
-                    setor TEXT NOT NULL,
-                    serial TEXT NOT NULL,
-                    conta TEXT NOT NULL
-                )
-                """
-            )
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS insumos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    insumo TEXT NOT NULL,
-                    data TEXT NOT NULL,
-                    qtd TEXT NOT NULL,
-                    nome TEXT NOT NULL,
-                    departamento TEXT NOT NULL
-                )
-                """
-            )
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS requisicoes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    solicitacao TEXT NOT NULL,
-                    qtd TEXT NOT NULL,
-                    valor TEXT NOT NULL,
-                    total TEXT NOT NULL,
-                    requisitado TEXT NOT NULL,
-                    aprovado TEXT NOT NULL,
-                    recebido TEXT NOT NULL,
-                    nf TEXT NOT NULL,
-                    tipo TEXT NOT NULL,
-                    fornecedor TEXT NOT NULL,
-                    link TEXT NOT NULL
-                )
-                """
-            )
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS emprestimos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT NOT NULL,
-                    equipamento TEXT NOT NULL,
-                    documento TEXT NOT NULL,
-                    arquivo TEXT NOT NULL,
-                    situacao TEXT NOT NULL,
-                    data TEXT NOT NULL
-                )
-                """
-            )
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS chamados (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    titulo TEXT NOT NULL,
-                    descricao TEXT NOT NULL,
-                    autor TEXT NOT NULL DEFAULT '',
-                    tipo TEXT NOT NULL DEFAULT '',
-                    urgencia TEXT NOT NULL DEFAULT '',
-                    arquivo TEXT NOT NULL DEFAULT '',
-                    responsavel TEXT NOT NULL DEFAULT '',
-                    status TEXT NOT NULL
-                )
-                """
+    def _configure_journal(self, conn: sqlite3.Connection) -> None:
+        try:
+            mode = conn.execute(f"PRAGMA journal_mode = {self.storage.journal_mode}").fetchone()[0]
+        except sqlite3.OperationalError as exc:
+            # Trocar o modo exige acesso exclusivo; outro cliente aberto impede.
+            if not storage.is_busy(exc):
+                raise
+            mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        if str(mode).lower() != self.storage.journal_mode:
+            logger.warning(
+                "Banco continua em journal_mode=%s (perfil pede %s)",
+                mode,
+                self.storage.journal_mode,
             )
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS chamado_messages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    chamado_id INTEGER NOT NULL,
-                    canal TEXT NOT NULL,
-                    autor TEXT NOT NULL,
-                    mensagem TEXT NOT NULL,
-                    arquivo TEXT NOT NULL DEFAULT '',
-                    criado_em TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY(chamado_id) REFERENCES chamados(id)
-                )
-                """
+
+    def checkpoint(self, mode: str = "PASSIVE") -> tuple[int, int, int]:
+        mode = mode.upper()
+        if mode not in storage.CHECKPOINT_MODES:
+            raise ValueError(f"Modo de checkpoint invalido: {mode}")
+        with self._connection() as conn:
+            busy, log_pages, checkpointed = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+            return int(busy), int(log_pages), int(checkpointed)
+
+    def _schedule_checkpoint(self) -> None:
+        with self._pool_lock:
+            if self._checkpoints_stopped or self._checkpoint_timer is not None:
+                return
+            timer = threading.Timer(self.storage.checkpoint_interval_s, self._run_scheduled_checkpoint)
+            timer.daemon = True
+            self._checkpoint_timer = timer
+        timer.start()
+
+    def _run_scheduled_checkpoint(self) -> None:
+        try:
+            busy, log_pages, checkpointed = self.checkpoint()
+            logger.debug(
+                "Checkpoint WAL: %d de %d paginas%s",
+                checkpointed,
+                log_pages,
+                " (leitores ativos)" if busy else "",
             )
-            chamado_columns = {
-                row[1] for row in cursor.execute("PRAGMA table_info(chamados)").fetchall()
-            }
-            if "autor" not in chamado_columns:
-                cursor.execute("ALTER TABLE chamados ADD COLUMN autor TEXT NOT NULL DEFAULT ''")
-            if "tipo" not in chamado_columns:
-                cursor.execute("ALTER TABLE chamados ADD COLUMN tipo TEXT NOT NULL DEFAULT ''")
-            if "urgencia" not in chamado_columns:
-                cursor.execute("ALTER TABLE chamados ADD COLUMN urgencia TEXT NOT NULL DEFAULT ''")
-            if "arquivo" not in chamado_columns:
-                cursor.execute("ALTER TABLE chamados ADD COLUMN arquivo TEXT NOT NULL DEFAULT ''")
-            if "responsavel" not in chamado_columns:
-                cursor.execute("ALTER TABLE chamados ADD COLUMN responsavel TEXT NOT NULL DEFAULT ''")
-            if "legacy_source" not in chamado_columns:
-                cursor.execute(
-                    "ALTER TABLE chamados ADD COLUMN legacy_source TEXT NOT NULL DEFAULT ''"
-                )
-            if "legacy_id" not in chamado_columns:
-                cursor.execute("ALTER TABLE chamados ADD COLUMN legacy_id INTEGER DEFAULT NULL")
-
-            has_access_rows = cursor.execute("SELECT COUNT(*) FROM access_folders").fetchone()[0]
-            if has_access_rows == 0:
-                cursor.executemany(
-                    "INSERT INTO access_folders (nome) VALUES (?)",
-                    [(folder,) for folder in default_access_folders],
-                )
+        except sqlite3.Error as exc:
+            logger.warning("Checkpoint WAL falhou: %s", exc)
+        finally:
+            with self._pool_lock:
+                self._checkpoint_timer = None
+            self._schedule_checkpoint()
 
-            conn.commit()
-            self._migrate_plaintext_passwords(conn)
+    def _target_password_iterations(self) -> int:
+        if self._password_iterations is None:
+            try:
+                with self._connection() as conn:
+                    row = conn.execute(
+                        "SELECT iterations FROM password_cost WHERE host = ?",
+                        (socket.gethostname(),),
+                    ).fetchone()
+            except sqlite3.OperationalError:
+                # Tabela ainda nao criada pelas migracoes.
+                return self.PASSWORD_ITERATIONS
+            self._password_iterations = int(row[0]) if row else self.PASSWORD_ITERATIONS
+        return self._password_iterations
 
-    def _hash_password(self, password: str) -> str:
+    def calibrate_password_cost(self, budget_ms: int | None = None) -> int:
+        budget_ms = budget_ms or self.PASSWORD_TIME_BUDGET_MS
+        sample_iterations = 50_000
         salt = os.urandom(16)
-        derived = hashlib.pbkdf2_hmac(
-            "sha256",
-            (password + self.PASSWORD_PEPPER).encode("utf-8"),
-            salt,
-            self.PASSWORD_ITERATIONS,
+        password = ("calibracao" + self.PASSWORD_PEPPER).encode("utf-8")
+        elapsed = min(
+            _timed_pbkdf2(password, salt, sample_iterations) for _attempt in range(3)
         )
-        salt_b64 = urlsafe_b64encode(salt).decode("ascii")
-        hash_b64 = urlsafe_b64encode(derived).decode("ascii")
-        return f"pbkdf2_sha256${self.PASSWORD_ITERATIONS}${salt_b64}${hash_b64}"
+        iterations = int(sample_iterations * (budget_ms / 1000) / elapsed)
+        iterations = max(self.MIN_PASSWORD_ITERATIONS, round(iterations, -3))
+        with self._connection() as conn:
+            conn.execute(
+                """
+                INSERT INTO password_cost (host, iterations, budget_ms, calibrated_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(host) DO UPDATE SET
+                    iterations = excluded.iterations,
+                    budget_ms = excluded.budget_ms,
+                    calibrated_at = excluded.calibrated_at
+                """,
+                (socket.gethostname(), iterations, budget_ms),
+            )
+            conn.commit()
+        self._password_iterations = iterations
+        return iterations
+
+    def _hash_password(self, password: str) -> str:
+        return _pbkdf2_hash(password, self.PASSWORD_PEPPER, self._target_password_iterations())
+
+    def _hash_iterations(self, encoded_hash: str) -> int | None:
+        try:
+            return int(encoded_hash.split("$", 3)[1])
+        except (IndexError, ValueError):
+            return None
 
     def _verify_password(self, password: str, encoded_hash: str) -> bool:
         try:
@@ -303,64 +711,397 @@ class DatabaseManager:
         )
         return hmac.compare_digest(candidate, stored_hash)
 
-    def _migrate_plaintext_passwords(self, conn: sqlite3.Connection) -> None:
+    def _migrate_plaintext_passwords(
+        self,
+        conn: sqlite3.Connection,
+        max_workers: int | None = None,
+    ) -> int:
         cursor = conn.cursor()
         rows = cursor.execute(
             """
-            SELECT id, senha, senha_hash
+            SELECT id, senha
             FROM users
-            WHERE TRIM(COALESCE(senha, '')) <> ''
+            WHERE TRIM(COALESCE(senha, '')) <> '' AND COALESCE(senha_hash, '') = ''
             """
         ).fetchall()
-        changed = False
-        for user_id, plain_password, stored_hash in rows:
-            if stored_hash:
-                continue
-            password_hash = self._hash_password(plain_password)
-            cursor.execute(
-                "UPDATE users SET senha_hash = ?, senha = '' WHERE id = ?",
-                (password_hash, user_id),
-            )
-            changed = True
-        if changed:
+        if not rows:
+            return 0
+
+        started = time.perf_counter()
+        user_ids = [row[0] for row in rows]
+        passwords = [row[1] for row in rows]
+        if len(rows) == 1:
+            hashes = [self._hash_password(passwords[0])]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                hashes = list(
+                    pool.map(
+                        _pbkdf2_hash,
+                        passwords,
+                        repeat(self.PASSWORD_PEPPER),
+                        repeat(self._target_password_iterations()),
+                    )
+                )
+        cursor.executemany(
+            "UPDATE users SET senha_hash = ?, senha = '' WHERE id = ? AND COALESCE(senha_hash, '') = ''",
+            zip(hashes, user_ids),
+        )
+        logger.info(
+            "%d senhas em texto puro convertidas em %.1f s",
+            len(rows),
+            time.perf_counter() - started,
+        )
+        return len(rows)
+
+    def migrate_plaintext_passwords(self, max_workers: int | None = None) -> int:
+        with self._connection() as conn:
+            migrated = self._migrate_plaintext_passwords(conn, max_workers)
             conn.commit()
+            return migrated
 
     def fetch_rows(self, table: str, columns: tuple[str, ...]) -> list[dict[str, str]]:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connection() as conn:
             cursor = conn.cursor()
             sql = f"SELECT {', '.join(columns)} FROM {table} ORDER BY id"
             rows = cursor.execute(sql).fetchall()
             return [dict(row) for row in rows]
 
-    def fetch_access_folders(self) -> list[str]:
-        with sqlite3.connect(self.db_path) as conn:
+    def fetch_rows_page(
+        self,
+        table: str,
+        columns: tuple[str, ...],
+        after_id: int = 0,
+        limit: int = 500,
+    ) -> tuple[list[dict[str, str]], int | None]:
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            sql = f"SELECT id, {', '.join(columns)} FROM {table} WHERE id > ? ORDER BY id LIMIT ?"
+            rows = cursor.execute(sql, (after_id, limit)).fetchall()
+        page = [dict(zip(columns, row[1:])) for row in rows]
+        next_id = int(rows[-1][0]) if len(rows) == limit else None
+        return page, next_id
+
+    def query_rows(
+        self,
+        table: str,
+        columns: tuple[str, ...],
+        filters: Iterable[Filter | tuple[str, str, object]] = (),
+        order_by: str = "id",
+        descending: bool = False,
+        limit: int | None = 500,
+        offset: int = 0,
+        after: tuple[object, int] | None = None,
+        include_archive: bool = False,
+    ) -> tuple[list[dict[str, str]], tuple[object, int] | None]:
+        columns = tuple(columns)
+        filters = tuple(Filter(*item) for item in filters)
+        merge = include_archive and table in archive.ARCHIVED_TABLES
+        with self._connection() as conn, (
+            self._archive_attached(conn) if merge else nullcontext(False)
+        ) as attached:
+            if not attached:
+                sql, parameters = build_select(
+                    table, columns, filters, order_by, descending, limit, offset, after
+                )
+                rows = conn.execute(sql, parameters).fetchall()
+                full = limit is not None and len(rows) == limit
+            else:
+                # Cada banco devolve ate offset + limit linhas; a pagina sai da juncao ordenada.
+                window = None if limit is None else limit + offset
+                merged: dict[int, sqlite3.Row] = {}
+                full = False
+                for schema in (archive.SCHEMA, "main"):
+                    sql, parameters = build_select(
+                        table, columns, filters, order_by, descending, window, 0, after, schema
+                    )
+                    batch = conn.execute(sql, parameters).fetchall()
+                    full = full or (window is not None and len(batch) == window)
+                    # Arquivamento interrompido pode deixar o registro nos dois; vale o principal.
+                    merged.update((row[0], row) for row in batch)
+                rows = sorted(
+                    merged.values(),
+                    key=lambda row: (order_key(order_by, row[1]), row[0]),
+                    reverse=descending,
+                )
+                rows = rows[offset:] if limit is None else rows[offset : offset + limit]
+                full = full or (limit is not None and len(merged) > offset + limit)
+        page = [dict(zip(columns, row[2:])) for row in rows]
+        # Cursor para a proxima pagina: (valor da coluna de ordenacao, id) da ultima linha.
+        next_after = (rows[-1][1], int(rows[-1][0])) if full and rows else None
+        return page, next_after
+
+    def iter_rows(
+        self,
+        table: str,
+        columns: tuple[str, ...],
+        batch_size: int = 500,
+    ) -> Iterator[dict[str, str]]:
+        with self._connection() as conn:
             cursor = conn.cursor()
-            rows = cursor.execute("SELECT nome FROM access_folders ORDER BY LOWER(nome)").fetchall()
-            return [row[0] for row in rows]
+            # Enquanto o gerador estiver pausado a conexao da thread continua
+            # emprestada; uma escrita nela pularia o retry e faria commit do
+            # estado de fora, entao qualquer escrita falha ate ele terminar.
+            self._local.streaming = getattr(self._local, "streaming", 0) + 1
+            conn.set_authorizer(_deny_writes)
+            try:
+                cursor.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id")
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield dict(row)
+            finally:
+                cursor.close()
+                self._local.streaming -= 1
+                if not self._local.streaming:
+                    conn.set_authorizer(None)
 
-    def insert_row(self, table: str, row: dict[str, str]) -> None:
+    def fetch_rows_by_ids(
+        self,
+        table: str,
+        columns: tuple[str, ...],
+        ids: list[int],
+    ) -> list[dict[str, str]]:
+        if not ids:
+            return []
+        placeholders = ", ".join(["?"] * len(ids))
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            sql = f"SELECT {', '.join(columns)} FROM {table} WHERE id IN ({placeholders}) ORDER BY id"
+            rows = cursor.execute(sql, ids).fetchall()
+            return [dict(row) for row in rows]
+
+    def fetch_records(self, table: str, columns: tuple[str, ...]) -> list[Record]:
+        record = record_type(table, columns)
+        with self._connection() as conn:
+            cursor = conn.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id")
+            return [record(row) for row in cursor]
+
+    def fetch_records_by_ids(self, table: str, columns: tuple[str, ...], ids: list[int]) -> list[Record]:
+        if not ids:
+            return []
+        record = record_type(table, columns)
+        placeholders = ", ".join(["?"] * len(ids))
+        with self._connection() as conn:
+            sql = f"SELECT {', '.join(columns)} FROM {table} WHERE id IN ({placeholders}) ORDER BY id"
+            return [record(row) for row in conn.execute(sql, ids)]
+
+    def _change_log_high_water(self, conn: sqlite3.Connection) -> int:
+        # Maior seq ja emitido, mesmo que a linha tenha sido podada (AUTOINCREMENT).
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+        return int(row[0]) if row else 0
+
+    def latest_change_seq(self) -> int:
+        with self._connection() as conn:
+            return self._change_log_high_water(conn)
+
+    def fetch_changes_since(self, seq: int) -> list[dict[str, str]] | None:
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            oldest = cursor.execute("SELECT MIN(seq) FROM change_log").fetchone()[0]
+            if oldest is None:
+                oldest = self._change_log_high_water(conn) + 1
+            if seq < oldest - 1:
+                # O historico necessario ja foi podado; o cliente precisa recarregar tudo.
+                return None
+            rows = cursor.execute(
+                """
+                SELECT table_name, row_id, op, MAX(seq) AS seq
+                FROM change_log
+                WHERE seq > ?
+                GROUP BY table_name, row_id
+                ORDER BY seq
+                """,
+                (seq,),
+            ).fetchall()
+            if any(row["op"] == "R" for row in rows):
+                # Banco restaurado de backup depois de seq.
+                return None
+            return [dict(row) for row in rows]
+
+    @_retry_on_busy
+    def prune_change_log(self, keep: int | None = None) -> int:
+        keep = self.CHANGE_LOG_KEEP if keep is None else keep
+        if keep < 1:
+            # A ultima entrada marca ate onde os clientes ja podem ter lido.
+            raise ValueError("prune_change_log precisa manter ao menos 1 entrada.")
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "DELETE FROM change_log WHERE seq <= (SELECT MAX(seq) FROM change_log) - ?",
+                (keep,),
+            )
+            conn.commit()
+            return cursor.rowcount
+
+    def backfill_typed_columns(self, batch_size: int | None = None) -> int:
+        batch_size = batch_size or self.TYPED_BACKFILL_BATCH
+        updated = 0
+        for table, typed in TYPED_COLUMNS.items():
+            sources = ", ".join(column.source for column in typed)
+            targets = ", ".join(column.name for column in typed)
+            assignments = ", ".join(f"{column.name} = ?" for column in typed)
+            while True:
+                # Um lote por transacao: os outros clientes gravam entre os lotes.
+                with self._connection() as conn:
+                    state = conn.execute(
+                        "SELECT ultimo_id FROM typed_backfill_state WHERE tabela = ?",
+                        (table,),
+                    ).fetchone()
+                    rows = conn.execute(
+                        f"SELECT id, {sources}, {targets} FROM {table} WHERE id > ? ORDER BY id LIMIT ?",
+                        (int(state[0]) if state else 0, batch_size),
+                    ).fetchall()
+                    if not rows:
+                        break
+                    changes = []
+                    for row in rows:
+                        values = tuple(column.parse(row[1 + index]) for index, column in enumerate(typed))
+                        # Linhas gravadas por insert_row ja chegam tipadas.
+                        if values != tuple(row[1 + len(typed):]):
+                            changes.append((*values, row[0]))
+                    conn.executemany(f"UPDATE {table} SET {assignments} WHERE id = ?", changes)
+                    conn.execute(
+                        """
+                        INSERT INTO typed_backfill_state (tabela, ultimo_id) VALUES (?, ?)
+                        ON CONFLICT(tabela) DO UPDATE SET ultimo_id = excluded.ultimo_id
+                        """,
+                        (table, int(rows[-1][0])),
+                    )
+                updated += len(changes)
+                if len(rows) < batch_size:
+                    break
+        if updated:
+            logger.info("Colunas tipadas preenchidas em %d linhas", updated)
+        return updated
+
+    def fetch_requisicoes_totals(self, start: str | None = None, end: str | None = None) -> dict[str, int]:
+        with self._connection() as conn:
+            count, quantidade, total = conn.execute(
+                """
+                SELECT COUNT(*), COALESCE(SUM(quantidade), 0), COALESCE(SUM(total_centavos), 0)
+                FROM requisicoes
+                WHERE requisitado_em BETWEEN ? AND ?
+                """,
+                (start or "0000-01-01", end or "9999-12-31"),
+            ).fetchone()
+            return {"requisicoes": int(count), "quantidade": int(quantidade), "total_centavos": int(total)}
+
+    def fetch_insumos_consumo(self, start: str | None = None, end: str | None = None) -> dict[str, int]:
+        with self._connection() as conn:
+            rows = conn.execute(
+                """
+                SELECT departamento, SUM(quantidade)
+                FROM insumos
+                WHERE data_em BETWEEN ? AND ?
+                GROUP BY departamento
+                """,
+                (start or "0000-01-01", end or "9999-12-31"),
+            ).fetchall()
+            return {row[0]: int(row[1] or 0) for row in rows}
+
+    def fetch_dashboard_stats(self) -> dict[str, dict[str, int]]:
+        # stats_summary e mantida pelos triggers da migracao 11: uma linha por
+        # (metrica, chave), independente do tamanho das tabelas de origem.
+        with self._connection() as conn:
+            rows = conn.execute("SELECT metrica, chave, valor FROM stats_summary WHERE valor <> 0")
+            stats: dict[str, dict[str, int]] = {metric: {} for metric in migrations.STATS_METRICS}
+            for metric, key, value in rows:
+                stats.setdefault(metric, {})[key] = int(value)
+            return stats
+
+    def rebuild_dashboard_stats(self) -> None:
+        with self._connection() as conn:
+            migrations.rebuild_stats(conn.cursor())
+            conn.commit()
+
+    def fetch_access_folders(self) -> list[str]:
+        def load(conn: sqlite3.Connection) -> tuple[str, ...]:
+            rows = conn.execute("SELECT nome FROM access_folders ORDER BY LOWER(nome)").fetchall()
+            return tuple(row[0] for row in rows)
+
+        return list(self._cached(("access_folders",), load))
+
+    @_retry_on_busy
+    def insert_row(self, table: str, row: dict[str, str]) -> int:
+        row = {**row, **typed_values(table, row)}
         columns = list(row.keys())
         placeholders = ", ".join(["?"] * len(columns))
         column_list = ", ".join(columns)
         values = [row[column] for column in columns]
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             sql = f"INSERT INTO {table} ({column_list}) VALUES ({placeholders})"
             cursor.execute(sql, values)
             conn.commit()
+            return int(cursor.lastrowid)
 
+    @_retry_on_busy
+    def _insert_chunk(self, sql: str, values: list[list[object]]) -> list[int]:
+        # Um lote por transacao; dentro de uma transacao ja aberta, ela decide o commit.
+        # O id vem de cada INSERT: linhas com id explicito ou ids reaproveitados nao
+        # formam uma sequencia.
+        with self._connection() as conn:
+            began = not conn.in_transaction
+            if began:
+                conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.cursor()
+            ids = []
+            for row in values:
+                cursor.execute(sql, row)
+                ids.append(int(cursor.lastrowid))
+            if began:
+                conn.commit()
+            return ids
+
+    def insert_rows(
+        self,
+        table: str,
+        rows: list[dict[str, str]],
+        chunk_size: int = 1000,
+    ) -> list[int]:
+        if table in TYPED_COLUMNS:
+            rows = [{**row, **typed_values(table, row)} for row in rows]
+        ids: list[int] = [0] * len(rows)
+        groups: dict[tuple[str, ...], list[int]] = {}
+        for index, row in enumerate(rows):
+            groups.setdefault(tuple(row.keys()), []).append(index)
+
+        started = time.perf_counter()
+        for columns, indexes in groups.items():
+            placeholders = ", ".join(["?"] * len(columns))
+            sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+            for offset in range(0, len(indexes), chunk_size):
+                chunk = indexes[offset:offset + chunk_size]
+                values = [[rows[index][column] for column in columns] for index in chunk]
+                for index, row_id in zip(chunk, self._insert_chunk(sql, values)):
+                    ids[index] = row_id
+
+        elapsed = time.perf_counter() - started
+        if rows:
+            logger.info(
+                "%d linhas inseridas em %s em %.1f ms (%.0f linhas/s)",
+                len(rows),
+                table,
+                elapsed * 1000,
+                len(rows) / elapsed if elapsed else float("inf"),
+            )
+        return ids
+
+    @_retry_on_busy
     def add_access_folder(self, folder_name: str) -> None:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             cursor.execute("INSERT INTO access_folders (nome) VALUES (?)", (folder_name,))
             conn.commit()
 
+    @_retry_on_busy
     def remove_access_folders(self, folder_names: list[str]) -> None:
         if not folder_names:
             return
         placeholders = ", ".join(["?"] * len(folder_names))
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 f"DELETE FROM access_folders WHERE nome IN ({placeholders})",
@@ -369,14 +1110,15 @@ class DatabaseManager:
             conn.commit()
 
     def fetch_user_groups(self) -> list[dict[str, str]]:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            rows = cursor.execute("SELECT id, nome FROM user_groups ORDER BY LOWER(nome)").fetchall()
-            return [dict(row) for row in rows]
+        def load(conn: sqlite3.Connection) -> tuple[dict[str, str], ...]:
+            rows = conn.execute("SELECT id, nome FROM user_groups ORDER BY LOWER(nome)").fetchall()
+            return tuple(dict(row) for row in rows)
 
+        return [dict(row) for row in self._cached(("user_groups",), load)]
+
+    @_retry_on_busy
     def add_user_group(self, nome: str) -> bool:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             exists = cursor.execute(
                 "SELECT 1 FROM user_groups WHERE LOWER(nome)=LOWER(?) LIMIT 1",
@@ -388,8 +1130,9 @@ class DatabaseManager:
             conn.commit()
             return True
 
+    @_retry_on_busy
     def assign_user_to_group(self, group_id: int, user_id: int) -> bool:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             exists = cursor.execute(
                 """
@@ -409,10 +1152,8 @@ class DatabaseManager:
             return True
 
     def fetch_group_members(self, group_id: int) -> list[dict[str, str]]:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            rows = cursor.execute(
+        def load(conn: sqlite3.Connection) -> tuple[dict[str, str], ...]:
+            rows = conn.execute(
                 """
                 SELECT u.id, u.nome, u.departamento, u.perfil
                 FROM user_group_members m
@@ -422,12 +1163,13 @@ class DatabaseManager:
                 """,
                 (group_id,),
             ).fetchall()
-            return [dict(row) for row in rows]
+            return tuple(dict(row) for row in rows)
+
+        return [dict(row) for row in self._cached(("group_members", int(group_id)), load)]
 
     def fetch_user_group_map(self) -> dict[int, str]:
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            rows = cursor.execute(
+        def load(conn: sqlite3.Connection) -> dict[int, str]:
+            rows = conn.execute(
                 """
                 SELECT
                     m.user_id,
@@ -439,9 +1181,15 @@ class DatabaseManager:
             ).fetchall()
             return {int(user_id): groups for user_id, groups in rows}
 
+        return dict(self._cached(("user_group_map",), load))
+
     def set_user_credentials(self, user_id: int, username: str, senha: str) -> bool:
-        password_hash = self._hash_password(senha)
-        with sqlite3.connect(self.db_path) as conn:
+        # PBKDF2 uma vez so, fora das tentativas.
+        return self._store_user_credentials(user_id, username, self._hash_password(senha))
+
+    @_retry_on_busy
+    def _store_user_credentials(self, user_id: int, username: str, password_hash: str) -> bool:
+        with self._connection() as conn:
             cursor = conn.cursor()
             exists = cursor.execute(
                 """
@@ -461,8 +1209,7 @@ class DatabaseManager:
             return True
 
     def authenticate_user(self, username: str, senha: str) -> dict[str, str] | None:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connection() as conn:
             cursor = conn.cursor()
             row = cursor.execute(
                 """
@@ -481,6 +1228,14 @@ class DatabaseManager:
             stored_plain = (user.get("senha") or "").strip()
 
             if stored_hash and self._verify_password(senha, stored_hash):
+                # So sobe o custo: um cliente lento nao pode enfraquecer o hash gravado,
+                # e hosts com calibracoes diferentes nao regravam a senha a cada login.
+                if (self._hash_iterations(stored_hash) or 0) < self._target_password_iterations():
+                    cursor.execute(
+                        "UPDATE users SET senha_hash = ? WHERE id = ? AND senha_hash = ?",
+                        (self._hash_password(senha), user["id"], user["senha_hash"]),
+                    )
+                    conn.commit()
                 return {"id": user["id"], "nome": user["nome"], "username": user["username"]}
 
             if stored_plain and hmac.compare_digest(stored_plain, senha):
@@ -494,6 +1249,10 @@ class DatabaseManager:
 
             return None
 
+    def authenticate_user_async(self, username: str, senha: str) -> Future:
+        return self._background().submit(self.authenticate_user, username, senha)
+
+    @_retry_on_busy
     def insert_chamado(
         self,
         titulo: str,
@@ -505,7 +1264,7 @@ class DatabaseManager:
         status: str,
         responsavel: str = "",
     ) -> int:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -517,8 +1276,9 @@ class DatabaseManager:
             conn.commit()
             return int(cursor.lastrowid)
 
+    @_retry_on_busy
     def update_chamado_status(self, chamado_id: int, status: str) -> None:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "UPDATE chamados SET status = ? WHERE id = ?",
@@ -526,8 +1286,9 @@ class DatabaseManager:
             )
             conn.commit()
 
+    @_retry_on_busy
     def update_chamado_flow(self, chamado_id: int, status: str, responsavel: str) -> None:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "UPDATE chamados SET status = ?, responsavel = ? WHERE id = ?",
@@ -535,91 +1296,432 @@ class DatabaseManager:
             )
             conn.commit()
 
-    def import_legacy_chamados(self, legacy_db_path: str) -> tuple[int, int]:
-        imported = 0
-        skipped = 0
-
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            legacy_conn = sqlite3.connect(legacy_db_path)
-            legacy_cur = legacy_conn.cursor()
+    @contextmanager
+    def _archive_attached(self, conn: sqlite3.Connection, create: bool = False) -> Iterator[bool]:
+        # O arquivo so e anexado enquanto alguma leitura ou o arquivamento precisa dele.
+        if not create and not self.archive_path.exists():
+            yield False
+            return
+        conn.execute("ATTACH DATABASE ? AS archive", (str(self.archive_path),))
+        try:
+            if create:
+                conn.execute(f"PRAGMA archive.journal_mode = {self.storage.journal_mode}")
+                archive.ensure_schema(conn)
+                conn.commit()
+            yield True
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.execute("DETACH DATABASE archive")
 
-            query = """
-                SELECT
-                    t.id,
-                    t.title,
-                    t.description,
-                    COALESCE(NULLIF(TRIM(u.first_name || ' ' || u.last_name), ''), u.username, ''),
-                    COALESCE(NULLIF(TRIM(au.first_name || ' ' || au.last_name), ''), au.username, ''),
-                    t.ticket_type,
-                    t.urgency,
-                    t.status,
-                    COALESCE(a.files, '')
-                FROM tickets_ticket t
-                LEFT JOIN auth_user u ON u.id = t.created_by_id
-                LEFT JOIN auth_user au ON au.id = t.assigned_to_id
-                LEFT JOIN (
-                    SELECT ticket_id, GROUP_CONCAT(file, '; ') AS files
-                    FROM tickets_ticketattachment
-                    GROUP BY ticket_id
-                ) a ON a.ticket_id = t.id
-                ORDER BY t.id
-            """
-            legacy_rows = legacy_cur.execute(query).fetchall()
+    def _delete_chamados(self, conn: sqlite3.Connection, schema: str, ids: list[int]) -> None:
+        placeholders = ", ".join(["?"] * len(ids))
+        conn.execute(f"DELETE FROM {schema}.chamado_messages WHERE chamado_id IN ({placeholders})", ids)
+        conn.execute(f"DELETE FROM {schema}.chamados WHERE id IN ({placeholders})", ids)
 
-            for row in legacy_rows:
-                legacy_id, title, description, autor, assigned_to, ticket_type, urgency, old_status, files = row
-                exists = cursor.execute(
+    def archive_closed_chamados(
+        self,
+        older_than_days: int = archive.ARCHIVE_AFTER_DAYS,
+        batch_size: int = archive.ARCHIVE_BATCH,
+        backup_first: bool = True,
+    ) -> int:
+        cutoff = f"-{int(older_than_days)} days"
+        if backup_first:
+            with self._connection() as conn:
+                pending = conn.execute(
                     """
-                    SELECT 1
-                    FROM chamados
-                    WHERE legacy_source = ? AND legacy_id = ?
+                    SELECT 1 FROM chamados
+                    WHERE fechado_em IS NOT NULL AND fechado_em < datetime('now', ?)
                     LIMIT 1
                     """,
-                    ("old_tickets", legacy_id),
+                    (cutoff,),
                 ).fetchone()
-                if exists:
-                    skipped += 1
-                    continue
-
-                mapped_status = "pendente"
-                mapped_responsavel = ""
-                old_status = (old_status or "").strip().lower()
-                if old_status in {"resolved", "fechado", "finalizado"}:
-                    mapped_status = "fechado"
-                elif old_status in {"in_progress", "em_atendimento"}:
-                    mapped_status = "em_atendimento"
-                    mapped_responsavel = assigned_to or ""
-
-                cursor.execute(
-                    """
-                    INSERT INTO chamados (
-                        titulo, descricao, autor, tipo, urgencia, arquivo, responsavel, status, legacy_source, legacy_id
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            if pending is None:
+                return 0
+            # Copia dos dois bancos antes de qualquer chamado sair do principal.
+            self.create_backup()
+        chamado_columns = ", ".join(archive.CHAMADO_COLUMNS)
+        message_columns = ", ".join(archive.MESSAGE_COLUMNS)
+        attachment_columns = ", ".join(archive.ATTACHMENT_COLUMNS)
+        archived = 0
+        while True:
+            # Um lote por conexao: os outros clientes usam o banco entre os lotes.
+            with self._connection() as conn, self._archive_attached(conn, create=True):
+                ids = [
+                    row[0]
+                    for row in conn.execute(
+                        """
+                        SELECT id FROM chamados
+                        WHERE fechado_em IS NOT NULL AND fechado_em < datetime('now', ?)
+                        ORDER BY fechado_em
+                        LIMIT ?
+                        """,
+                        (cutoff, batch_size),
+                    ).fetchall()
+                ]
+                if not ids:
+                    break
+                placeholders = ", ".join(["?"] * len(ids))
+                # Em WAL um commit com dois bancos nao e atomico entre eles. Por isso
+                # duas transacoes: primeiro a copia, depois a remocao. Uma queda no meio
+                # deixa o chamado nos dois bancos (as leituras preferem o principal),
+                # nunca em nenhum.
+                conn.execute("BEGIN IMMEDIATE")
+                self._delete_chamados(conn, "archive", ids)
+                conn.execute(
+                    f"""
+                    INSERT INTO archive.chamados ({chamado_columns})
+                    SELECT {chamado_columns} FROM main.chamados WHERE id IN ({placeholders})
+                    """,
+                    ids,
+                )
+                conn.execute(
+                    f"""
+                    INSERT INTO archive.chamado_messages ({message_columns})
+                    SELECT {message_columns} FROM main.chamado_messages
+                    WHERE chamado_id IN ({placeholders})
                     """,
-                    (
-                        title or "",
-                        description or "",
-                        autor or "Solicitante",
-                        ticket_type or "",
-                        urgency or "",
-                        files or "",
-                        mapped_responsavel,
-                        mapped_status,
-                        "old_tickets",
-                        legacy_id,
-                    ),
+                    ids,
                 )
-                imported += 1
+                # Os arquivos ficam no mesmo AttachmentStore e podem ser compartilhados com
+                # chamados ativos: os metadados sao copiados e continuam no principal.
+                conn.execute(
+                    f"""
+                    INSERT OR IGNORE INTO archive.attachments ({attachment_columns})
+                    SELECT {attachment_columns} FROM main.attachments
+                    WHERE sha256 IN (
+                        SELECT substr(arquivo, {len(ATTACHMENT_PREFIX) + 1}) FROM main.chamados
+                        WHERE id IN ({placeholders}) AND arquivo LIKE '{ATTACHMENT_PREFIX}%'
+                        UNION
+                        SELECT substr(arquivo, {len(ATTACHMENT_PREFIX) + 1}) FROM main.chamado_messages
+                        WHERE chamado_id IN ({placeholders}) AND arquivo LIKE '{ATTACHMENT_PREFIX}%'
+                    )
+                    """,
+                    ids * 2,
+                )
+                conn.commit()
 
+                conn.execute("BEGIN IMMEDIATE")
+                # Reaberto ou com mensagem nova depois da copia: fica no principal.
+                moved = [
+                    row[0]
+                    for row in conn.execute(
+                        f"""
+                        SELECT c.id FROM main.chamados c
+                        WHERE c.id IN ({placeholders})
+                            AND c.fechado_em < datetime('now', ?)
+                            AND (SELECT COUNT(*) FROM main.chamado_messages m WHERE m.chamado_id = c.id)
+                            = (SELECT COUNT(*) FROM archive.chamado_messages a WHERE a.chamado_id = c.id)
+                        """,
+                        (*ids, cutoff),
+                    ).fetchall()
+                ]
+                stale = sorted(set(ids) - set(moved))
+                if stale:
+                    self._delete_chamados(conn, "archive", stale)
+                if moved:
+                    conn.execute(
+                        f"""
+                        INSERT OR IGNORE INTO main.legacy_arquivados (source, legacy_id)
+                        SELECT legacy_source, legacy_id FROM main.chamados
+                        WHERE id IN ({', '.join(['?'] * len(moved))}) AND legacy_id IS NOT NULL
+                        """,
+                        moved,
+                    )
+                    self._delete_chamados(conn, "main", moved)
+                conn.commit()
+            archived += len(moved)
+            if len(ids) < batch_size:
+                break
+        if archived:
+            logger.info("%d chamados fechados movidos para %s", archived, self.archive_path.name)
+        return archived
+
+    def unarchive_chamado(self, chamado_id: int) -> bool:
+        chamado_columns = ", ".join(archive.CHAMADO_COLUMNS)
+        message_columns = ", ".join(archive.MESSAGE_COLUMNS)
+        with self._connection() as conn, self._archive_attached(conn) as attached:
+            if not attached:
+                return False
+            # Mesma ordem do arquivamento: primeiro a copia (com o id original), depois a remocao.
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                f"""
+                INSERT OR IGNORE INTO main.chamados ({chamado_columns})
+                SELECT {chamado_columns} FROM archive.chamados WHERE id = ?
+                """,
+                (chamado_id,),
+            )
+            conn.execute(
+                f"""
+                INSERT OR IGNORE INTO main.chamado_messages ({message_columns})
+                SELECT {message_columns} FROM archive.chamado_messages WHERE chamado_id = ?
+                """,
+                (chamado_id,),
+            )
+            conn.execute(
+                """
+                DELETE FROM main.legacy_arquivados
+                WHERE (source, legacy_id) IN (
+                    SELECT legacy_source, legacy_id FROM archive.chamados WHERE id = ?
+                )
+                """,
+                (chamado_id,),
+            )
+            restored = conn.execute("SELECT 1 FROM main.chamados WHERE id = ?", (chamado_id,)).fetchall()
             conn.commit()
-            legacy_conn.close()
+            conn.execute("BEGIN IMMEDIATE")
+            self._delete_chamados(conn, "archive", [chamado_id])
+            conn.commit()
+        return bool(restored)
+
+    def fetch_chamado(self, chamado_id: int) -> dict[str, object] | None:
+        columns = ", ".join(archive.CHAMADO_COLUMNS)
+        with self._connection() as conn:
+            rows = conn.execute(f"SELECT {columns} FROM chamados WHERE id = ?", (chamado_id,)).fetchall()
+            if rows:
+                return {**dict(rows[0]), "arquivado": False}
+            with self._archive_attached(conn) as attached:
+                if attached:
+                    rows = conn.execute(
+                        f"SELECT {columns} FROM archive.chamados WHERE id = ?", (chamado_id,)
+                    ).fetchall()
+        return {**dict(rows[0]), "arquivado": True} if rows else None
+
+    def _legacy_chunks(
+        self,
+        cursor: sqlite3.Cursor,
+        chunk_size: int,
+        after_id: int = -(2**63),
+    ) -> Iterator[tuple[int, int, int]]:
+        last_id = after_id
+        while True:
+            upper_id, chunk_rows = cursor.execute(
+                """
+                SELECT MAX(id), COUNT(*)
+                FROM (
+                    SELECT id FROM legacy.tickets_ticket
+                    WHERE id > ?
+                    ORDER BY id
+                    LIMIT ?
+                )
+                """,
+                (last_id, chunk_size),
+            ).fetchone()
+            if not chunk_rows:
+                return
+            yield last_id, upper_id, chunk_rows
+            last_id = upper_id
+
+    def _insert_legacy_range(self, cursor: sqlite3.Cursor, lower_id: int, upper_id: int) -> int:
+        # Mapeamento de status e deduplicacao feitos pelo SQLite num unico anti-join.
+        cursor.execute(
+            f"""
+            INSERT INTO main.chamados (
+                titulo, descricao, autor, tipo, urgencia, arquivo, responsavel, status,
+                legacy_source, legacy_id
+            )
+            SELECT
+                m.titulo, m.descricao, m.autor, m.tipo, m.urgencia, m.arquivo, m.responsavel, m.status,
+                ?, m.legacy_id
+            FROM ({self.LEGACY_TICKETS_SQL}) m
+            WHERE m.legacy_id > ?
+                AND m.legacy_id <= ?
+                AND NOT EXISTS (
+                    SELECT 1
+                    FROM main.chamados c
+                    WHERE c.legacy_source = ? AND c.legacy_id = m.legacy_id
+                )
+                AND NOT EXISTS (
+                    SELECT 1
+                    FROM main.legacy_arquivados a
+                    WHERE a.source = ? AND a.legacy_id = m.legacy_id
+                )
+            ORDER BY m.legacy_id
+            """,
+            (self.LEGACY_SOURCE, lower_id, upper_id, self.LEGACY_SOURCE, self.LEGACY_SOURCE),
+        )
+        return cursor.rowcount
+
+    def import_legacy_chamados(
+        self,
+        legacy_db_path: str,
+        chunk_size: int = 5000,
+        progress: Callable[[int, int], None] | None = None,
+    ) -> tuple[int, int]:
+        imported = 0
+        skipped = 0
+
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("ATTACH DATABASE ? AS legacy", (legacy_db_path,))
+            try:
+                total = cursor.execute("SELECT COUNT(*) FROM legacy.tickets_ticket").fetchone()[0]
+                processed = 0
+                for lower_id, upper_id, chunk_rows in self._legacy_chunks(cursor, chunk_size):
+                    inserted = self._insert_legacy_range(cursor, lower_id, upper_id)
+                    conn.commit()
+
+                    imported += inserted
+                    skipped += chunk_rows - inserted
+                    processed += chunk_rows
+                    if progress:
+                        progress(processed, total)
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                cursor.execute("DETACH DATABASE legacy")
 
         return imported, skipped
 
+    def sync_legacy_chamados(
+        self,
+        legacy_db_path: str,
+        chunk_size: int = 5000,
+        progress: Callable[[int, int], None] | None = None,
+    ) -> tuple[int, int]:
+        imported = 0
+        updated = 0
+
+        with self._connection() as conn:
+            conn.create_function("legacy_checksum", -1, _legacy_checksum, deterministic=True)
+            cursor = conn.cursor()
+            cursor.execute("ATTACH DATABASE ? AS legacy", (legacy_db_path,))
+            try:
+                row = cursor.execute(
+                    "SELECT max_legacy_id FROM legacy_sync_state WHERE source = ?",
+                    (self.LEGACY_SOURCE,),
+                ).fetchone()
+                watermark = int(row[0]) if row else -(2**63)
+                total = cursor.execute("SELECT COUNT(*) FROM legacy.tickets_ticket").fetchone()[0]
+                cursor.execute(
+                    """
+                    CREATE TEMP TABLE IF NOT EXISTS legacy_sync_batch (
+                        legacy_id INTEGER PRIMARY KEY,
+                        checksum TEXT NOT NULL
+                    )
+                    """
+                )
+                processed = 0
+                max_seen = watermark
+                for lower_id, upper_id, chunk_rows in self._legacy_chunks(cursor, chunk_size):
+                    cursor.execute("DELETE FROM temp.legacy_sync_batch")
+                    # O checksum usa os campos brutos; so os tickets novos ou alterados
+                    # passam pelo mapeamento completo.
+                    cursor.execute(
+                        """
+                        INSERT INTO temp.legacy_sync_batch (legacy_id, checksum)
+                        SELECT id, checksum
+                        FROM (
+                            SELECT
+                                t.id,
+                                legacy_checksum(
+                                    t.status,
+                                    t.assigned_to_id,
+                                    (
+                                        SELECT GROUP_CONCAT(a.file, '; ')
+                                        FROM legacy.tickets_ticketattachment a
+                                        WHERE a.ticket_id = t.id
+                                    )
+                                ) AS checksum
+                            FROM legacy.tickets_ticket t
+                            WHERE t.id > ? AND t.id <= ?
+                        ) c
+                        WHERE NOT EXISTS (
+                            SELECT 1
+                            FROM main.legacy_sync_tickets s
+                            WHERE s.source = ? AND s.legacy_id = c.id AND s.checksum = c.checksum
+                        )
+                        """,
+                        (lower_id, upper_id, self.LEGACY_SOURCE),
+                    )
+
+                    imported += self._insert_legacy_range(cursor, max(lower_id, watermark), upper_id)
+                    # Vale para todo lote, inclusive na primeira sincronizacao apos
+                    # import_legacy_chamados (ainda sem marca d'agua): o lote so tem tickets
+                    # novos ou alterados, e os recem-inseridos ja chegam iguais.
+                    cursor.execute(
+                        f"""
+                        UPDATE main.chamados
+                        SET status = m.status, responsavel = m.responsavel, arquivo = m.arquivo
+                        FROM ({self.LEGACY_TICKETS_SQL}) m
+                        WHERE m.legacy_id IN (SELECT legacy_id FROM temp.legacy_sync_batch)
+                            AND chamados.legacy_source = ?
+                            AND chamados.legacy_id > ?
+                            AND chamados.legacy_id <= ?
+                            AND chamados.legacy_id = m.legacy_id
+                            AND (
+                                chamados.status <> m.status
+                                OR chamados.responsavel <> m.responsavel
+                                OR chamados.arquivo <> m.arquivo
+                            )
+                        """,
+                        (self.LEGACY_SOURCE, lower_id, upper_id),
+                    )
+                    updated += cursor.rowcount
+                    cursor.execute(
+                        """
+                        INSERT INTO main.legacy_sync_tickets (source, legacy_id, checksum)
+                        SELECT ?, legacy_id, checksum FROM temp.legacy_sync_batch
+                        WHERE true
+                        ON CONFLICT(source, legacy_id) DO UPDATE SET checksum = excluded.checksum
+                        """,
+                        (self.LEGACY_SOURCE,),
+                    )
+                    max_seen = max(max_seen, upper_id)
+                    cursor.execute(
+                        """
+                        INSERT INTO main.legacy_sync_state (source, max_legacy_id, synced_at)
+                        VALUES (?, ?, CURRENT_TIMESTAMP)
+                        ON CONFLICT(source) DO UPDATE SET
+                            max_legacy_id = excluded.max_legacy_id,
+                            synced_at = excluded.synced_at
+                        """,
+                        (self.LEGACY_SOURCE, max_seen),
+                    )
+                    conn.commit()
+
+                    processed += chunk_rows
+                    if progress:
+                        progress(processed, total)
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                cursor.execute("DETACH DATABASE legacy")
+
+        return imported, updated
+
+    def _fts_query(self, text: str) -> str:
+        # Cada palavra vira um prefixo entre aspas, assim a busca nunca gera erro de sintaxe FTS5.
+        return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+
+    def search_chamados(
+        self,
+        query: str,
+        limit: int = 50,
+        include_internal: bool = True,
+        include_archive: bool = True,
+    ) -> list[dict[str, str]]:
+        fts_query = self._fts_query(query)
+        if not fts_query:
+            return []
+        parameters = (fts_query, limit * 4, fts_query, include_internal, limit * 4, limit)
+        with self._connection() as conn:
+            rows = conn.execute(self.SEARCH_CHAMADOS_SQL.format(schema=""), parameters).fetchall()
+            found = {row["id"]: {**dict(row), "arquivado": False} for row in rows}
+            with self._archive_attached(conn) if include_archive else nullcontext(False) as attached:
+                if attached:
+                    archived = conn.execute(
+                        self.SEARCH_CHAMADOS_SQL.format(schema="archive."), parameters
+                    ).fetchall()
+                    for row in archived:
+                        found.setdefault(row["id"], {**dict(row), "arquivado": True})
+        # O rank de cada banco usa as proprias estatisticas do FTS5; juntos eles sao
+        # so aproximadamente comparaveis, o bastante para ordenar a lista.
+        return sorted(found.values(), key=lambda row: row["best_score"])[:limit]
+
     def fetch_chamado_messages(self, chamado_id: int, canal: str) -> list[dict[str, str]]:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connection() as conn:
             cursor = conn.cursor()
             rows = cursor.execute(
                 """
@@ -632,6 +1734,33 @@ class DatabaseManager:
             ).fetchall()
             return [dict(row) for row in rows]
 
+    def fetch_chamado_messages_since(
+        self,
+        chamado_id: int,
+        channels: tuple[str, ...] = ("publico", "interno"),
+        after_id: int = 0,
+        archived: bool = False,
+    ) -> list[dict[str, str]]:
+        if not channels:
+            return []
+        placeholders = ", ".join(["?"] * len(channels))
+        with self._connection() as conn, (
+            self._archive_attached(conn) if archived else nullcontext(True)
+        ) as readable:
+            if not readable:
+                return []
+            rows = conn.execute(
+                f"""
+                SELECT id, canal, autor, mensagem, arquivo, criado_em
+                FROM {'archive.' if archived else ''}chamado_messages
+                WHERE chamado_id = ? AND canal IN ({placeholders}) AND id > ?
+                ORDER BY id
+                """,
+                (chamado_id, *channels, after_id),
+            ).fetchall()
+            return [dict(row) for row in rows]
+
+    @_retry_on_busy
     def add_chamado_message(
         self,
         chamado_id: int,
@@ -640,7 +1769,7 @@ class DatabaseManager:
         mensagem: str,
         arquivo: str,
     ) -> None:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -650,3 +1779,133 @@ class DatabaseManager:
                 (chamado_id, canal, autor, mensagem, arquivo),
             )
             conn.commit()
+
+    def store_attachment(self, path: str) -> str:
+        # A copia do arquivo fica fora da transacao: SQLITE_BUSY repete so o registro.
+        digest, size = self.attachments.put(path)
+        self._record_attachment(digest, Path(path).name, size)
+        return ATTACHMENT_PREFIX + digest
+
+    @_retry_on_busy
+    def _record_attachment(self, digest: str, nome: str, tamanho: int) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                """
+                INSERT INTO attachments (sha256, nome, tamanho) VALUES (?, ?, ?)
+                ON CONFLICT(sha256) DO NOTHING
+                """,
+                (digest, nome, tamanho),
+            )
+            conn.commit()
+
+    def fetch_attachment(self, ref: str) -> dict[str, str] | None:
+        if not is_attachment_ref(ref):
+            return None
+        with self._connection() as conn:
+            row = conn.execute(
+                """
+                SELECT sha256, nome, tamanho, criado_em, verificado_em, integro
+                FROM attachments
+                WHERE sha256 = ?
+                """,
+                (digest_from_ref(ref),),
+            ).fetchone()
+            return dict(row) if row else None
+
+    def open_attachment(self, ref: str) -> AbstractContextManager[memoryview]:
+        return self.attachments.open(digest_from_ref(ref))
+
+    def export_attachment(self, ref: str, destination: str) -> None:
+        self.attachments.export(digest_from_ref(ref), destination)
+
+    def import_local_attachments(self) -> int:
+        stored = 0
+        for table in ("chamados", "chamado_messages"):
+            last_id = 0
+            while True:
+                with self._connection() as conn:
+                    rows = conn.execute(
+                        f"""
+                        SELECT id, arquivo FROM {table}
+                        WHERE id > ? AND arquivo <> '' AND arquivo NOT LIKE '{ATTACHMENT_PREFIX}%'
+                        ORDER BY id
+                        LIMIT ?
+                        """,
+                        (last_id, self.ATTACHMENT_SCAN_BATCH),
+                    ).fetchall()
+                if not rows:
+                    break
+                last_id = int(rows[-1]["id"])
+                updates = []
+                for row in rows:
+                    if os.path.isfile(row["arquivo"]):
+                        updates.append((self.store_attachment(row["arquivo"]), row["id"]))
+                if updates:
+                    with self._connection() as conn:
+                        conn.executemany(f"UPDATE {table} SET arquivo = ? WHERE id = ?", updates)
+                        conn.commit()
+                    stored += len(updates)
+        return stored
+
+    def scan_attachments(self, older_than_days: int | None = None, limit: int | None = None) -> list[str]:
+        started = time.perf_counter()
+        damaged: list[str] = []
+        checked = 0
+        last_digest = ""
+        # Com older_than_days, so os anexos nunca verificados ou verificados ha mais tempo.
+        stale, stale_params = "", ()
+        if older_than_days is not None:
+            stale = " AND (verificado_em IS NULL OR verificado_em < datetime('now', ?))"
+            stale_params = (f"-{int(older_than_days)} days",)
+        while not self._stopping.is_set() and (limit is None or checked < limit):
+            batch = self.ATTACHMENT_SCAN_BATCH
+            if limit is not None:
+                batch = min(batch, limit - checked)
+            with self._connection() as conn:
+                digests = [
+                    row[0]
+                    for row in conn.execute(
+                        f"SELECT sha256 FROM attachments WHERE sha256 > ?{stale} ORDER BY sha256 LIMIT ?",
+                        (last_digest, *stale_params, batch),
+                    ).fetchall()
+                ]
+            if not digests:
+                break
+            last_digest = digests[-1]
+            # A leitura e o hash ficam fora da conexao para nao segurar o pool.
+            results = []
+            for digest in digests:
+                # close() nao espera a varredura inteira: para no arquivo atual.
+                if self._stopping.is_set():
+                    break
+                results.append((int(self.attachments.verify(digest)), digest))
+            damaged.extend(digest for ok, digest in results if not ok)
+            checked += len(results)
+            with self._connection() as conn:
+                conn.executemany(
+                    """
+                    UPDATE attachments
+                    SET integro = ?, verificado_em = CURRENT_TIMESTAMP
+                    WHERE sha256 = ?
+                    """,
+                    results,
+                )
+                conn.commit()
+
+        for digest in damaged:
+            logger.warning("Anexo ausente ou corrompido: %s", digest)
+        logger.info(
+            "%d anexos verificados em %.1f ms (%d com problema)",
+            checked,
+            (time.perf_counter() - started) * 1000,
+            len(damaged),
+        )
+        return damaged
+
+    def scan_attachments_async(self, limit: int | None = None) -> Future:
+        # Para o app: so anexos nao conferidos ha ATTACHMENT_RESCAN_DAYS, um lote por vez.
+        return self._background().submit(
+            self.scan_attachments,
+            self.ATTACHMENT_RESCAN_DAYS,
+            self.ATTACHMENT_SCAN_BATCH if limit is None else limit,
+        )
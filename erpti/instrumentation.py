@@ -0,0 +1,279 @@
+import functools
+import inspect
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Callable
+
+
+SLOW_QUERY_MS = 200.0
+LATENCY_SAMPLES = 2048
+SLOW_LOG_MAX_BYTES = 1024 * 1024
+SLOW_LOG_BACKUPS = 5
+EXPLAINABLE_PREFIXES = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "REPLACE")
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _count_rows(result: object) -> int:
+    if isinstance(result, tuple) and result and isinstance(result[0], list):
+        return len(result[0])
+    if isinstance(result, (list, dict)):
+        return len(result)
+    return 0
+
+
+class CallStats:
+    __slots__ = ("count", "errors", "rows", "total", "pool_wait", "begin_commit", "latencies")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.rows = 0
+        self.total = 0.0
+        self.pool_wait = 0.0
+        self.begin_commit = 0.0
+        self.latencies: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def summary(self) -> dict[str, float]:
+        ordered = sorted(self.latencies)
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "rows": self.rows,
+            "total_ms": self.total * 1000,
+            "p50_ms": _percentile(ordered, 0.50) * 1000,
+            "p95_ms": _percentile(ordered, 0.95) * 1000,
+            "p99_ms": _percentile(ordered, 0.99) * 1000,
+            "max_ms": (ordered[-1] if ordered else 0.0) * 1000,
+            "pool_wait_ms": self.pool_wait * 1000,
+            "begin_commit_ms": self.begin_commit * 1000,
+        }
+
+
+class Instrumentation:
+    def __init__(self, slow_log_path: Path, slow_query_ms: float = SLOW_QUERY_MS) -> None:
+        self.slow_log_path = Path(slow_log_path)
+        self.slow_query_ms = slow_query_ms
+        self.slow_queries = 0
+        self._lock = threading.Lock()
+        self._stats: dict[str, CallStats] = {}
+        self._local = threading.local()
+        # Logger fora do registro global: cada banco tem seu proprio arquivo.
+        self._slow_log = logging.Logger("erpti.slow_queries")
+        handler = RotatingFileHandler(
+            self.slow_log_path,
+            maxBytes=SLOW_LOG_MAX_BYTES,
+            backupCount=SLOW_LOG_BACKUPS,
+            encoding="utf-8",
+            delay=True,
+        )
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        self._slow_log.addHandler(handler)
+
+    def close(self) -> None:
+        for handler in self._slow_log.handlers:
+            handler.close()
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return {name: stats.summary() for name, stats in self._stats.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self.slow_queries = 0
+
+    def _add_wait(self, index: int, seconds: float) -> None:
+        for frame in getattr(self._local, "frames", ()):
+            frame[index] += seconds
+
+    def add_pool_wait(self, seconds: float) -> None:
+        self._add_wait(0, seconds)
+
+    def add_begin_commit(self, seconds: float) -> None:
+        # BEGIN e COMMIT e onde o busy handler espera o lock do arquivo (no rollback
+        # journal o COMMIT espera os leitores sairem). Inclui o fsync do commit.
+        self._add_wait(1, seconds)
+
+    def _record(
+        self,
+        name: str,
+        elapsed: float,
+        rows: int,
+        waits: tuple[float, float],
+        failed: bool,
+    ) -> None:
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = CallStats()
+            stats.count += 1
+            stats.errors += failed
+            stats.rows += rows
+            stats.total += elapsed
+            stats.pool_wait += waits[0]
+            stats.begin_commit += waits[1]
+            stats.latencies.append(elapsed)
+
+    def wrap(self, name: str, method: Callable) -> Callable:
+        if inspect.isgeneratorfunction(method):
+            @functools.wraps(method)
+            def generator_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                rows = 0
+                failed = True
+                try:
+                    for item in method(*args, **kwargs):
+                        rows += len(item) if isinstance(item, list) else 1
+                        yield item
+                    failed = False
+                finally:
+                    self._record(name, time.perf_counter() - started, rows, (0.0, 0.0), failed)
+
+            return generator_wrapper
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            frames = self._local.__dict__.setdefault("frames", [])
+            frame = [0.0, 0.0]
+            frames.append(frame)
+            started = time.perf_counter()
+            result = None
+            failed = True
+            try:
+                result = method(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                frames.pop()
+                elapsed = time.perf_counter() - started
+                self._record(name, elapsed, _count_rows(result), tuple(frame), failed)
+
+        return wrapper
+
+    def statement(
+        self,
+        conn: sqlite3.Connection,
+        sql: str,
+        parameters: object,
+        elapsed: float,
+    ) -> None:
+        statement = sql.strip()
+        if statement[:6].upper().startswith(("BEGIN", "COMMIT", "END")):
+            self.add_begin_commit(elapsed)
+        if elapsed * 1000 < self.slow_query_ms:
+            return
+        with self._lock:
+            self.slow_queries += 1
+        # Os parametros nao vao para o log: podem conter hashes de senha.
+        self._slow_log.warning(
+            "%.1f ms\n%s\n%s\n",
+            elapsed * 1000,
+            statement,
+            self._explain(conn, statement, parameters),
+        )
+
+    def _explain(self, conn: sqlite3.Connection, statement: str, parameters: object) -> str:
+        if parameters is None or not statement.upper().startswith(EXPLAINABLE_PREFIXES):
+            return "(plano indisponivel)"
+        try:
+            rows = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {statement}", parameters)
+            return "\n".join(f"  {row[3]}" for row in rows.fetchall())
+        except sqlite3.Error as exc:
+            return f"(plano indisponivel: {exc})"
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    # O tempo de uma consulta vai do execute ate o cursor esgotar (ou ser fechado):
+    # numa leitura grande o custo esta nos fetches, nao no execute.
+    _pending: list | None = None
+
+    def _finish(self) -> None:
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            sql, parameters, elapsed = pending
+            self.connection.instrumentation.statement(self.connection, sql, parameters, elapsed)
+
+    def _timed(self, sql: str, parameters: object, run: Callable[[], object]) -> sqlite3.Cursor:
+        self._finish()
+        started = time.perf_counter()
+        try:
+            run()
+        finally:
+            self._pending = [sql, parameters, time.perf_counter() - started]
+        if self.description is None:
+            self._finish()
+        return self
+
+    def _fetch(self, fetch: Callable[[], object], exhausted: Callable[[object], bool]) -> object:
+        started = time.perf_counter()
+        try:
+            result = fetch()
+        except BaseException:
+            self._add_elapsed(started)
+            self._finish()
+            raise
+        self._add_elapsed(started)
+        if exhausted(result):
+            self._finish()
+        return result
+
+    def _add_elapsed(self, started: float) -> None:
+        if self._pending is not None:
+            self._pending[2] += time.perf_counter() - started
+
+    def execute(self, sql: str, parameters=()) -> sqlite3.Cursor:
+        return self._timed(sql, parameters, functools.partial(super().execute, sql, parameters))
+
+    def executemany(self, sql: str, seq_of_parameters) -> sqlite3.Cursor:
+        return self._timed(sql, None, functools.partial(super().executemany, sql, seq_of_parameters))
+
+    def fetchone(self):
+        return self._fetch(super().fetchone, lambda row: row is None)
+
+    def fetchmany(self, size: int | None = None):
+        size = self.arraysize if size is None else size
+        return self._fetch(functools.partial(super().fetchmany, size), lambda rows: len(rows) < size)
+
+    def fetchall(self):
+        return self._fetch(super().fetchall, lambda rows: True)
+
+    def __next__(self):
+        return self._fetch(super().__next__, lambda row: False)
+
+    def close(self) -> None:
+        self._finish()
+        super().close()
+
+    def __del__(self) -> None:
+        # Cursor abandonado antes do fim (fetchone de uma linha so, por exemplo).
+        self._finish()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    instrumentation: Instrumentation
+
+    def cursor(self, factory=InstrumentedCursor) -> sqlite3.Cursor:
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters=()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self) -> None:
+        started = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            self.instrumentation.add_begin_commit(time.perf_counter() - started)
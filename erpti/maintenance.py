@@ -0,0 +1,207 @@
+import argparse
+import logging
+import sys
+
+from erpti.archive import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH
+from erpti.backup import KEEP_SNAPSHOTS, PAGES_PER_STEP, verify_snapshot
+from erpti.database import DEFAULT_ACCESS_FOLDERS, DatabaseManager
+
+
+def _sync_legacy(db: DatabaseManager, args: argparse.Namespace) -> int:
+    imported, updated = db.sync_legacy_chamados(
+        args.legacy_db,
+        chunk_size=args.chunk_size,
+        progress=lambda done, total: print(f"\r{done}/{total} chamados verificados", end=""),
+    )
+    print(f"\nChamados novos: {imported}\nChamados atualizados: {updated}")
+    return 0
+
+
+def _hash_passwords(db: DatabaseManager, args: argparse.Namespace) -> int:
+    migrated = db.migrate_plaintext_passwords(max_workers=args.workers)
+    print(f"Senhas convertidas: {migrated}")
+    return 0
+
+
+def _calibrate_password(db: DatabaseManager, args: argparse.Namespace) -> int:
+    iterations = db.calibrate_password_cost(args.budget_ms)
+    print(f"Iteracoes PBKDF2 para esta maquina: {iterations}")
+    return 0
+
+
+def _import_attachments(db: DatabaseManager, args: argparse.Namespace) -> int:
+    stored = db.import_local_attachments()
+    print(f"Anexos copiados para {db.attachments.root}: {stored}")
+    return 0
+
+
+def _scan_attachments(db: DatabaseManager, args: argparse.Namespace) -> int:
+    damaged = db.scan_attachments(args.older_than_days)
+    for digest in damaged:
+        print(f"Anexo ausente ou corrompido: {digest}")
+    return 1 if damaged else 0
+
+
+def _backup(db: DatabaseManager, args: argparse.Namespace) -> int:
+    snapshot = db.create_backup(
+        args.dir,
+        compression="" if args.compression == "none" else args.compression,
+        keep=args.keep,
+        pages_per_step=args.pages_per_step,
+        progress=lambda done, total: print(f"\r{done}/{total} paginas copiadas", end=""),
+    )
+    print(f"\nBackup gravado em {snapshot}")
+    return 0
+
+
+def _verify_backup(db: DatabaseManager, args: argparse.Namespace) -> int:
+    snapshots = [args.snapshot] if args.snapshot else db.list_backups(args.dir)
+    failed = 0
+    for snapshot in snapshots:
+        errors = verify_snapshot(snapshot)
+        print(f"{snapshot}: {'ok' if not errors else '; '.join(errors[:5])}")
+        failed += bool(errors)
+    return 1 if failed else 0
+
+
+def _rebuild_stats(db: DatabaseManager, args: argparse.Namespace) -> int:
+    db.rebuild_dashboard_stats()
+    for metric, counts in db.fetch_dashboard_stats().items():
+        print(f"{metric}: {sum(counts.values())} em {len(counts)} chaves")
+    return 0
+
+
+def _archive_chamados(db: DatabaseManager, args: argparse.Namespace) -> int:
+    archived = db.archive_closed_chamados(
+        args.days,
+        batch_size=args.batch_size,
+        backup_first=not args.no_backup,
+    )
+    print(f"Chamados movidos para {db.archive_path}: {archived}")
+    return 0
+
+
+def _prune_change_log(db: DatabaseManager, args: argparse.Namespace) -> int:
+    removed = db.prune_change_log(args.keep)
+    print(f"Entradas removidas do change_log: {removed}")
+    return 0
+
+
+def _restore_backup(db: DatabaseManager, args: argparse.Namespace) -> int:
+    db.restore_backup(args.snapshot)
+    print(f"Banco restaurado a partir de {args.snapshot}")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m erpti.maintenance")
+    parser.add_argument("--db", default="erpti.db", help="caminho do banco do ERP TI")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sync_parser = commands.add_parser(
+        "sync-legacy",
+        help="sincroniza chamados novos ou alterados do helpdesk antigo",
+    )
+    sync_parser.add_argument("legacy_db", help="banco SQLite do helpdesk antigo")
+    sync_parser.add_argument("--chunk-size", type=int, default=5000)
+    sync_parser.set_defaults(handler=_sync_legacy)
+
+    hash_parser = commands.add_parser(
+        "hash-passwords",
+        help="converte senhas legadas em texto puro para PBKDF2 usando todos os nucleos",
+    )
+    hash_parser.add_argument("--workers", type=int, default=None)
+    hash_parser.set_defaults(handler=_hash_passwords)
+
+    calibrate_parser = commands.add_parser(
+        "calibrate-password",
+        help="mede o PBKDF2 nesta maquina e grava o numero de iteracoes para o tempo alvo",
+    )
+    calibrate_parser.add_argument(
+        "--budget-ms",
+        type=int,
+        default=DatabaseManager.PASSWORD_TIME_BUDGET_MS,
+    )
+    calibrate_parser.set_defaults(handler=_calibrate_password)
+
+    import_attachments_parser = commands.add_parser(
+        "import-attachments",
+        help="copia para o repositorio de anexos os arquivos locais citados em chamados e mensagens",
+    )
+    import_attachments_parser.set_defaults(handler=_import_attachments)
+
+    scan_attachments_parser = commands.add_parser(
+        "scan-attachments",
+        help="confere o SHA-256 de todos os anexos do repositorio",
+    )
+    scan_attachments_parser.add_argument(
+        "--older-than-days",
+        type=int,
+        default=None,
+        help="so anexos nunca verificados ou verificados ha mais de N dias",
+    )
+    scan_attachments_parser.set_defaults(handler=_scan_attachments)
+
+    backup_parser = commands.add_parser(
+        "backup",
+        help="copia o banco em uso para um snapshot, em passos curtos, sem bloquear os usuarios",
+    )
+    backup_parser.add_argument("--dir", default=None, help="pasta dos snapshots")
+    backup_parser.add_argument("--compression", choices=["none", "gz", "xz"], default="gz")
+    backup_parser.add_argument("--keep", type=int, default=KEEP_SNAPSHOTS)
+    backup_parser.add_argument("--pages-per-step", type=int, default=PAGES_PER_STEP)
+    backup_parser.set_defaults(handler=_backup)
+
+    verify_backup_parser = commands.add_parser(
+        "verify-backup",
+        help="roda PRAGMA integrity_check nos snapshots",
+    )
+    verify_backup_parser.add_argument("snapshot", nargs="?", default=None)
+    verify_backup_parser.add_argument("--dir", default=None, help="pasta dos snapshots")
+    verify_backup_parser.set_defaults(handler=_verify_backup)
+
+    restore_parser = commands.add_parser(
+        "restore-backup",
+        help="verifica um snapshot e o restaura sobre o banco em uso",
+    )
+    restore_parser.add_argument("snapshot")
+    restore_parser.set_defaults(handler=_restore_backup)
+
+    stats_parser = commands.add_parser(
+        "rebuild-stats",
+        help="recalcula stats_summary (indicadores do painel) a partir das tabelas",
+    )
+    stats_parser.set_defaults(handler=_rebuild_stats)
+
+    archive_parser = commands.add_parser(
+        "archive-chamados",
+        help="move chamados fechados ha mais de N dias, com mensagens, para o banco de arquivo",
+    )
+    archive_parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS)
+    archive_parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH)
+    archive_parser.add_argument(
+        "--no-backup",
+        action="store_true",
+        help="nao faz o backup dos dois bancos antes de mover os chamados",
+    )
+    archive_parser.set_defaults(handler=_archive_chamados)
+
+    prune_parser = commands.add_parser(
+        "prune-change-log",
+        help="apaga do change_log as entradas antigas, mantendo as N mais recentes",
+    )
+    prune_parser.add_argument("--keep", type=int, default=DatabaseManager.CHANGE_LOG_KEEP)
+    prune_parser.set_defaults(handler=_prune_change_log)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    db = DatabaseManager(args.db)
+    try:
+        db.initialize(DEFAULT_ACCESS_FOLDERS)
+        return args.handler(db, args)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,780 @@
+import logging
+import sqlite3
+import time
+from typing import TYPE_CHECKING, Callable, NamedTuple
+
+from erpti.values import TYPED_COLUMNS
+
+if TYPE_CHECKING:
+    from erpti.database import DatabaseManager
+
+
+logger = logging.getLogger(__name__)
+
+
+class MigrationContext(NamedTuple):
+    db: "DatabaseManager"
+    cursor: sqlite3.Cursor
+    default_access_folders: list[str]
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[MigrationContext], None]
+
+
+def _0001_baseline_schema(ctx: MigrationContext) -> None:
+    # Bancos criados antes do controle de versao podem estar em qualquer estado
+    # anterior, por isso esta etapa continua idempotente.
+    cursor = ctx.cursor
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            departamento TEXT NOT NULL,
+            nome TEXT NOT NULL,
+            cargo TEXT NOT NULL DEFAULT '',
+            perfil TEXT NOT NULL DEFAULT '',
+            username TEXT NOT NULL DEFAULT '',
+            senha TEXT NOT NULL DEFAULT '',
+            telefone TEXT NOT NULL,
+            ramal TEXT NOT NULL,
+            email TEXT NOT NULL
+        )
+        """
+    )
+    user_columns = {row[1] for row in cursor.execute("PRAGMA table_info(users)").fetchall()}
+    if "perfil" not in user_columns:
+        cursor.execute("ALTER TABLE users ADD COLUMN perfil TEXT NOT NULL DEFAULT ''")
+    if "cargo" not in user_columns:
+        cursor.execute("ALTER TABLE users ADD COLUMN cargo TEXT NOT NULL DEFAULT ''")
+    if "username" not in user_columns:
+        cursor.execute("ALTER TABLE users ADD COLUMN username TEXT NOT NULL DEFAULT ''")
+    if "senha" not in user_columns:
+        cursor.execute("ALTER TABLE users ADD COLUMN senha TEXT NOT NULL DEFAULT ''")
+    if "senha_hash" not in user_columns:
+        cursor.execute("ALTER TABLE users ADD COLUMN senha_hash TEXT NOT NULL DEFAULT ''")
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS access_folders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL UNIQUE
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS user_groups (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL UNIQUE
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS user_group_members (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            group_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            UNIQUE(group_id, user_id),
+            FOREIGN KEY(group_id) REFERENCES user_groups(id),
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS equipments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            id_interno TEXT NOT NULL,
+            patrimonio TEXT NOT NULL,
+            selo_patrimonio TEXT NOT NULL,
+            equipamento TEXT NOT NULL,
+            modelo TEXT NOT NULL,
+            marca TEXT NOT NULL,
+            serie TEXT NOT NULL,
+            mem TEXT NOT NULL,
+            processador TEXT NOT NULL,
+            geracao TEXT NOT NULL,
+            hd TEXT NOT NULL,
+            mod_hd TEXT NOT NULL
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ips (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ip TEXT NOT NULL,
+            nome TEXT NOT NULL,
+            fabricante TEXT NOT NULL,
+            endereco_mac TEXT NOT NULL
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS emails (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nro TEXT NOT NULL,
+            nome TEXT NOT NULL,
+            sobrenome TEXT NOT NULL,
+            email TEXT NOT NULL,
+            grupo TEXT NOT NULL,
+            situacao TEXT NOT NULL
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ramais (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nro TEXT NOT NULL,
+            nome TEXT NOT NULL,
+            sobrenome TEXT NOT NULL,
+            email TEXT NOT NULL,
+            grupo TEXT NOT NULL,
+            situacao TEXT NOT NULL
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS softwares (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            computador TEXT NOT NULL,
+            setor TEXT NOT NULL,
+            serial TEXT NOT NULL,
+            conta TEXT NOT NULL
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS insumos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            insumo TEXT NOT NULL,
+            data TEXT NOT NULL,
+            qtd TEXT NOT NULL,
+            nome TEXT NOT NULL,
+            departamento TEXT NOT NULL
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS requisicoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            solicitacao TEXT NOT NULL,
+            qtd TEXT NOT NULL,
+            valor TEXT NOT NULL,
+            total TEXT NOT NULL,
+            requisitado TEXT NOT NULL,
+            aprovado TEXT NOT NULL,
+            recebido TEXT NOT NULL,
+            nf TEXT NOT NULL,
+            tipo TEXT NOT NULL,
+            fornecedor TEXT NOT NULL,
+            link TEXT NOT NULL
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS emprestimos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            equipamento TEXT NOT NULL,
+            documento TEXT NOT NULL,
+            arquivo TEXT NOT NULL,
+            situacao TEXT NOT NULL,
+            data TEXT NOT NULL
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS chamados (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            titulo TEXT NOT NULL,
+            descricao TEXT NOT NULL,
+            autor TEXT NOT NULL DEFAULT '',
+            tipo TEXT NOT NULL DEFAULT '',
+            urgencia TEXT NOT NULL DEFAULT '',
+            arquivo TEXT NOT NULL DEFAULT '',
+            responsavel TEXT NOT NULL DEFAULT '',
+            status TEXT NOT NULL
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS chamado_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chamado_id INTEGER NOT NULL,
+            canal TEXT NOT NULL,
+            autor TEXT NOT NULL,
+            mensagem TEXT NOT NULL,
+            arquivo TEXT NOT NULL DEFAULT '',
+            criado_em TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(chamado_id) REFERENCES chamados(id)
+        )
+        """
+    )
+    chamado_columns = {
+        row[1] for row in cursor.execute("PRAGMA table_info(chamados)").fetchall()
+    }
+    if "autor" not in chamado_columns:
+        cursor.execute("ALTER TABLE chamados ADD COLUMN autor TEXT NOT NULL DEFAULT ''")
+    if "tipo" not in chamado_columns:
+        cursor.execute("ALTER TABLE chamados ADD COLUMN tipo TEXT NOT NULL DEFAULT ''")
+    if "urgencia" not in chamado_columns:
+        cursor.execute("ALTER TABLE chamados ADD COLUMN urgencia TEXT NOT NULL DEFAULT ''")
+    if "arquivo" not in chamado_columns:
+        cursor.execute("ALTER TABLE chamados ADD COLUMN arquivo TEXT NOT NULL DEFAULT ''")
+    if "responsavel" not in chamado_columns:
+        cursor.execute("ALTER TABLE chamados ADD COLUMN responsavel TEXT NOT NULL DEFAULT ''")
+    if "legacy_source" not in chamado_columns:
+        cursor.execute(
+            "ALTER TABLE chamados ADD COLUMN legacy_source TEXT NOT NULL DEFAULT ''"
+        )
+    if "legacy_id" not in chamado_columns:
+        cursor.execute("ALTER TABLE chamados ADD COLUMN legacy_id INTEGER DEFAULT NULL")
+
+
+def _0002_seed_access_folders(ctx: MigrationContext) -> None:
+    has_access_rows = ctx.cursor.execute("SELECT COUNT(*) FROM access_folders").fetchone()[0]
+    if has_access_rows == 0:
+        ctx.cursor.executemany(
+            "INSERT INTO access_folders (nome) VALUES (?)",
+            [(folder,) for folder in ctx.default_access_folders],
+        )
+
+
+def _0003_hash_plaintext_passwords(ctx: MigrationContext) -> None:
+    ctx.db._migrate_plaintext_passwords(ctx.cursor.connection)
+
+
+def _0004_lookup_indexes(ctx: MigrationContext) -> None:
+    cursor = ctx.cursor
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_users_username_lower ON users(LOWER(username))"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_access_folders_nome_lower ON access_folders(LOWER(nome))"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_user_groups_nome_lower ON user_groups(LOWER(nome))"
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_user_group_members_user
+        ON user_group_members(user_id, group_id)
+        """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_chamados_legacy
+        ON chamados(legacy_source, legacy_id)
+        """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_chamado_messages_chamado_canal
+        ON chamado_messages(chamado_id, canal, id)
+        """
+    )
+
+
+def _0005_legacy_sync_state(ctx: MigrationContext) -> None:
+    cursor = ctx.cursor
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS legacy_sync_state (
+            source TEXT PRIMARY KEY,
+            max_legacy_id INTEGER NOT NULL,
+            synced_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS legacy_sync_tickets (
+            source TEXT NOT NULL,
+            legacy_id INTEGER NOT NULL,
+            checksum TEXT NOT NULL,
+            PRIMARY KEY (source, legacy_id)
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def _0006_password_cost(ctx: MigrationContext) -> None:
+    ctx.cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS password_cost (
+            host TEXT PRIMARY KEY,
+            iterations INTEGER NOT NULL,
+            budget_ms INTEGER NOT NULL,
+            calibrated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+
+def _0007_chamados_fts(ctx: MigrationContext) -> None:
+    cursor = ctx.cursor
+    cursor.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS chamados_fts USING fts5(
+            titulo,
+            descricao,
+            content='chamados',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS chamado_messages_fts USING fts5(
+            mensagem,
+            content='chamado_messages',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS chamados_fts_ai AFTER INSERT ON chamados BEGIN
+            INSERT INTO chamados_fts (rowid, titulo, descricao)
+            VALUES (new.id, new.titulo, new.descricao);
+        END
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS chamados_fts_ad AFTER DELETE ON chamados BEGIN
+            INSERT INTO chamados_fts (chamados_fts, rowid, titulo, descricao)
+            VALUES ('delete', old.id, old.titulo, old.descricao);
+        END
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS chamados_fts_au AFTER UPDATE OF titulo, descricao ON chamados BEGIN
+            INSERT INTO chamados_fts (chamados_fts, rowid, titulo, descricao)
+            VALUES ('delete', old.id, old.titulo, old.descricao);
+            INSERT INTO chamados_fts (rowid, titulo, descricao)
+            VALUES (new.id, new.titulo, new.descricao);
+        END
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS chamado_messages_fts_ai AFTER INSERT ON chamado_messages BEGIN
+            INSERT INTO chamado_messages_fts (rowid, mensagem) VALUES (new.id, new.mensagem);
+        END
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS chamado_messages_fts_ad AFTER DELETE ON chamado_messages BEGIN
+            INSERT INTO chamado_messages_fts (chamado_messages_fts, rowid, mensagem)
+            VALUES ('delete', old.id, old.mensagem);
+        END
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS chamado_messages_fts_au
+        AFTER UPDATE OF mensagem ON chamado_messages BEGIN
+            INSERT INTO chamado_messages_fts (chamado_messages_fts, rowid, mensagem)
+            VALUES ('delete', old.id, old.mensagem);
+            INSERT INTO chamado_messages_fts (rowid, mensagem) VALUES (new.id, new.mensagem);
+        END
+        """
+    )
+    cursor.execute("INSERT INTO chamados_fts (chamados_fts) VALUES ('rebuild')")
+    cursor.execute("INSERT INTO chamado_messages_fts (chamado_messages_fts) VALUES ('rebuild')")
+
+
+CHANGE_LOG_TABLES = (
+    "users",
+    "access_folders",
+    "user_groups",
+    "user_group_members",
+    "equipments",
+    "ips",
+    "emails",
+    "ramais",
+    "softwares",
+    "insumos",
+    "requisicoes",
+    "emprestimos",
+    "chamados",
+    "chamado_messages",
+)
+
+
+def _0008_change_log(ctx: MigrationContext) -> None:
+    cursor = ctx.cursor
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            op TEXT NOT NULL
+        )
+        """
+    )
+    for table in CHANGE_LOG_TABLES:
+        for suffix, event, op, row in (
+            ("ai", "INSERT", "I", "new"),
+            ("au", "UPDATE", "U", "new"),
+            ("ad", "DELETE", "D", "old"),
+        ):
+            cursor.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS change_log_{table}_{suffix}
+                AFTER {event} ON {table} BEGIN
+                    INSERT INTO change_log (table_name, row_id, op)
+                    VALUES ('{table}', {row}.id, '{op}');
+                END
+                """
+            )
+
+
+def _0009_attachments(ctx: MigrationContext) -> None:
+    ctx.cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS attachments (
+            sha256 TEXT PRIMARY KEY,
+            nome TEXT NOT NULL,
+            tamanho INTEGER NOT NULL,
+            criado_em TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            verificado_em TEXT,
+            integro INTEGER NOT NULL DEFAULT 1
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def _0010_query_indexes(ctx: MigrationContext) -> None:
+    # Mesma colacao que query_rows usa para ordenar e filtrar colunas de texto.
+    cursor = ctx.cursor
+    for table, column in (
+        ("users", "nome"),
+        ("users", "cargo"),
+        ("users", "departamento"),
+        ("chamados", "status"),
+    ):
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_{column}_nocase ON {table}({column} COLLATE NOCASE)"
+        )
+
+
+class StatsMetric(NamedTuple):
+    table: str
+    columns: tuple[str, ...]
+    key: str
+    value: str
+    condition: str
+
+
+# metrica -> como cada linha da tabela contribui. {row} vira new/old nos triggers
+# e o nome da tabela no recalculo completo.
+STATS_METRICS = {
+    "chamados_status": StatsMetric(
+        "chamados", ("status",), "LOWER(TRIM({row}.status))", "1", "1"
+    ),
+    # Mesmos status finais de CLOSED_STATUSES no app.
+    "chamados_abertos_responsavel": StatsMetric(
+        "chamados",
+        ("status", "responsavel"),
+        "TRIM({row}.responsavel)",
+        "1",
+        "LOWER(TRIM({row}.status)) NOT IN ('fechado', 'finalizado', 'resolved')",
+    ),
+    "equipments_marca": StatsMetric("equipments", ("marca",), "TRIM({row}.marca)", "1", "1"),
+    # Mesma quantidade das colunas tipadas ("1.000" e mil, "2,5" fica de fora).
+    "insumos_departamento": StatsMetric(
+        "insumos",
+        ("departamento", "quantidade"),
+        "{row}.departamento",
+        "COALESCE({row}.quantidade, 0)",
+        "1",
+    ),
+    "emprestimos_situacao": StatsMetric(
+        "emprestimos", ("situacao",), "LOWER(TRIM({row}.situacao))", "1", "1"
+    ),
+    "requisicoes_aprovado": StatsMetric(
+        "requisicoes", ("aprovado",), "LOWER(TRIM({row}.aprovado))", "1", "1"
+    ),
+}
+
+
+# Definicao da migracao 11, antes de existir insumos.quantidade; a migracao 16 a substitui.
+_INSUMOS_DEPARTAMENTO_TEXT = StatsMetric(
+    "insumos",
+    ("departamento", "qtd"),
+    "{row}.departamento",
+    "CAST({row}.qtd AS INTEGER)",
+    "1",
+)
+
+
+def rebuild_stats(cursor: sqlite3.Cursor, metrics: dict[str, StatsMetric] = STATS_METRICS) -> None:
+    cursor.execute("DELETE FROM stats_summary")
+    for metric, spec in metrics.items():
+        cursor.execute(
+            f"""
+            INSERT INTO stats_summary (metrica, chave, valor)
+            SELECT ?, {spec.key.format(row=spec.table)}, SUM({spec.value.format(row=spec.table)})
+            FROM {spec.table}
+            WHERE {spec.condition.format(row=spec.table)}
+            GROUP BY 2
+            """,
+            (metric,),
+        )
+
+
+def _0011_stats_summary(ctx: MigrationContext) -> None:
+    cursor = ctx.cursor
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS stats_summary (
+            metrica TEXT NOT NULL,
+            chave TEXT NOT NULL,
+            valor INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (metrica, chave)
+        ) WITHOUT ROWID
+        """
+    )
+    metrics = {**STATS_METRICS, "insumos_departamento": _INSUMOS_DEPARTAMENTO_TEXT}
+    _create_stats_triggers(cursor, metrics)
+    rebuild_stats(cursor, metrics)
+
+
+def _create_stats_triggers(cursor: sqlite3.Cursor, metrics: dict[str, StatsMetric]) -> None:
+    for metric, spec in metrics.items():
+        for suffix, event, row, sign in (
+            ("ai", f"INSERT ON {spec.table}", "new", "+"),
+            ("ad", f"DELETE ON {spec.table}", "old", "-"),
+            ("au_old", f"UPDATE OF {', '.join(spec.columns)} ON {spec.table}", "old", "-"),
+            ("au_new", f"UPDATE OF {', '.join(spec.columns)} ON {spec.table}", "new", "+"),
+        ):
+            cursor.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS stats_{metric}_{suffix}
+                AFTER {event}
+                WHEN {spec.condition.format(row=row)} BEGIN
+                    INSERT INTO stats_summary (metrica, chave, valor)
+                    VALUES ('{metric}', {spec.key.format(row=row)}, {sign}{spec.value.format(row=row)})
+                    ON CONFLICT (metrica, chave) DO UPDATE SET valor = valor + excluded.valor;
+                END
+                """
+            )
+
+
+def _0012_typed_columns(ctx: MigrationContext) -> None:
+    # So o esquema: o preenchimento das linhas existentes e feito em lotes por
+    # DatabaseManager.backfill_typed_columns, fora da transacao das migracoes.
+    cursor = ctx.cursor
+    for table, typed in TYPED_COLUMNS.items():
+        existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})").fetchall()}
+        for column in typed:
+            if column.name not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column.name} {column.sql_type}")
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS typed_backfill_state (
+            tabela TEXT PRIMARY KEY,
+            ultimo_id INTEGER NOT NULL
+        )
+        """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_requisicoes_requisitado_em
+        ON requisicoes(requisitado_em, total_centavos, quantidade)
+        """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_insumos_data_em
+        ON insumos(data_em, departamento, quantidade)
+        """
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_emprestimos_data_em ON emprestimos(data_em)")
+
+
+# Mesmos status finais de CLOSED_STATUSES no app.
+CLOSED_STATUS_SQL = "('fechado', 'finalizado', 'resolved')"
+
+
+def _0013_chamados_fechado_em(ctx: MigrationContext) -> None:
+    # fechado_em diz ha quanto tempo o chamado esta fechado; e o criterio do
+    # arquivamento (DatabaseManager.archive_closed_chamados).
+    cursor = ctx.cursor
+    existing = {row[1] for row in cursor.execute("PRAGMA table_info(chamados)").fetchall()}
+    if "fechado_em" not in existing:
+        cursor.execute("ALTER TABLE chamados ADD COLUMN fechado_em TEXT")
+    # Sem registro da data real: a ultima mensagem do chamado e a melhor estimativa.
+    cursor.execute(
+        f"""
+        UPDATE chamados
+        SET fechado_em = COALESCE(
+            (SELECT MAX(m.criado_em) FROM chamado_messages m WHERE m.chamado_id = chamados.id),
+            CURRENT_TIMESTAMP
+        )
+        WHERE LOWER(TRIM(status)) IN {CLOSED_STATUS_SQL} AND fechado_em IS NULL
+        """
+    )
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS chamados_fechado_em_ai AFTER INSERT ON chamados
+        WHEN LOWER(TRIM(new.status)) IN {CLOSED_STATUS_SQL} AND new.fechado_em IS NULL BEGIN
+            UPDATE chamados SET fechado_em = CURRENT_TIMESTAMP WHERE id = new.id;
+        END
+        """
+    )
+    cursor.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS chamados_fechado_em_au AFTER UPDATE OF status ON chamados
+        WHEN (LOWER(TRIM(new.status)) IN {CLOSED_STATUS_SQL})
+            <> (LOWER(TRIM(old.status)) IN {CLOSED_STATUS_SQL}) BEGIN
+            UPDATE chamados
+            SET fechado_em = CASE
+                WHEN LOWER(TRIM(new.status)) IN {CLOSED_STATUS_SQL} THEN CURRENT_TIMESTAMP
+            END
+            WHERE id = new.id;
+        END
+        """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_chamados_fechado_em
+        ON chamados(fechado_em) WHERE fechado_em IS NOT NULL
+        """
+    )
+    # Chamados do sistema antigo ja arquivados: a importacao nao deve traze-los de volta.
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS legacy_arquivados (
+            source TEXT NOT NULL,
+            legacy_id INTEGER NOT NULL,
+            PRIMARY KEY (source, legacy_id)
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def _0014_recompute_cents(ctx: MigrationContext) -> None:
+    # parse_cents passou a arredondar com Decimal; a proxima passada de
+    # backfill_typed_columns regrava so as linhas cujo valor mudou.
+    ctx.cursor.execute("DELETE FROM typed_backfill_state WHERE tabela = 'requisicoes'")
+
+
+
+def _0015_recompute_thousands(ctx: MigrationContext) -> None:
+    # "1.500" sem virgula passou a ser milhar (antes virava 1,50 e quantidade 1).
+    ctx.cursor.execute("DELETE FROM typed_backfill_state WHERE tabela IN ('requisicoes', 'insumos')")
+
+
+
+def _0016_insumos_stats_quantidade(ctx: MigrationContext) -> None:
+    # O indicador passa a somar a coluna tipada. Linhas ainda sem quantidade contam 0
+    # e entram pelo trigger de update quando backfill_typed_columns as preenche.
+    cursor = ctx.cursor
+    for suffix in ("ai", "ad", "au_old", "au_new"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS stats_insumos_departamento_{suffix}")
+    _create_stats_triggers(cursor, {"insumos_departamento": STATS_METRICS["insumos_departamento"]})
+    rebuild_stats(cursor)
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(1, "baseline_schema", _0001_baseline_schema),
+    Migration(2, "seed_access_folders", _0002_seed_access_folders),
+    Migration(3, "hash_plaintext_passwords", _0003_hash_plaintext_passwords),
+    Migration(4, "lookup_indexes", _0004_lookup_indexes),
+    Migration(5, "legacy_sync_state", _0005_legacy_sync_state),
+    Migration(6, "password_cost", _0006_password_cost),
+    Migration(7, "chamados_fts", _0007_chamados_fts),
+    Migration(8, "change_log", _0008_change_log),
+    Migration(9, "attachments", _0009_attachments),
+    Migration(10, "query_indexes", _0010_query_indexes),
+    Migration(11, "stats_summary", _0011_stats_summary),
+    Migration(12, "typed_columns", _0012_typed_columns),
+    Migration(13, "chamados_fechado_em", _0013_chamados_fechado_em),
+    Migration(14, "recompute_cents", _0014_recompute_cents),
+    Migration(15, "recompute_thousands", _0015_recompute_thousands),
+    Migration(16, "insumos_stats_quantidade", _0016_insumos_stats_quantidade),
+]
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    try:
+        row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return int(row[0] or 0)
+
+
+def apply_pending(
+    db: "DatabaseManager",
+    conn: sqlite3.Connection,
+    default_access_folders: list[str],
+) -> list[int]:
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                duration_ms REAL NOT NULL DEFAULT 0
+            )
+            """
+        )
+        # Outro cliente pode ter migrado enquanto esperavamos pelo lock.
+        version = current_version(conn)
+        ctx = MigrationContext(db, cursor, default_access_folders)
+        applied = []
+        for migration in MIGRATIONS:
+            if migration.version <= version:
+                continue
+            step_started = time.perf_counter()
+            migration.apply(ctx)
+            duration_ms = (time.perf_counter() - step_started) * 1000
+            cursor.execute(
+                "INSERT INTO schema_version (version, name, duration_ms) VALUES (?, ?, ?)",
+                (migration.version, migration.name, duration_ms),
+            )
+            logger.info(
+                "Migracao %04d_%s aplicada em %.1f ms",
+                migration.version,
+                migration.name,
+                duration_ms,
+            )
+            applied.append(migration.version)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    if applied:
+        logger.info(
+            "Schema atualizado de %d para %d em %.1f ms",
+            version,
+            SCHEMA_VERSION,
+            (time.perf_counter() - started) * 1000,
+        )
+    return applied
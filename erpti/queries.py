@@ -0,0 +1,269 @@
+from functools import lru_cache
+from typing import NamedTuple
+
+from erpti.values import TYPED_COLUMNS
+
+
+def _typed(table: str) -> set[str]:
+    return {column.name for column in TYPED_COLUMNS.get(table, ())}
+
+
+# Colunas que podem aparecer em filtros, ORDER BY e SELECT de query_rows.
+# senha e senha_hash ficam de fora de proposito.
+QUERY_COLUMNS: dict[str, frozenset[str]] = {
+    "users": frozenset(
+        {"id", "departamento", "nome", "cargo", "perfil", "username", "telefone", "ramal", "email"}
+    ),
+    "equipments": frozenset(
+        {
+            "id",
+            "id_interno",
+            "patrimonio",
+            "selo_patrimonio",
+            "equipamento",
+            "modelo",
+            "marca",
+            "serie",
+            "mem",
+            "processador",
+            "geracao",
+            "hd",
+            "mod_hd",
+        }
+    ),
+    "ips": frozenset({"id", "ip", "nome", "fabricante", "endereco_mac"}),
+    "emails": frozenset({"id", "nro", "nome", "sobrenome", "email", "grupo", "situacao"}),
+    "ramais": frozenset({"id", "nro", "nome", "sobrenome", "email", "grupo", "situacao"}),
+    "softwares": frozenset({"id", "nome", "computador", "setor", "serial", "conta"}),
+    "insumos": frozenset({"id", "insumo", "data", "qtd", "nome", "departamento"} | _typed("insumos")),
+    "requisicoes": frozenset(
+        {
+            "id",
+            "solicitacao",
+            "qtd",
+            "valor",
+            "total",
+            "requisitado",
+            "aprovado",
+            "recebido",
+            "nf",
+            "tipo",
+            "fornecedor",
+            "link",
+        }
+        | _typed("requisicoes")
+    ),
+    "emprestimos": frozenset(
+        {"id", "nome", "equipamento", "documento", "arquivo", "situacao", "data"} | _typed("emprestimos")
+    ),
+    "chamados": frozenset(
+        {
+            "id",
+            "titulo",
+            "descricao",
+            "autor",
+            "tipo",
+            "urgencia",
+            "arquivo",
+            "responsavel",
+            "status",
+            "legacy_source",
+            "legacy_id",
+        }
+    ),
+}
+# Numeros e datas ISO comparam sem colacao (como nos seus indices); as demais
+# colunas, como texto sem diferenciar maiusculas (COLLATE NOCASE).
+BINARY_COLUMNS = frozenset(
+    {"id", "legacy_id"} | {column.name for typed in TYPED_COLUMNS.values() for column in typed}
+)
+# Podem ser NULL: o cursor de paginacao precisa tratar o bloco de NULLs a parte.
+NULLABLE_COLUMNS = frozenset(
+    {"legacy_id"} | {column.name for typed in TYPED_COLUMNS.values() for column in typed}
+)
+FILTER_OPS = frozenset({"eq", "prefix", "range", "in"})
+# Maior caractere valido: limite superior da faixa usada no filtro por prefixo.
+PREFIX_END = "\U0010ffff"
+# NOCASE do SQLite so ignora maiusculas no ASCII.
+_ASCII_FOLD = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+class Filter(NamedTuple):
+    column: str
+    op: str
+    value: object
+
+
+def _term(column: str) -> str:
+    return column if column in BINARY_COLUMNS else f"{column} COLLATE NOCASE"
+
+
+def _in_arity(count: int) -> int:
+    # Listas IN sao completadas ate a proxima potencia de 2 para o texto da
+    # consulta se repetir e o cache de statements do sqlite3 ser aproveitado.
+    arity = 1
+    while arity < count:
+        arity *= 2
+    return arity
+
+
+def order_key(column: str, value: object) -> tuple[int, object]:
+    # Mesma ordem do ORDER BY de select_sql, para juntar paginas de bancos diferentes:
+    # NULL, numeros, texto (binario ou NOCASE), blobs.
+    if value is None:
+        return (0, 0)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value if column in BINARY_COLUMNS else value.translate(_ASCII_FOLD))
+    return (3, value)
+
+
+def validate(table: str, columns: tuple[str, ...], filters: tuple[Filter, ...], order_by: str) -> None:
+    allowed = QUERY_COLUMNS.get(table)
+    if allowed is None:
+        raise ValueError(f"Tabela nao permitida em consultas: {table}")
+    unknown = [
+        column
+        for column in (*columns, *(item.column for item in filters), order_by)
+        if column not in allowed
+    ]
+    if unknown:
+        raise ValueError(f"Colunas nao permitidas em {table}: {', '.join(sorted(set(unknown)))}")
+    for item in filters:
+        if item.op not in FILTER_OPS:
+            raise ValueError(f"Filtro invalido: {item.op}")
+        if item.op == "in" and not item.value:
+            raise ValueError(f"Filtro IN vazio em {item.column}")
+        if item.op == "range" and (not isinstance(item.value, tuple) or len(item.value) != 2):
+            raise ValueError(f"Filtro range em {item.column} espera (minimo, maximo)")
+
+
+@lru_cache(maxsize=256)
+def select_sql(
+    table: str,
+    columns: tuple[str, ...],
+    filter_shape: tuple[tuple[str, str, object], ...],
+    order_by: str,
+    descending: bool,
+    keyset: str,
+    limited: bool,
+    offset: bool,
+    schema: str = "main",
+) -> str:
+    where = []
+    for column, op, shape in filter_shape:
+        term = _term(column)
+        if op == "eq":
+            where.append(f"{term} = ?")
+        elif op == "prefix":
+            where.append(f"{term} >= ? AND {term} < ?")
+        elif op == "range":
+            low, high = shape
+            if low:
+                where.append(f"{term} >= ?")
+            if high:
+                where.append(f"{term} <= ?")
+        else:
+            where.append(f"{term} IN ({', '.join(['?'] * shape)})")
+    direction = " DESC" if descending else ""
+    # Um ramo por faixa contigua do indice; com dois, o SQLite junta os ramos ja
+    # ordenados (MERGE) em vez de percorrer o indice filtrando um OR.
+    branches: list[list[str]] = [[]]
+    if order_by == "id":
+        order = f"id{direction}"
+        if keyset:
+            branches = [[f"id {'<' if descending else '>'} ?"]]
+    else:
+        order = f"{_term(order_by)}{direction}, id{direction}"
+        if keyset:
+            # Forma expandida de (coluna, id) > (?, ?): so assim o SQLite busca no indice.
+            term = _term(order_by)
+            strict = "<" if descending else ">"
+            after_value = f"{term} {strict}= ? AND ({term} {strict} ? OR id {strict} ?)"
+            # NULL vem antes de todos os valores (no fim, em ordem decrescente), e
+            # nenhuma comparacao com ? e verdadeira para ele.
+            if order_by not in NULLABLE_COLUMNS:
+                branches = [[after_value]]
+            elif keyset == "null" and descending:
+                branches = [[f"{order_by} IS NULL AND id < ?"]]
+            elif keyset == "null":
+                branches = [[f"{order_by} IS NULL AND id > ?"], [f"{order_by} IS NOT NULL"]]
+            elif descending:
+                branches = [[after_value], [f"{order_by} IS NULL"]]
+            else:
+                branches = [[after_value]]
+    source = table if schema == "main" else f"{schema}.{table}"
+    selects = []
+    for branch in branches:
+        select = f"SELECT id, {order_by}, {', '.join(columns)} FROM {source}"
+        if where or branch:
+            select += f" WHERE {' AND '.join(where + branch)}"
+        selects.append(select)
+    sql = " UNION ALL ".join(selects)
+    sql += f" ORDER BY {order}"
+    if limited:
+        sql += " LIMIT ?"
+        if offset:
+            sql += " OFFSET ?"
+    return sql
+
+
+def build_select(
+    table: str,
+    columns: tuple[str, ...],
+    filters: tuple[Filter, ...],
+    order_by: str,
+    descending: bool,
+    limit: int | None,
+    offset: int,
+    after: tuple[object, int] | None,
+    schema: str = "main",
+) -> tuple[str, list[object]]:
+    validate(table, columns, filters, order_by)
+    shape = []
+    parameters: list[object] = []
+    for item in filters:
+        if item.op == "eq":
+            shape.append((item.column, item.op, None))
+            parameters.append(item.value)
+        elif item.op == "prefix":
+            shape.append((item.column, item.op, None))
+            parameters.extend((item.value, f"{item.value}{PREFIX_END}"))
+        elif item.op == "range":
+            low, high = item.value
+            shape.append((item.column, item.op, (low is not None, high is not None)))
+            parameters.extend(value for value in (low, high) if value is not None)
+        else:
+            values = list(item.value)
+            arity = _in_arity(len(values))
+            shape.append((item.column, item.op, arity))
+            parameters.extend(values + [values[-1]] * (arity - len(values)))
+    keyset = ""
+    # Parametros do cursor em cada ramo de select_sql; os filtros se repetem por ramo.
+    branches: list[tuple[object, ...]] = [()]
+    if after is not None:
+        value, row_id = after
+        keyset = "null" if value is None and order_by in NULLABLE_COLUMNS else "value"
+        single = order_by == "id" or keyset == "null"
+        branches = [(row_id,) if single else (value, value, row_id)]
+        if order_by in NULLABLE_COLUMNS and (keyset == "null") != descending:
+            branches.append(())
+    parameters = [parameter for branch in branches for parameter in (*parameters, *branch)]
+    limited = limit is not None
+    if limited:
+        parameters.append(limit)
+        if offset:
+            parameters.append(offset)
+    sql = select_sql(
+        table,
+        columns,
+        tuple(shape),
+        order_by,
+        descending,
+        keyset,
+        limited,
+        limited and bool(offset),
+        schema,
+    )
+    return sql, parameters
@@ -0,0 +1,94 @@
+import sys
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Iterable, Iterator
+
+
+# Colunas com poucos valores distintos (departamento, marca, status...): cada
+# valor vira uma unica string compartilhada por todas as linhas.
+INTERNED_COLUMNS = frozenset(
+    {
+        "departamento",
+        "cargo",
+        "perfil",
+        "equipamento",
+        "modelo",
+        "marca",
+        "mem",
+        "processador",
+        "geracao",
+        "hd",
+        "mod_hd",
+        "fabricante",
+        "grupo",
+        "situacao",
+        "setor",
+        "computador",
+        "insumo",
+        "tipo",
+        "fornecedor",
+        "autor",
+        "urgencia",
+        "responsavel",
+        "status",
+        "legacy_source",
+    }
+)
+
+
+class Record(Mapping):
+    __slots__ = ()
+    _fields: tuple[str, ...] = ()
+    _field_set: frozenset[str] = frozenset()
+    _interned: tuple[bool, ...] = ()
+
+    def __init__(self, values: Iterable[object]) -> None:
+        for name, intern, value in zip(self._fields, self._interned, values):
+            if intern and type(value) is str:
+                value = sys.intern(value)
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_mapping(cls, row: Mapping[str, object]) -> "Record":
+        return cls(row.get(name, "") for name in cls._fields)
+
+    def __getitem__(self, key: str) -> object:
+        if key not in self._field_set:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: object) -> None:
+        if key not in self._field_set:
+            raise KeyError(key)
+        index = self._fields.index(key)
+        if self._interned[index] and type(value) is str:
+            value = sys.intern(value)
+        object.__setattr__(self, key, value)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{type(self).__name__}({values})"
+
+
+@lru_cache(maxsize=None)
+def record_type(table: str, columns: tuple[str, ...]) -> type[Record]:
+    clashes = [name for name in columns if hasattr(Record, name) or not name.isidentifier()]
+    if clashes:
+        raise ValueError(f"Colunas invalidas para registro de {table}: {', '.join(clashes)}")
+    name = "".join(part.capitalize() for part in table.split("_")) + "Record"
+    return type(
+        name,
+        (Record,),
+        {
+            "__slots__": columns,
+            "_fields": columns,
+            "_field_set": frozenset(columns),
+            "_interned": tuple(column in INTERNED_COLUMNS for column in columns),
+        },
+    )
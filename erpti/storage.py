@@ -0,0 +1,111 @@
+import ctypes
+import logging
+import os
+import random
+import sqlite3
+from typing import Iterator, NamedTuple
+
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENV = "ERPTI_STORAGE_PROFILE"
+CHECKPOINT_MODES = frozenset({"PASSIVE", "FULL", "RESTART", "TRUNCATE"})
+DRIVE_REMOTE = 4
+
+
+class StorageProfile(NamedTuple):
+    journal_mode: str
+    synchronous: str
+    busy_timeout_ms: int
+    mmap_size: int
+    cache_size_kib: int
+    wal_autocheckpoint: int
+    checkpoint_interval_s: float
+    busy_retries: int
+    busy_backoff_s: float
+    busy_backoff_max_s: float
+
+
+# WAL: leitores nao esperam escritores. Exige que todos os clientes estejam na
+# mesma maquina ou num sistema de arquivos com memoria compartilhada confiavel.
+# Opcional: ERPTI_STORAGE_PROFILE=wal.
+WAL_PROFILE = StorageProfile(
+    journal_mode="wal",
+    synchronous="NORMAL",
+    busy_timeout_ms=5000,
+    mmap_size=256 * 1024 * 1024,
+    cache_size_kib=64 * 1024,
+    wal_autocheckpoint=4000,
+    checkpoint_interval_s=60.0,
+    busy_retries=5,
+    busy_backoff_s=0.05,
+    busy_backoff_max_s=2.0,
+)
+
+# Padrao: erpti.db fica numa pasta de rede (SMB) com varios clientes, onde WAL
+# nao e seguro.
+ROLLBACK_PROFILE = StorageProfile(
+    journal_mode="delete",
+    synchronous="FULL",
+    busy_timeout_ms=10000,
+    mmap_size=0,
+    cache_size_kib=16 * 1024,
+    wal_autocheckpoint=1000,
+    checkpoint_interval_s=0.0,
+    busy_retries=8,
+    busy_backoff_s=0.05,
+    busy_backoff_max_s=2.0,
+)
+
+PROFILES = {
+    "wal": WAL_PROFILE,
+    "rollback": ROLLBACK_PROFILE,
+}
+
+
+def is_network_path(path: str | os.PathLike) -> bool:
+    absolute = os.path.abspath(path)
+    if absolute.startswith(("\\\\", "//")):
+        return True
+    if os.name != "nt":
+        return False
+    drive = os.path.splitdrive(absolute)[0]
+    # Unidade mapeada (Z:) para um compartilhamento.
+    return bool(drive) and ctypes.windll.kernel32.GetDriveTypeW(f"{drive}\\") == DRIVE_REMOTE
+
+
+def profile_from_env(db_path: str | os.PathLike | None = None) -> StorageProfile:
+    name = os.environ.get(PROFILE_ENV, "rollback").strip().lower()
+    if name not in PROFILES:
+        logger.warning("Perfil de armazenamento desconhecido %r; usando rollback", name)
+        return ROLLBACK_PROFILE
+    profile = PROFILES[name]
+    if profile.journal_mode == "wal" and db_path is not None and is_network_path(db_path):
+        logger.warning("WAL nao e seguro em pasta de rede (%s); usando rollback", db_path)
+        return ROLLBACK_PROFILE
+    return profile
+
+
+def connection_pragmas(profile: StorageProfile) -> list[str]:
+    return [
+        f"PRAGMA busy_timeout = {int(profile.busy_timeout_ms)}",
+        f"PRAGMA synchronous = {profile.synchronous}",
+        f"PRAGMA mmap_size = {int(profile.mmap_size)}",
+        f"PRAGMA cache_size = {-int(profile.cache_size_kib)}",
+        f"PRAGMA wal_autocheckpoint = {int(profile.wal_autocheckpoint)}",
+    ]
+
+
+def is_busy(exc: sqlite3.Error) -> bool:
+    code = getattr(exc, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF in {sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED}
+    message = str(exc).lower()
+    return "locked" in message or "busy" in message
+
+
+def backoff_delays(profile: StorageProfile) -> Iterator[float]:
+    for attempt in range(profile.busy_retries):
+        ceiling = min(profile.busy_backoff_max_s, profile.busy_backoff_s * 2**attempt)
+        # Jitter para os clientes que bateram juntos nao voltarem juntos.
+        yield random.uniform(ceiling / 2, ceiling)
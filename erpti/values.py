@@ -0,0 +1,94 @@
+import re
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Callable, NamedTuple
+
+
+DATE_FORMATS = ("%d/%m/%Y", "%d/%m/%y", "%Y-%m-%d", "%d-%m-%Y", "%d.%m.%Y")
+_MONEY_NOISE = re.compile(r"[R$\s]")
+_THOUSANDS = re.compile(r"[+-]?[1-9]\d{0,2}(\.\d{3})+")
+
+
+def _decimal_text(value: str) -> str:
+    # "1.234,56" (planilhas e digitacao) e "1234.56" (dados antigos) aparecem juntos.
+    if "," in value:
+        return value.replace(".", "").replace(",", ".")
+    # Sem virgula, ponto seguido de grupos de 3 digitos e milhar: "1.500" e mil e quinhentos.
+    if _THOUSANDS.fullmatch(value):
+        return value.replace(".", "")
+    return value
+
+
+def parse_quantity(text: object) -> int | None:
+    value = str(text or "").strip()
+    if not value:
+        return None
+    try:
+        quantity = Decimal(_decimal_text(value))
+    except (InvalidOperation, ValueError):
+        return None
+    return int(quantity) if quantity.is_finite() and quantity == quantity.to_integral_value() else None
+
+
+def parse_cents(text: object) -> int | None:
+    value = _MONEY_NOISE.sub("", str(text or ""))
+    if not value:
+        return None
+    # Decimal: float arredondava errado ("1,005" virava 100 centavos).
+    try:
+        return int((Decimal(_decimal_text(value)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def parse_date(text: object) -> str | None:
+    value = str(text or "").strip()
+    if not value:
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def format_cents(cents: int) -> str:
+    # Mesmo formato que o usuario digita e as linhas antigas usam: "1.234,56".
+    return f"{Decimal(cents) / 100:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+def format_date(iso_date: str) -> str:
+    return date.fromisoformat(iso_date).strftime("%d/%m/%Y")
+
+
+class TypedColumn(NamedTuple):
+    name: str
+    source: str
+    sql_type: str
+    parse: Callable[[object], object]
+
+
+# tabela -> colunas tipadas derivadas das colunas de texto que o app grava.
+TYPED_COLUMNS: dict[str, tuple[TypedColumn, ...]] = {
+    "requisicoes": (
+        TypedColumn("quantidade", "qtd", "INTEGER", parse_quantity),
+        TypedColumn("valor_centavos", "valor", "INTEGER", parse_cents),
+        TypedColumn("total_centavos", "total", "INTEGER", parse_cents),
+        TypedColumn("requisitado_em", "requisitado", "TEXT", parse_date),
+        TypedColumn("recebido_em", "recebido", "TEXT", parse_date),
+    ),
+    "insumos": (
+        TypedColumn("quantidade", "qtd", "INTEGER", parse_quantity),
+        TypedColumn("data_em", "data", "TEXT", parse_date),
+    ),
+    "emprestimos": (TypedColumn("data_em", "data", "TEXT", parse_date),),
+}
+
+
+def typed_values(table: str, row: dict[str, object]) -> dict[str, object]:
+    return {
+        column.name: column.parse(row[column.source])
+        for column in TYPED_COLUMNS.get(table, ())
+        if column.source in row
+    }
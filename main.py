@@ -1,6 +1,9 @@
+from multiprocessing import freeze_support
+
 from erpti.app import ERPDesktopApp
 
 
 if __name__ == "__main__":
+    freeze_support()
     app = ERPDesktopApp()
     app.mainloop()
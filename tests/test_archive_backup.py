@@ -0,0 +1,45 @@
+import sqlite3
+from contextlib import closing
+
+from erpti.database import DEFAULT_ACCESS_FOLDERS, DatabaseManager
+
+
+def _closed_chamado(db, titulo):
+    chamado_id = db.insert_row(
+        "chamados",
+        {"titulo": titulo, "descricao": titulo, "status": "fechado"},
+    )
+    with db._connection() as conn:
+        conn.execute("UPDATE chamados SET fechado_em = '2020-01-01 00:00:00' WHERE id = ?", (chamado_id,))
+        conn.commit()
+    return chamado_id
+
+
+def _archived_ids(db):
+    with closing(sqlite3.connect(db.archive_path)) as conn:
+        return sorted(row[0] for row in conn.execute("SELECT id FROM chamados"))
+
+
+def test_backup_and_restore_carry_the_archive(tmp_path):
+    db = DatabaseManager(str(tmp_path / "erpti.db"))
+    try:
+        db.initialize(DEFAULT_ACCESS_FOLDERS)
+        first = _closed_chamado(db, "Rede")
+        assert db.archive_closed_chamados(30) == 1
+        second = _closed_chamado(db, "VPN")
+        assert db.archive_closed_chamados(30) == 1
+        assert _archived_ids(db) == [first, second]
+
+        # O segundo arquivamento fez backup dos dois bancos antes de mover o chamado.
+        snapshot = db.list_backups()[-1]
+        archive_snapshots = list(db.backup_dir.glob(f"{db.archive_path.stem}-*"))
+        assert [path.name for path in archive_snapshots] == [
+            snapshot.name.replace("erpti-", "erpti_archive-", 1)
+        ]
+
+        db.restore_backup(str(snapshot))
+        assert _archived_ids(db) == [first]
+        assert db.fetch_chamado(second)["arquivado"] is False
+        assert db.fetch_chamado(first)["arquivado"] is True
+    finally:
+        db.close()
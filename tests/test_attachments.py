@@ -0,0 +1,53 @@
+from concurrent.futures import Future
+
+from erpti.app import ERPDesktopApp
+from erpti.database import DEFAULT_ACCESS_FOLDERS, DatabaseManager
+
+
+def _verified(db):
+    with db._connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM attachments WHERE verificado_em IS NOT NULL").fetchone()[0]
+
+
+def test_background_scan_checks_one_batch_of_stale_attachments(tmp_path):
+    db = DatabaseManager(str(tmp_path / "erpti.db"))
+    try:
+        db.initialize(DEFAULT_ACCESS_FOLDERS)
+        for index in range(3):
+            path = tmp_path / f"anexo{index}.txt"
+            path.write_text(f"conteudo {index}")
+            db.store_attachment(str(path))
+
+        assert db.scan_attachments_async(limit=2).result() == []
+        assert _verified(db) == 2
+        db.scan_attachments_async(limit=2).result()
+        assert _verified(db) == 3
+        # Tudo conferido ha menos de ATTACHMENT_RESCAN_DAYS: nada a fazer.
+        calls = []
+        db.attachments.verify = lambda digest: calls.append(digest) or True
+        db.scan_attachments_async().result()
+        assert calls == []
+    finally:
+        db.close()
+
+
+def test_app_schedules_the_scan_without_overlapping(tmp_path):
+    db = DatabaseManager(str(tmp_path / "erpti.db"))
+    try:
+        db.initialize(DEFAULT_ACCESS_FOLDERS)
+        app = ERPDesktopApp.__new__(ERPDesktopApp)
+        app.__dict__["tk"] = object()
+        scheduled = []
+        app.after = lambda delay, callback: scheduled.append(callback)
+        app.db = db
+        running = app._attachment_scan = Future()
+        app._scan_attachments_in_background()
+        assert app._attachment_scan is running
+
+        running.set_result([])
+        app._scan_attachments_in_background()
+        assert app._attachment_scan is not running
+        app._attachment_scan.result()
+        assert scheduled == [app._scan_attachments_in_background] * 2
+    finally:
+        db.close()
@@ -0,0 +1,75 @@
+import gzip
+
+import pytest
+
+from erpti import backup
+from erpti.database import DEFAULT_ACCESS_FOLDERS, DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "erpti.db"))
+    db.initialize(DEFAULT_ACCESS_FOLDERS)
+    yield db
+    db.close()
+
+
+def _ip(nome):
+    return {"ip": "10.0.0.1", "nome": nome, "fabricante": "", "endereco_mac": ""}
+
+
+def _snapshot_of(db):
+    return (
+        [row["nome"] for row in db.fetch_rows("ips", ("nome",))],
+        [row["titulo"] for row in db.fetch_rows("chamados", ("titulo",))],
+    )
+
+
+@pytest.mark.parametrize("compression", sorted(backup.COMPRESSIONS))
+def test_backup_restore_round_trip(db, compression):
+    db.insert_rows("ips", [_ip(f"ip-{index}") for index in range(300)])
+    chamado_id = db.insert_chamado("Impressora travada", "", "Ana", "Incidente", "Alta", "", "pendente")
+    db.add_chamado_message(chamado_id, "publico", "Ana", "Papel preso", "")
+    expected = _snapshot_of(db)
+
+    steps = []
+    snapshot = db.create_backup(
+        compression=compression,
+        pages_per_step=1,
+        step_sleep=0,
+        progress=lambda done, total: steps.append((done, total)),
+    )
+    assert len(steps) > 1 and steps[-1][0] == steps[-1][1]
+    assert backup.verify_snapshot(snapshot) == []
+
+    db.insert_row("ips", _ip("depois"))
+    with db._connection() as conn:
+        conn.execute("DELETE FROM chamados WHERE id = ?", (chamado_id,))
+        conn.commit()
+    seq_before_restore = db.latest_change_seq()
+
+    db.restore_backup(str(snapshot))
+    assert _snapshot_of(db) == expected
+    assert [row["id"] for row in db.search_chamados("papel")] == [chamado_id]
+    # O historico nao volta no tempo: os clientes veem a restauracao como mudanca nova.
+    assert db.latest_change_seq() > seq_before_restore
+
+
+def test_rotation_keeps_the_newest_snapshots(db):
+    snapshots = [db.create_backup(keep=2, step_sleep=0) for _ in range(3)]
+    assert db.list_backups() == snapshots[1:]
+    assert not snapshots[0].exists()
+
+
+def test_corrupted_snapshot_is_refused_before_touching_the_database(db, tmp_path):
+    db.insert_row("ips", _ip("original"))
+    snapshot = db.create_backup(step_sleep=0)
+    data = bytearray(gzip.decompress(snapshot.read_bytes()))
+    # Estraga paginas de dados mantendo o cabecalho valido.
+    data[4096:] = b"\xff" * (len(data) - 4096)
+    snapshot.write_bytes(gzip.compress(bytes(data)))
+    db.insert_row("ips", _ip("novo"))
+
+    with pytest.raises(RuntimeError, match="corrompido"):
+        db.restore_backup(str(snapshot))
+    assert [row["nome"] for row in db.fetch_rows("ips", ("nome",))] == ["original", "novo"]
@@ -0,0 +1,50 @@
+import sqlite3
+import time
+from contextlib import closing
+
+import pytest
+
+from erpti import storage
+from erpti.database import DEFAULT_ACCESS_FOLDERS, DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    profile = storage.ROLLBACK_PROFILE._replace(busy_timeout_ms=300)
+    db = DatabaseManager(str(tmp_path / "erpti.db"), storage_profile=profile)
+    db.initialize(DEFAULT_ACCESS_FOLDERS)
+    yield db
+    db.close()
+
+
+def _ip():
+    return {"ip": "10.0.0.1", "nome": "A", "fabricante": "", "endereco_mac": ""}
+
+
+def test_busy_retries_share_one_deadline(db):
+    with closing(sqlite3.connect(db.db_path, isolation_level=None)) as other:
+        other.execute("BEGIN EXCLUSIVE")
+        started = time.monotonic()
+        with pytest.raises(sqlite3.OperationalError):
+            db.insert_row("ips", _ip())
+        elapsed = time.monotonic() - started
+        other.execute("ROLLBACK")
+    # busy_timeout_ms e o prazo total, nao o tempo de cada uma das busy_retries tentativas.
+    assert elapsed < 2 * db.storage.busy_timeout_ms / 1000
+    assert db.insert_row("ips", _ip()) > 0
+
+
+def test_set_user_credentials_hashes_once(db, monkeypatch):
+    user_id = db.insert_row(
+        "users",
+        {"departamento": "TI", "nome": "Ana", "telefone": "", "ramal": "", "email": ""},
+    )
+    calls = []
+    hash_password = db._hash_password
+    monkeypatch.setattr(db, "_hash_password", lambda senha: calls.append(senha) or hash_password(senha))
+    with closing(sqlite3.connect(db.db_path, isolation_level=None)) as other:
+        other.execute("BEGIN EXCLUSIVE")
+        with pytest.raises(sqlite3.OperationalError):
+            db.set_user_credentials(user_id, "ana", "segredo")
+        other.execute("ROLLBACK")
+    assert calls == ["segredo"]
@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+
+from erpti.database import DEFAULT_ACCESS_FOLDERS, DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "erpti.db"))
+    db.initialize(DEFAULT_ACCESS_FOLDERS)
+    yield db
+    db.close()
+
+
+def _names(db):
+    return [group["nome"] for group in db.fetch_user_groups()]
+
+
+def test_repeated_reads_are_served_from_the_cache(db):
+    db.add_user_group("Suporte")
+    before = db.cache_stats()
+    assert _names(db) == ["Suporte"]
+    assert _names(db) == ["Suporte"]
+    stats = db.cache_stats()
+    assert (stats["misses"] - before["misses"], stats["hits"] - before["hits"]) == (1, 1)
+
+
+def test_own_write_invalidates(db):
+    assert _names(db) == []
+    db.add_user_group("Suporte")
+    assert _names(db) == ["Suporte"]
+
+
+def test_write_from_another_connection_invalidates(db, tmp_path):
+    assert _names(db) == []
+    other = DatabaseManager(str(tmp_path / "erpti.db"))
+    try:
+        other.add_user_group("Redes")
+    finally:
+        other.close()
+    assert _names(db) == ["Redes"]
+
+
+def test_value_loaded_before_an_invalidation_is_not_stored(db):
+    loads = []
+
+    def load(conn):
+        loads.append(conn.execute("SELECT COUNT(*) FROM user_groups").fetchone()[0])
+        # Outra thread grava e invalida enquanto esta carga ainda esta em andamento.
+        db.invalidate_cache()
+        return loads[-1]
+
+    assert db._cached(("teste",), load) == 0
+    assert db._cached(("teste",), lambda conn: "recarregado") == "recarregado"
+    assert loads == [0]
+
+
+def test_stale_load_on_a_pool_connection_is_not_served_to_another(db, tmp_path):
+    other = DatabaseManager(str(tmp_path / "erpti.db"))
+    loaded = threading.Event()
+    checked = threading.Event()
+
+    def load(conn):
+        stale = [row["nome"] for row in conn.execute("SELECT nome FROM user_groups")]
+        other.add_user_group("Redes")
+        loaded.set()
+        checked.wait(5)
+        return stale
+
+    try:
+        assert _names(db) == []
+        future = db._background().submit(db._cached, ("grupos",), load)
+        assert loaded.wait(5)
+        # A conexao desta thread ja viu o commit antes da carga terminar.
+        assert _names(db) == ["Redes"]
+        checked.set()
+        assert future.result(5) == []
+        assert db._cached(("grupos",), lambda conn: ["Redes"]) == ["Redes"]
+    finally:
+        other.close()
@@ -0,0 +1,84 @@
+import pytest
+
+from erpti.app import ERPDesktopApp
+from erpti.database import DEFAULT_ACCESS_FOLDERS, DatabaseManager
+
+
+def _ip(nome):
+    return {"ip": "10.0.0.1", "nome": nome, "fabricante": "", "endereco_mac": ""}
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "erpti.db"))
+    db.initialize(DEFAULT_ACCESS_FOLDERS)
+    yield db
+    db.close()
+
+
+def _ops(changes):
+    return [(change["table_name"], int(change["row_id"]), change["op"]) for change in changes]
+
+
+def test_triggers_log_insert_update_delete(db):
+    seq = db.latest_change_seq()
+    first = db.insert_row("ips", _ip("A"))
+    second = db.insert_row("ips", _ip("B"))
+    with db._connection() as conn:
+        conn.execute("UPDATE ips SET nome = 'B2' WHERE id = ?", (second,))
+        conn.execute("DELETE FROM ips WHERE id = ?", (first,))
+    # Uma entrada por linha: a ultima operacao vence.
+    assert _ops(db.fetch_changes_since(seq)) == [("ips", second, "U"), ("ips", first, "D")]
+    assert db.fetch_changes_since(db.latest_change_seq()) == []
+
+
+def test_pruned_history_forces_a_full_reload(db):
+    stale = db.latest_change_seq()
+    for nome in "ABC":
+        db.insert_row("ips", _ip(nome))
+    current = db.latest_change_seq()
+    db.prune_change_log(keep=1)
+    assert db.fetch_changes_since(stale) is None
+    assert db.fetch_changes_since(current) == []
+
+    row_id = db.insert_row("ips", _ip("D"))
+    assert _ops(db.fetch_changes_since(current)) == [("ips", row_id, "I")]
+
+
+def test_prune_keeps_at_least_one_entry(db):
+    db.insert_row("ips", _ip("A"))
+    with pytest.raises(ValueError):
+        db.prune_change_log(keep=0)
+
+
+def test_empty_log_still_detects_pruned_changes(db):
+    stale = db.latest_change_seq()
+    db.insert_row("ips", _ip("A"))
+    with db._connection() as conn:
+        conn.execute("DELETE FROM change_log")
+    assert db.fetch_changes_since(stale) is None
+    assert db.fetch_changes_since(db.latest_change_seq()) == []
+
+
+def test_poll_merges_changes_from_other_clients(db, tmp_path):
+    app = ERPDesktopApp.__new__(ERPDesktopApp)
+    app.__dict__["tk"] = object()
+    app.db = db
+    refreshed = []
+    app._refresh_all_modules = lambda tables=None, changed=None: refreshed.append((set(tables or ()), changed))
+    kept = db.insert_row("ips", _ip("A"))
+    removed = db.insert_row("ips", _ip("B"))
+    app._load_data_from_db()
+
+    other = DatabaseManager(str(tmp_path / "erpti.db"))
+    try:
+        added = other.insert_row("ips", _ip("C"))
+        with other._connection() as conn:
+            conn.execute("UPDATE ips SET nome = 'A2' WHERE id = ?", (kept,))
+            conn.execute("DELETE FROM ips WHERE id = ?", (removed,))
+    finally:
+        other.close()
+
+    app._apply_changes()
+    assert [(int(row["id"]), row["nome"]) for row in app.ip_data] == [(kept, "A2"), (added, "C")]
+    assert refreshed == [({"ips"}, {"ips": {kept: "U", removed: "D", added: "I"}})]
@@ -0,0 +1,31 @@
+from erpti.database import DEFAULT_ACCESS_FOLDERS, DatabaseManager
+
+
+def _ip(nome, **extra):
+    return {"ip": "10.0.0.1", "nome": nome, "fabricante": "", "endereco_mac": "", **extra}
+
+
+def test_insert_rows_returns_the_id_of_each_row(tmp_path):
+    db = DatabaseManager(str(tmp_path / "erpti.db"))
+    try:
+        db.initialize(DEFAULT_ACCESS_FOLDERS)
+        ids = db.insert_rows("ips", [_ip("A", id=100), _ip("B", id=50), _ip("C"), _ip("D")], chunk_size=3)
+        assert ids == [100, 50, 101, 102]
+        by_id = {int(row["id"]): row["nome"] for row in db.fetch_rows("ips", ("id", "nome"))}
+        assert [by_id[row_id] for row_id in ids] == ["A", "B", "C", "D"]
+    finally:
+        db.close()
+
+
+def test_insert_rows_inside_an_open_transaction(tmp_path):
+    db = DatabaseManager(str(tmp_path / "erpti.db"))
+    try:
+        db.initialize(DEFAULT_ACCESS_FOLDERS)
+        with db._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM ips")
+            ids = db.insert_rows("ips", [_ip("A"), _ip("B")])
+            assert conn.in_transaction
+        assert [row["id"] for row in db.fetch_rows("ips", ("id",))] == ids
+    finally:
+        db.close()
@@ -0,0 +1,53 @@
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from erpti.instrumentation import InstrumentedConnection, Instrumentation
+
+
+def _connect(path, instrumentation):
+    conn = sqlite3.connect(path, factory=InstrumentedConnection, check_same_thread=False)
+    conn.instrumentation = instrumentation
+    return conn
+
+
+def test_slow_query_includes_the_fetch(tmp_path):
+    instrumentation = Instrumentation(tmp_path / "slow.log", slow_query_ms=50)
+    with closing(_connect(":memory:", instrumentation)) as conn:
+        conn.create_function("nap", 1, lambda value: time.sleep(0.01) or value)
+        cursor = conn.execute(
+            "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 10) SELECT nap(i) FROM n"
+        )
+        # O execute so le a primeira linha; o resto do custo vem no fetch.
+        assert instrumentation.slow_queries == 0
+        assert len(cursor.fetchall()) == 10
+    instrumentation.close()
+    assert instrumentation.slow_queries == 1
+    assert "nap(i)" in (tmp_path / "slow.log").read_text(encoding="utf-8")
+
+
+def test_commit_wait_is_reported(tmp_path):
+    path = tmp_path / "erpti.db"
+    with closing(sqlite3.connect(path)) as setup:
+        setup.execute("CREATE TABLE t (x INTEGER)")
+        setup.execute("INSERT INTO t VALUES (1)")
+        setup.commit()
+    instrumentation = Instrumentation(tmp_path / "slow.log")
+    with closing(sqlite3.connect(path, check_same_thread=False, isolation_level=None)) as reader, closing(
+        _connect(path, instrumentation)
+    ) as conn:
+        reader.execute("BEGIN")
+        reader.execute("SELECT * FROM t").fetchall()
+        threading.Timer(0.2, reader.execute, ("COMMIT",)).start()
+
+        def write():
+            conn.execute("INSERT INTO t VALUES (2)")
+            # Rollback journal: o COMMIT espera o leitor sair.
+            conn.commit()
+
+        instrumentation.wrap("write", write)()
+    instrumentation.close()
+    stats = instrumentation.snapshot()["write"]
+    assert stats["begin_commit_ms"] >= 150
+    assert stats["pool_wait_ms"] == 0
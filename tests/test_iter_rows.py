@@ -0,0 +1,39 @@
+import pytest
+
+from erpti.database import DEFAULT_ACCESS_FOLDERS, DatabaseManager
+
+
+def _ip(nome):
+    return {"ip": "10.0.0.1", "nome": nome, "fabricante": "", "endereco_mac": ""}
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "erpti.db"))
+    db.initialize(DEFAULT_ACCESS_FOLDERS)
+    db.insert_rows("ips", [_ip(f"ip-{index}") for index in range(5)])
+    yield db
+    db.close()
+
+
+def test_write_during_iteration_raises_without_touching_the_database(db):
+    rows = db.iter_rows("ips", ("id", "nome"), batch_size=2)
+    seen = [next(rows)["nome"]]
+
+    with pytest.raises(RuntimeError, match="iter_rows"):
+        db.insert_row("ips", _ip("novo"))
+    # Leituras na mesma thread continuam valendo.
+    assert len(db.fetch_rows("ips", ("id",))) == 5
+
+    seen.extend(row["nome"] for row in rows)
+    assert seen == [f"ip-{index}" for index in range(5)]
+    assert db.insert_row("ips", _ip("novo"))
+    assert len(db.fetch_rows("ips", ("id",))) == 6
+
+
+def test_closed_iterator_allows_writes_again(db):
+    rows = db.iter_rows("ips", ("id",), batch_size=1)
+    next(rows)
+    rows.close()
+    assert db.insert_row("ips", _ip("novo"))
+    assert len(db.fetch_rows("ips", ("id",))) == 6
@@ -0,0 +1,113 @@
+import random
+import sqlite3
+from contextlib import closing
+
+from erpti.database import DEFAULT_ACCESS_FOLDERS, DatabaseManager
+
+STATUSES = ("new", "in_progress", "em_atendimento", "resolved", " Fechado ", "finalizado", None, "")
+COLUMNS = ("titulo", "descricao", "autor", "tipo", "urgencia", "arquivo", "responsavel", "status", "legacy_id")
+
+
+def _legacy_db(path, tickets, attachments):
+    with closing(sqlite3.connect(path)) as conn:
+        conn.executescript(
+            """
+            CREATE TABLE auth_user (
+                id INTEGER PRIMARY KEY, username TEXT, first_name TEXT, last_name TEXT
+            );
+            CREATE TABLE tickets_ticket (
+                id INTEGER PRIMARY KEY, title TEXT, description TEXT, created_by_id INTEGER,
+                assigned_to_id INTEGER, ticket_type TEXT, urgency TEXT, status TEXT
+            );
+            CREATE TABLE tickets_ticketattachment (
+                id INTEGER PRIMARY KEY, ticket_id INTEGER, file TEXT
+            );
+            INSERT INTO auth_user VALUES (1, 'ana', 'Ana', 'Souza');
+            INSERT INTO auth_user VALUES (2, 'bruno', '', '');
+            INSERT INTO auth_user VALUES (3, 'carla', 'Carla', NULL);
+            """
+        )
+        conn.executemany("INSERT INTO tickets_ticket VALUES (?, ?, ?, ?, ?, ?, ?, ?)", tickets)
+        conn.executemany("INSERT INTO tickets_ticketattachment (ticket_id, file) VALUES (?, ?)", attachments)
+        conn.commit()
+
+
+def _tickets(rng, ids):
+    return [
+        (
+            ticket_id,
+            rng.choice((f"Chamado {ticket_id}", None)),
+            rng.choice(("Descricao", None)),
+            rng.choice((1, 2, 3, None, 99)),
+            rng.choice((1, 2, 3, None)),
+            rng.choice(("Incidente", None)),
+            rng.choice(("Alta", "Baixa", None)),
+            rng.choice(STATUSES),
+        )
+        for ticket_id in ids
+    ]
+
+
+def _row_by_row(legacy_path):
+    # Mesmo mapeamento da importacao antiga, uma linha por vez.
+    with closing(sqlite3.connect(legacy_path)) as conn:
+        users = {}
+        for user_id, username, first, last in conn.execute("SELECT * FROM auth_user"):
+            # Como no SQL antigo: NULL em qualquer parte do nome cai para o username.
+            full_name = None if first is None or last is None else f"{first} {last}".strip()
+            users[user_id] = full_name or username or ""
+        files = {}
+        for ticket_id, file in conn.execute("SELECT ticket_id, file FROM tickets_ticketattachment ORDER BY id"):
+            files.setdefault(ticket_id, []).append(file)
+        expected = []
+        for legacy_id, title, description, author, assigned, kind, urgency, status in conn.execute(
+            "SELECT * FROM tickets_ticket ORDER BY id"
+        ):
+            status = (status or "").strip().lower()
+            mapped, responsavel = "pendente", ""
+            if status in {"resolved", "fechado", "finalizado"}:
+                mapped = "fechado"
+            elif status in {"in_progress", "em_atendimento"}:
+                mapped, responsavel = "em_atendimento", users.get(assigned, "")
+            expected.append(
+                (
+                    title or "",
+                    description or "",
+                    users.get(author) or "Solicitante",
+                    kind or "",
+                    urgency or "",
+                    "; ".join(files.get(legacy_id, [])),
+                    responsavel,
+                    mapped,
+                    legacy_id,
+                )
+            )
+    return expected
+
+
+def test_import_matches_the_row_by_row_path(tmp_path):
+    rng = random.Random(6)
+    legacy_path = tmp_path / "legacy.sqlite3"
+    ids = sorted(rng.sample(range(1, 5000), 300))
+    first, second = ids[:120], ids[120:]
+    _legacy_db(legacy_path, _tickets(rng, first), [(rng.choice(ids), f"anexo{n}.pdf") for n in range(80)])
+
+    db = DatabaseManager(str(tmp_path / "erpti.db"))
+    try:
+        db.initialize(DEFAULT_ACCESS_FOLDERS)
+        progress = []
+        counts = db.import_legacy_chamados(str(legacy_path), chunk_size=7, progress=lambda *p: progress.append(p))
+        assert counts == (120, 0)
+        assert progress[-1] == (120, 120)
+
+        with closing(sqlite3.connect(legacy_path)) as conn:
+            conn.executemany("INSERT INTO tickets_ticket VALUES (?, ?, ?, ?, ?, ?, ?, ?)", _tickets(rng, second))
+            conn.commit()
+        # Os ja importados contam como ignorados, como na importacao linha a linha.
+        assert db.import_legacy_chamados(str(legacy_path), chunk_size=7) == (180, 120)
+
+        rows = db.fetch_rows("chamados", COLUMNS)
+        imported = sorted((tuple(row[column] for column in COLUMNS) for row in rows), key=lambda row: row[-1])
+        assert imported == _row_by_row(legacy_path)
+    finally:
+        db.close()
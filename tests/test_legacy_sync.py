@@ -0,0 +1,52 @@
+import sqlite3
+from contextlib import closing
+
+from erpti.database import DEFAULT_ACCESS_FOLDERS, DatabaseManager
+
+
+def _legacy_db(path):
+    with closing(sqlite3.connect(path)) as conn:
+        conn.executescript(
+            """
+            CREATE TABLE auth_user (
+                id INTEGER PRIMARY KEY, username TEXT, first_name TEXT, last_name TEXT
+            );
+            CREATE TABLE tickets_ticket (
+                id INTEGER PRIMARY KEY, title TEXT, description TEXT, created_by_id INTEGER,
+                assigned_to_id INTEGER, ticket_type TEXT, urgency TEXT, status TEXT
+            );
+            CREATE TABLE tickets_ticketattachment (
+                id INTEGER PRIMARY KEY, ticket_id INTEGER, file TEXT
+            );
+            INSERT INTO auth_user VALUES (1, 'ana', 'Ana', 'Souza');
+            INSERT INTO tickets_ticket VALUES (1, 'Rede', 'Sem rede', 1, NULL, 'Incidente', 'Alta', 'new');
+            INSERT INTO tickets_ticket VALUES (2, 'VPN', 'Sem VPN', 1, NULL, 'Incidente', 'Baixa', 'new');
+            """
+        )
+
+
+def test_first_sync_after_import_applies_legacy_changes(tmp_path):
+    legacy_path = tmp_path / "legacy.sqlite3"
+    _legacy_db(legacy_path)
+    db = DatabaseManager(str(tmp_path / "erpti.db"))
+    try:
+        db.initialize(DEFAULT_ACCESS_FOLDERS)
+        assert db.import_legacy_chamados(str(legacy_path)) == (2, 0)
+
+        with closing(sqlite3.connect(legacy_path)) as conn:
+            conn.execute("UPDATE tickets_ticket SET status = 'in_progress', assigned_to_id = 1 WHERE id = 1")
+            conn.commit()
+
+        assert db.sync_legacy_chamados(str(legacy_path)) == (0, 1)
+        rows = {
+            row["titulo"]: row
+            for row in db.fetch_rows("chamados", ("titulo", "status", "responsavel"))
+        }
+        assert rows["Rede"]["status"] == "em_atendimento"
+        assert rows["Rede"]["responsavel"] == "Ana Souza"
+        assert rows["VPN"]["status"] == "pendente"
+
+        # Sem mudancas no sistema antigo, a proxima sincronizacao nao altera nada.
+        assert db.sync_legacy_chamados(str(legacy_path)) == (0, 0)
+    finally:
+        db.close()
@@ -0,0 +1,91 @@
+import threading
+
+import pytest
+
+from erpti import app as app_module
+from erpti.app import ERPDesktopApp
+from erpti.database import DEFAULT_ACCESS_FOLDERS, DatabaseManager
+
+
+class _Value:
+    def __init__(self, value=""):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "erpti.db"))
+    db.initialize(DEFAULT_ACCESS_FOLDERS)
+    # Custo baixo so para o teste ficar rapido.
+    db._password_iterations = 1000
+    user_id = db.insert_row(
+        "users",
+        {"departamento": "TI", "nome": "Ana", "telefone": "", "ramal": "", "email": ""},
+    )
+    db.set_user_credentials(user_id, "ana", "segredo")
+    yield db
+    db.close()
+
+
+def _app(db, username, senha):
+    app = ERPDesktopApp.__new__(ERPDesktopApp)
+    app.__dict__["tk"] = object()
+    app.db = db
+    app.users_data = db.fetch_rows("users", ("id", "username", "senha", "senha_hash"))
+    app._login_future = None
+    app.login_user = _Value(username)
+    app.login_password = _Value(senha)
+    app.current_user = _Value("Administrador")
+    app.events = []
+    app.scheduled = []
+    app._set_login_busy = lambda busy: app.events.append(("busy", busy))
+    app._show_dashboard = lambda: app.events.append(("dashboard", app.current_user.get()))
+    app.after = lambda delay, callback, *args: app.scheduled.append((callback, args))
+    return app
+
+
+def _run_event_loop(app):
+    while app.scheduled:
+        callback, args = app.scheduled.pop(0)
+        app._login_future.result(5)
+        callback(*args)
+
+
+def test_login_hashes_on_a_worker_thread(db):
+    threads = []
+    authenticate = db.authenticate_user
+
+    def record(*args):
+        threads.append(threading.get_ident())
+        return authenticate(*args)
+
+    db.authenticate_user = record
+    app = _app(db, "ana", "segredo")
+
+    app._login()
+    # Um segundo clique enquanto a primeira tentativa roda e ignorado.
+    app._login()
+    assert app.events == [("busy", True)]
+    assert len(app.scheduled) == 1
+
+    _run_event_loop(app)
+    assert threads and threads[0] != threading.get_ident()
+    assert app.events == [("busy", True), ("busy", False), ("dashboard", "Ana")]
+    assert app._login_future is None
+
+
+def test_wrong_password_reports_an_error(db, monkeypatch):
+    errors = []
+    monkeypatch.setattr(app_module.messagebox, "showerror", lambda *args: errors.append(args))
+    app = _app(db, "ana", "errada")
+
+    app._login()
+    _run_event_loop(app)
+    assert app.events == [("busy", True), ("busy", False)]
+    assert errors == [("Login invalido", "Usuario ou senha incorretos.")]
@@ -0,0 +1,66 @@
+import pytest
+
+from erpti.database import DEFAULT_ACCESS_FOLDERS, DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "erpti.db"))
+    db.initialize(DEFAULT_ACCESS_FOLDERS)
+    yield db
+    db.close()
+
+
+def _user_with_cost(db, iterations):
+    # Custos baixos so para o teste ficar rapido.
+    db._password_iterations = iterations
+    user_id = db.insert_row(
+        "users",
+        {"departamento": "TI", "nome": "Ana", "telefone": "", "ramal": "", "email": ""},
+    )
+    db.set_user_credentials(user_id, "ana", "segredo")
+    return user_id
+
+
+def _stored_hash(db, user_id):
+    return db.fetch_rows_by_ids("users", ("senha_hash",), [user_id])[0]["senha_hash"]
+
+
+def test_login_rehashes_when_the_stored_cost_is_below_target(db):
+    user_id = _user_with_cost(db, 1000)
+    assert db._hash_iterations(_stored_hash(db, user_id)) == 1000
+
+    db._password_iterations = 2000
+    assert db.authenticate_user("ana", "segredo")["id"] == user_id
+    assert db._hash_iterations(_stored_hash(db, user_id)) == 2000
+    # O hash novo continua valendo para a mesma senha.
+    assert db.authenticate_user("ana", "segredo")["id"] == user_id
+
+
+def test_login_keeps_a_hash_stronger_than_the_host_target(db):
+    user_id = _user_with_cost(db, 2000)
+    stored = _stored_hash(db, user_id)
+
+    db._password_iterations = 1000
+    assert db.authenticate_user("ana", "segredo")["id"] == user_id
+    assert _stored_hash(db, user_id) == stored
+
+
+def test_wrong_password_never_rehashes(db):
+    user_id = _user_with_cost(db, 1000)
+    stored = _stored_hash(db, user_id)
+
+    db._password_iterations = 2000
+    assert db.authenticate_user("ana", "errada") is None
+    assert _stored_hash(db, user_id) == stored
+
+
+def test_calibration_is_stored_per_host_and_respects_the_minimum(db):
+    iterations = db.calibrate_password_cost(budget_ms=1)
+    assert iterations == db.MIN_PASSWORD_ITERATIONS
+
+    other = DatabaseManager(str(db.db_path))
+    try:
+        assert other._target_password_iterations() == iterations
+    finally:
+        other.close()
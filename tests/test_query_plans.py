@@ -0,0 +1,259 @@
+import re
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+from erpti.database import DatabaseManager
+
+
+# Leituras completas por contrato (fetch_rows carrega a tabela inteira).
+FULL_READ_ALLOWLIST = [
+    re.compile(r"^SELECT [\w, ]+ FROM \w+ ORDER BY id$"),
+    re.compile(r"^SELECT COUNT\(\*\) FROM legacy\.tickets_ticket$"),
+    # sqlite_sequence tem uma linha por tabela AUTOINCREMENT e nao tem indice.
+    re.compile(r"^UPDATE sqlite_sequence "),
+    re.compile(r"^SELECT seq FROM sqlite_sequence WHERE name = 'change_log'$"),
+    # Leitura interna do FTS5 ao abrir uma conexao nova (ou anexar o arquivo).
+    re.compile(r"^SELECT k, v FROM '\w+'\.'\w+_fts_config'$"),
+    # stats_summary tem uma linha por (metrica, chave); o recalculo le as tabelas de proposito.
+    re.compile(r"^SELECT metrica, chave, valor FROM stats_summary "),
+    re.compile(r"^DELETE FROM stats_summary$"),
+    re.compile(r"^INSERT INTO stats_summary \(metrica, chave, valor\) SELECT "),
+]
+IGNORED_PREFIXES = (
+    "BEGIN",
+    "COMMIT",
+    "ROLLBACK",
+    "PRAGMA",
+    "CREATE",
+    "EXPLAIN",
+    "ATTACH",
+    "DETACH",
+    "DELETE FROM temp.",
+    "--",
+)
+HEALTH_CHECK = "SELECT 1"
+# Todo SCAN no plano reprova, a menos que o par (comando, linha do plano) esteja aqui.
+SCAN_ALLOWLIST = [
+    # Listas curtas de cadastro, lidas inteiras para a tela.
+    (
+        re.compile(r"^SELECT [\w, ]+ FROM (access_folders|user_groups) ORDER BY LOWER\(nome\)$"),
+        re.compile(r"^SCAN \w+ USING INDEX idx_\w+_nome_lower$"),
+    ),
+    (
+        re.compile(r"^SELECT m\.user_id, GROUP_CONCAT\(g\.nome, ', '\) FROM user_group_members m "),
+        re.compile(r"^SCAN m USING COVERING INDEX idx_user_group_members_user$"),
+    ),
+    # Primeira pagina sem filtro: o percurso do indice para no LIMIT (+ OFFSET).
+    (
+        re.compile(r"^SELECT [\w, ]+ FROM [\w.]+ ORDER BY [\w ]+, id( DESC)? LIMIT \d+( OFFSET \d+)?$"),
+        re.compile(r"^SCAN \w+ USING (COVERING )?INDEX \w+$"),
+    ),
+    # MATCH do FTS5 consulta o indice invertido; as subconsultas sao so os resultados dele.
+    (re.compile(r"MATCH"), re.compile(r"^SCAN \w+_fts VIRTUAL TABLE INDEX \d+:M\d+$")),
+    (re.compile(r"^SELECT c\.id, c\.titulo, .* MATCH "), re.compile(r"^SCAN \(subquery-\d+\)$")),
+    # Lote do sistema antigo: subconsulta limitada e tabela temporaria do proprio lote.
+    (
+        re.compile(
+            r"^SELECT MAX\(id\), COUNT\(\*\) FROM \( SELECT id FROM legacy\.tickets_ticket .* LIMIT \d+ \)$"
+        ),
+        re.compile(r"^SCAN \(subquery-1\)$"),
+    ),
+    (re.compile(r"^INSERT INTO main\.legacy_sync_tickets "), re.compile(r"^SCAN temp\.legacy_sync_batch$")),
+]
+
+
+class TracingDatabaseManager(DatabaseManager):
+    def __init__(self, db_path: str) -> None:
+        self.statements: list[str] = []
+        super().__init__(db_path)
+
+    def _open_connection(self) -> sqlite3.Connection:
+        conn = super()._open_connection()
+        conn.set_trace_callback(self.statements.append)
+        return conn
+
+
+def build_legacy_db(path: Path) -> None:
+    with closing(sqlite3.connect(path)) as conn:
+        conn.executescript(
+            """
+            CREATE TABLE auth_user (
+                id INTEGER PRIMARY KEY, username TEXT, first_name TEXT, last_name TEXT
+            );
+            CREATE TABLE tickets_ticket (
+                id INTEGER PRIMARY KEY, title TEXT, description TEXT, created_by_id INTEGER,
+                assigned_to_id INTEGER, ticket_type TEXT, urgency TEXT, status TEXT
+            );
+            CREATE TABLE tickets_ticketattachment (
+                id INTEGER PRIMARY KEY, ticket_id INTEGER, file TEXT
+            );
+            INSERT INTO auth_user VALUES (1, 'ana', 'Ana', 'Souza');
+            INSERT INTO tickets_ticket VALUES (1, 'Rede', 'Sem rede', 1, 1, 'Incidente', 'Alta', 'new');
+            CREATE INDEX tickets_ticketattachment_ticket_id
+                ON tickets_ticketattachment(ticket_id);
+            INSERT INTO tickets_ticketattachment VALUES (1, 1, 'print.png');
+            """
+        )
+
+
+def exercise(db: DatabaseManager, legacy_path: Path) -> None:
+    # Com limite zero todo comando passa pelo log de consultas lentas e pelo EXPLAIN.
+    db.enable_instrumentation(slow_query_ms=0)
+    db.insert_row(
+        "users",
+        {
+            "departamento": "TI",
+            "nome": "Ana Souza",
+            "cargo": "Analista",
+            "telefone": "",
+            "ramal": "",
+            "email": "",
+        },
+    )
+    db.fetch_rows("users", ("id", "nome"))
+    db.fetch_rows_page("users", ("id", "nome"), 0, 10)
+    list(db.iter_rows("users", ("id", "nome"), 10))
+    db.fetch_access_folders()
+    db.add_access_folder("Projetos")
+    db.remove_access_folders(["Projetos"])
+    db.add_user_group("TI")
+    db.add_user_group("ti")
+    db.fetch_user_groups()
+    db.assign_user_to_group(1, 1)
+    db.assign_user_to_group(1, 1)
+    db.fetch_group_members(1)
+    db.fetch_user_group_map()
+    db.fetch_group_members(1)
+    db.cache_stats()
+    db.set_user_credentials(1, "ana", "segredo")
+    db.authenticate_user("ANA", "segredo")
+    chamado_id = db.insert_chamado("Rede", "Sem rede", "Ana", "Incidente", "Alta", "", "pendente")
+    db.update_chamado_status(chamado_id, "pendente")
+    db.update_chamado_flow(chamado_id, "em_atendimento", "Ana Souza")
+    db.add_chamado_message(chamado_id, "publico", "Ana", "Oi", "")
+    db.fetch_chamado_messages(chamado_id, "publico")
+    db.fetch_chamado_messages_since(chamado_id)
+    db.fetch_chamado_messages_since(chamado_id, ("publico",), after_id=1)
+    db.search_chamados("rede oi", include_internal=False)
+    db.import_legacy_chamados(str(legacy_path), progress=lambda _done, _total: None)
+    db.import_legacy_chamados(str(legacy_path))
+    db.sync_legacy_chamados(str(legacy_path))
+    with closing(sqlite3.connect(legacy_path)) as conn:
+        conn.execute("INSERT INTO tickets_ticket VALUES (2, 'VPN', '', 1, 1, 'Incidente', 'Baixa', 'new')")
+        conn.execute("UPDATE tickets_ticket SET status = 'in_progress' WHERE id = 1")
+        conn.commit()
+    db.sync_legacy_chamados(str(legacy_path))
+    db.fetch_changes_since(db.latest_change_seq() - 5)
+    db.fetch_rows_by_ids("users", ("id", "nome"), [1])
+    db.fetch_records("users", ("id", "nome"))
+    db.fetch_records_by_ids("users", ("id", "nome"), [1])
+    _page, after = db.query_rows("users", ("id", "nome"), order_by="nome", limit=1)
+    db.query_rows("users", ("id", "nome"), order_by="nome", descending=True, limit=1, after=after)
+    db.query_rows("users", ("id", "cargo"), [("nome", "prefix", "Ana")], order_by="cargo", limit=1)
+    db.query_rows("users", ("id",), [("departamento", "eq", "TI")], order_by="departamento")
+    db.query_rows("users", ("id",), [("id", "range", (1, 10))], offset=1)
+    db.query_rows("chamados", ("id", "titulo"), [("status", "in", ("fechado", "finalizado"))])
+    db.prune_change_log(keep=10)
+    attachment_path = legacy_path.with_name("anexo.txt")
+    attachment_path.write_text("log do roteador")
+    db.insert_chamado("Roteador", "Ver anexo", "Ana", "Incidente", "Alta", str(attachment_path), "pendente")
+    db.import_local_attachments()
+    ref = db.store_attachment(str(attachment_path))
+    db.fetch_attachment(ref)
+    db.scan_attachments()
+    db.scan_attachments(older_than_days=30)
+    snapshot = db.create_backup(compression="gz", keep=1)
+    db.restore_backup(str(snapshot))
+    db.fetch_changes_since(0)
+    db.fetch_dashboard_stats()
+    db.insert_row(
+        "requisicoes",
+        {
+            "solicitacao": "Toner",
+            "qtd": "2",
+            "valor": "89,90",
+            "total": "179,80",
+            "requisitado": "03/02/2025",
+            "aprovado": "Sim",
+            "recebido": "-",
+            "nf": "123",
+            "tipo": "Compra",
+            "fornecedor": "Kalunga",
+            "link": "",
+        },
+    )
+    db.backfill_typed_columns()
+    db.fetch_requisicoes_totals("2025-01-01", "2025-12-31")
+    db.fetch_insumos_consumo("2025-01-01")
+    db.query_rows("emprestimos", ("id", "data_em"), [("data_em", "range", ("2025-01-01", None))], "data_em")
+    for descending in (False, True):
+        for cursor in ((None, 1), ("2025-01-01", 1)):
+            db.query_rows("emprestimos", ("id",), order_by="data_em", descending=descending, after=cursor)
+    db.rebuild_dashboard_stats()
+    with db._connection() as conn:
+        conn.execute("UPDATE chamados SET fechado_em = datetime('now', '-1 year') WHERE fechado_em IS NOT NULL")
+        conn.commit()
+    db.update_chamado_status(chamado_id, "fechado")
+    db.archive_closed_chamados(older_than_days=0, batch_size=1)
+    db.query_rows("chamados", ("id", "titulo"), [("status", "in", ("fechado",))], include_archive=True)
+    db.query_rows("chamados", ("id",), order_by="status", limit=1, offset=1, include_archive=True)
+    db.search_chamados("rede")
+    db.fetch_chamado(chamado_id)
+    db.fetch_chamado_messages_since(chamado_id, archived=True)
+    db.import_legacy_chamados(str(legacy_path))
+    db.unarchive_chamado(chamado_id)
+    db.fetch_chamado(chamado_id)
+    db.checkpoint()
+    db.query_stats()
+    db.reset_query_stats()
+
+
+def is_allowed(statement: str) -> bool:
+    normalized = " ".join(statement.split())
+    if normalized == HEALTH_CHECK or normalized.upper().startswith(IGNORED_PREFIXES):
+        return True
+    return any(pattern.match(normalized) for pattern in FULL_READ_ALLOWLIST)
+
+
+def find_full_scans(
+    db_path: Path,
+    statements: list[str],
+    attachments: dict[str, Path],
+) -> list[tuple[str, str]]:
+    failures = []
+    with closing(sqlite3.connect(db_path)) as conn:
+        for alias, path in attachments.items():
+            conn.execute(f"ATTACH DATABASE ? AS {alias}", (str(path),))
+        conn.create_function("legacy_checksum", -1, lambda *_values: "")
+        for statement in dict.fromkeys(statements):
+            if statement.lstrip().upper().startswith("CREATE TEMP"):
+                conn.execute(statement)
+                continue
+            if is_allowed(statement):
+                continue
+            normalized = " ".join(statement.split())
+            plan = conn.execute(f"EXPLAIN QUERY PLAN {statement}").fetchall()
+            for _id, _parent, _unused, detail in plan:
+                if not detail.startswith("SCAN "):
+                    continue
+                if not any(
+                    command.search(normalized) and line.match(detail) for command, line in SCAN_ALLOWLIST
+                ):
+                    failures.append((normalized, detail))
+    return failures
+
+
+def test_database_manager_queries_use_indexes(tmp_path):
+    db_path = tmp_path / "plans.db"
+    legacy_path = tmp_path / "legacy.sqlite3"
+    build_legacy_db(legacy_path)
+    db = TracingDatabaseManager(str(db_path))
+    try:
+        db.initialize(["Comun"])
+        db.statements.clear()
+        exercise(db, legacy_path)
+    finally:
+        db.close()
+    failures = find_full_scans(db_path, db.statements, {"legacy": legacy_path, "archive": db.archive_path})
+    assert not failures, "\n".join(f"{detail}\n    {statement}" for statement, detail in failures)
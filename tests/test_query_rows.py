@@ -0,0 +1,73 @@
+import pytest
+
+from erpti.database import DEFAULT_ACCESS_FOLDERS, DatabaseManager
+
+
+def _requisicao(total, solicitacao="Toner"):
+    return {
+        "solicitacao": solicitacao,
+        "qtd": "1",
+        "valor": total,
+        "total": total,
+        "requisitado": "",
+        "aprovado": "",
+        "recebido": "",
+        "nf": "",
+        "tipo": "",
+        "fornecedor": "",
+        "link": "",
+    }
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_keyset_paging_over_a_nullable_column(tmp_path, descending):
+    db = DatabaseManager(str(tmp_path / "erpti.db"))
+    try:
+        db.initialize(DEFAULT_ACCESS_FOLDERS)
+        # Tres totais vazios (NULL em total_centavos) e tres preenchidos.
+        db.insert_rows("requisicoes", [_requisicao(total) for total in ("", "10,00", "", "5,00", "", "7,50")])
+        seen = []
+        after = None
+        while True:
+            page, after = db.query_rows(
+                "requisicoes",
+                ("id", "total_centavos"),
+                order_by="total_centavos",
+                descending=descending,
+                limit=2,
+                after=after,
+            )
+            seen.extend((row["total_centavos"], row["id"]) for row in page)
+            if after is None:
+                break
+        expected = [(None, 1), (None, 3), (None, 5), (500, 4), (750, 6), (1000, 2)]
+        assert seen == (expected[::-1] if descending else expected)
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_keyset_paging_over_a_nullable_column_with_a_filter(tmp_path, descending):
+    db = DatabaseManager(str(tmp_path / "erpti.db"))
+    try:
+        db.initialize(DEFAULT_ACCESS_FOLDERS)
+        rows = [("", "Toner"), ("3,00", "Cabo"), ("", "Cabo"), ("5,00", "Toner"), ("", "Toner")]
+        db.insert_rows("requisicoes", [_requisicao(total, solicitacao) for total, solicitacao in rows])
+        seen = []
+        after = None
+        while True:
+            page, after = db.query_rows(
+                "requisicoes",
+                ("id",),
+                [("solicitacao", "eq", "toner")],
+                order_by="total_centavos",
+                descending=descending,
+                limit=1,
+                after=after,
+            )
+            seen.extend(row["id"] for row in page)
+            if after is None:
+                break
+        assert seen == ([4, 5, 1] if descending else [1, 5, 4])
+    finally:
+        db.close()
@@ -0,0 +1,73 @@
+import pytest
+
+from erpti.database import DEFAULT_ACCESS_FOLDERS, DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "erpti.db"))
+    db.initialize(DEFAULT_ACCESS_FOLDERS)
+    yield db
+    db.close()
+
+
+def _chamado(db, titulo, descricao="", status="pendente"):
+    return db.insert_chamado(titulo, descricao, "Ana", "Incidente", "Alta", "", status)
+
+
+def _found(db, query, **kwargs):
+    return {row["id"]: row["arquivado"] for row in db.search_chamados(query, **kwargs)}
+
+
+def _integrity_check(db):
+    with db._connection() as conn:
+        for table in ("chamados_fts", "chamado_messages_fts"):
+            conn.execute(f"INSERT INTO {table} ({table}) VALUES ('integrity-check')")
+
+
+def test_search_follows_insert_update_and_delete(db):
+    impressora = _chamado(db, "Impressora travada", "Papel preso na bandeja")
+    rede = _chamado(db, "Sem rede", "Cabo solto na recepção")
+    assert _found(db, "impres") == {impressora: False}
+    # remove_diacritics: a busca sem acento encontra o texto acentuado.
+    assert _found(db, "recepcao") == {rede: False}
+
+    with db._connection() as conn:
+        conn.execute("UPDATE chamados SET titulo = 'Scanner travado' WHERE id = ?", (impressora,))
+        conn.commit()
+    assert _found(db, "impressora") == {}
+    assert _found(db, "scanner") == {impressora: False}
+
+    with db._connection() as conn:
+        conn.execute("DELETE FROM chamados WHERE id = ?", (rede,))
+        conn.commit()
+    assert _found(db, "cabo") == {}
+    _integrity_check(db)
+
+
+def test_search_covers_messages_and_hides_internal_notes(db):
+    chamado_id = _chamado(db, "Notebook lento")
+    db.add_chamado_message(chamado_id, "publico", "Ana", "Reiniciei o notebook", "")
+    db.add_chamado_message(chamado_id, "interno", "Bruno", "Trocar o SSD amanha", "")
+
+    assert _found(db, "reiniciei") == {chamado_id: False}
+    assert _found(db, "ssd") == {chamado_id: False}
+    assert _found(db, "ssd", include_internal=False) == {}
+    _integrity_check(db)
+
+
+def test_search_reaches_archived_chamados(db):
+    chamado_id = _chamado(db, "Toner acabou", status="fechado")
+    db.add_chamado_message(chamado_id, "publico", "Ana", "Pedido de toner feito", "")
+    with db._connection() as conn:
+        conn.execute("UPDATE chamados SET fechado_em = '2020-01-01 00:00:00' WHERE id = ?", (chamado_id,))
+        conn.commit()
+
+    assert db.archive_closed_chamados(30, backup_first=False) == 1
+    assert _found(db, "toner") == {chamado_id: True}
+    assert _found(db, "toner", include_archive=False) == {}
+    _integrity_check(db)
+
+    assert db.unarchive_chamado(chamado_id)
+    assert _found(db, "toner") == {chamado_id: False}
+    _integrity_check(db)
@@ -0,0 +1,110 @@
+import random
+
+from erpti.database import DEFAULT_ACCESS_FOLDERS, DatabaseManager
+
+
+def _insumo(qtd, departamento):
+    return {"insumo": "Toner", "data": "01/02/2025", "qtd": qtd, "nome": "Ana", "departamento": departamento}
+
+
+def test_insumos_kpi_sums_the_typed_quantity(tmp_path):
+    db = DatabaseManager(str(tmp_path / "erpti.db"))
+    try:
+        db.initialize(DEFAULT_ACCESS_FOLDERS)
+        db.insert_rows("insumos", [_insumo("1.000", "TI"), _insumo("2,5", "TI"), _insumo("3", "RH")])
+        assert db.fetch_dashboard_stats()["insumos_departamento"] == {"TI": 1000, "RH": 3}
+        db.rebuild_dashboard_stats()
+        assert db.fetch_dashboard_stats()["insumos_departamento"] == {"TI": 1000, "RH": 3}
+    finally:
+        db.close()
+
+
+def _equipment(marca):
+    columns = (
+        "id_interno", "patrimonio", "selo_patrimonio", "equipamento", "modelo",
+        "serie", "mem", "processador", "geracao", "hd", "mod_hd",
+    )
+    return {**dict.fromkeys(columns, ""), "marca": marca}
+
+
+def _emprestimo(situacao):
+    columns = ("nome", "equipamento", "documento", "arquivo", "data")
+    return {**dict.fromkeys(columns, ""), "situacao": situacao}
+
+
+def _requisicao(aprovado):
+    columns = ("solicitacao", "qtd", "valor", "total", "requisitado", "recebido", "nf", "tipo", "fornecedor", "link")
+    return {**dict.fromkeys(columns, ""), "aprovado": aprovado}
+
+
+def _recount(db):
+    # Contagem do zero em Python, sem passar por stats_summary nem pelo SQL das metricas.
+    def tally(pairs):
+        counts = {}
+        for key, value in pairs:
+            counts[key] = counts.get(key, 0) + value
+        return {key: value for key, value in counts.items() if value}
+
+    chamados = db.fetch_rows("chamados", ("status", "responsavel"))
+    return {
+        "chamados_status": tally((row["status"].strip(" ").lower(), 1) for row in chamados),
+        "chamados_abertos_responsavel": tally(
+            (row["responsavel"].strip(" "), 1)
+            for row in chamados
+            if row["status"].strip(" ").lower() not in ("fechado", "finalizado", "resolved")
+        ),
+        "equipments_marca": tally((row["marca"].strip(" "), 1) for row in db.fetch_rows("equipments", ("marca",))),
+        "insumos_departamento": tally(
+            (row["departamento"], row["quantidade"] or 0)
+            for row in db.fetch_rows("insumos", ("departamento", "quantidade"))
+        ),
+        "emprestimos_situacao": tally(
+            (row["situacao"].strip(" ").lower(), 1) for row in db.fetch_rows("emprestimos", ("situacao",))
+        ),
+        "requisicoes_aprovado": tally(
+            (row["aprovado"].strip(" ").lower(), 1) for row in db.fetch_rows("requisicoes", ("aprovado",))
+        ),
+    }
+
+
+def test_summary_matches_a_recount_after_mixed_writes(tmp_path):
+    rng = random.Random(22)
+    statuses = ("pendente", " Em_atendimento", "fechado", "FINALIZADO ", "resolved")
+    people = ("", "Ana", " Bruno ", "Carla")
+    db = DatabaseManager(str(tmp_path / "erpti.db"))
+    try:
+        db.initialize(DEFAULT_ACCESS_FOLDERS)
+        chamados = [
+            db.insert_chamado("T", "", "Ana", "", "", "", rng.choice(statuses), rng.choice(people))
+            for _ in range(60)
+        ]
+        db.insert_rows("equipments", [_equipment(rng.choice(("Dell", " Dell", "HP", "Lenovo"))) for _ in range(40)])
+        db.insert_rows(
+            "insumos",
+            [_insumo(rng.choice(("1", "2", "1.000", "2,5", "")), rng.choice(("TI", "RH"))) for _ in range(40)],
+        )
+        db.insert_rows("emprestimos", [_emprestimo(rng.choice(("Ativo", "devolvido "))) for _ in range(30)])
+        db.insert_rows("requisicoes", [_requisicao(rng.choice(("Sim", "nao", ""))) for _ in range(30)])
+
+        for chamado_id in rng.sample(chamados, 25):
+            db.update_chamado_flow(chamado_id, rng.choice(statuses), rng.choice(people))
+        for chamado_id in rng.sample(chamados, 10):
+            db.update_chamado_status(chamado_id, "fechado")
+        with db._connection() as conn:
+            conn.execute("UPDATE equipments SET marca = 'HP' WHERE id % 3 = 0")
+            conn.execute("UPDATE insumos SET departamento = 'Compras', quantidade = quantidade + 5 WHERE id % 4 = 0")
+            conn.execute("UPDATE insumos SET quantidade = NULL WHERE id % 5 = 0")
+            conn.execute("UPDATE emprestimos SET situacao = 'Devolvido' WHERE id % 2 = 0")
+            conn.execute("UPDATE requisicoes SET aprovado = aprovado WHERE id % 2 = 0")
+            for table in ("chamados", "equipments", "insumos", "emprestimos", "requisicoes"):
+                conn.execute(f"DELETE FROM {table} WHERE id % 7 = 0")
+            conn.execute("UPDATE chamados SET fechado_em = '2020-01-01 00:00:00' WHERE id % 11 = 0")
+            conn.commit()
+        assert db.archive_closed_chamados(30, backup_first=False) > 0
+
+        expected = _recount(db)
+        assert db.fetch_dashboard_stats() == expected
+        db.rebuild_dashboard_stats()
+        assert db.fetch_dashboard_stats() == expected
+    finally:
+        db.close()
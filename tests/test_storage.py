@@ -0,0 +1,21 @@
+from erpti import storage
+
+
+def test_rollback_is_the_default_profile(monkeypatch):
+    monkeypatch.delenv(storage.PROFILE_ENV, raising=False)
+    assert storage.profile_from_env("erpti.db") is storage.ROLLBACK_PROFILE
+
+
+def test_wal_is_opt_in(monkeypatch):
+    monkeypatch.setenv(storage.PROFILE_ENV, "wal")
+    assert storage.profile_from_env("erpti.db") is storage.WAL_PROFILE
+
+
+def test_wal_is_refused_on_network_paths(monkeypatch):
+    monkeypatch.setenv(storage.PROFILE_ENV, "wal")
+    assert storage.profile_from_env("//servidor/erp/erpti.db") is storage.ROLLBACK_PROFILE
+
+
+def test_unknown_profile_falls_back_to_rollback(monkeypatch):
+    monkeypatch.setenv(storage.PROFILE_ENV, "turbo")
+    assert storage.profile_from_env() is storage.ROLLBACK_PROFILE
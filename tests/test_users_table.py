@@ -0,0 +1,91 @@
+from erpti import app as app_module
+from erpti.app import ERPDesktopApp
+from erpti.database import DEFAULT_ACCESS_FOLDERS, DatabaseManager
+
+
+class _Tree:
+    def __init__(self):
+        self.rows = []
+
+    def get_children(self):
+        return tuple(range(len(self.rows)))
+
+    def delete(self, *items):
+        self.rows = [row for index, row in enumerate(self.rows) if index not in items]
+
+    def insert(self, _parent, _index, values):
+        self.rows.append(values)
+
+
+class _Button:
+    def __init__(self):
+        self.disabled = False
+
+    def state(self, flags):
+        self.disabled = flags == ["disabled"]
+
+
+def _user(nome, cargo):
+    return {
+        "departamento": "TI",
+        "nome": nome,
+        "cargo": cargo,
+        "perfil": "",
+        "username": "",
+        "senha": "",
+        "senha_hash": "",
+        "telefone": "",
+        "ramal": "",
+        "email": "",
+    }
+
+
+def test_sorted_users_table_pages_with_the_keyset_cursor(tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module, "USERS_PAGE_SIZE", 2)
+    db = DatabaseManager(str(tmp_path / "erpti.db"))
+    try:
+        db.initialize(DEFAULT_ACCESS_FOLDERS)
+        db.insert_rows("users", [_user(nome, cargo) for nome, cargo in (
+            ("Carla", "Analista"), ("Ana", ""), ("Bruno", "Tecnico"), ("Davi", "Gerente"), ("Edu", "Analista"),
+        )])
+        db.add_user_group("Suporte")
+        # Bruno e o terceiro inserido.
+        db.assign_user_to_group(int(db.fetch_user_groups()[0]["id"]), 3)
+
+        app = ERPDesktopApp.__new__(ERPDesktopApp)
+        app.__dict__["tk"] = object()
+        app.db = db
+        app.users_data = []
+        app.users_table = _Tree()
+        app.users_more_button = _Button()
+        app._users_sort_reverse = {"nome": False}
+        app._users_sort = None
+        app._users_after = None
+
+        queried = []
+        query_rows = db.query_rows
+
+        def record(*args, **kwargs):
+            queried.append(kwargs["limit"])
+            return query_rows(*args, **kwargs)
+
+        monkeypatch.setattr(db, "query_rows", record)
+
+        app._sort_users_table("nome")
+        assert [row[0] for row in app.users_table.rows] == ["Ana", "Bruno"]
+        assert app.users_table.rows[1][3] == "Suporte"
+        assert not app.users_more_button.disabled
+
+        app._load_users_page()
+        app._load_users_page()
+        assert [row[0] for row in app.users_table.rows] == ["Ana", "Bruno", "Carla", "Davi", "Edu"]
+        assert app.users_more_button.disabled
+        assert queried == [2, 2, 2]
+
+        # Uma alteracao recarrega as linhas ja exibidas, ainda na ordem do banco.
+        db.insert_row("users", _user("Beto", ""))
+        app._refresh_users_table()
+        assert [row[0] for row in app.users_table.rows] == ["Ana", "Beto", "Bruno", "Carla", "Davi"]
+        assert not app.users_more_button.disabled
+    finally:
+        db.close()
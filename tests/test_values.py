@@ -0,0 +1,54 @@
+import pytest
+
+from erpti.values import format_cents, parse_cents, parse_quantity
+
+
+@pytest.mark.parametrize(
+    ("text", "cents"),
+    [
+        ("1,005", 101),
+        ("0,285", 29),
+        ("1.234,56", 123456),
+        ("1234.56", 123456),
+        ("1.500", 150000),
+        ("R$ 1.500", 150000),
+        ("1.234.567", 123456700),
+        ("12.5", 1250),
+        ("0.285", 29),
+        ("1.2.3", None),
+        ("R$ 89,90", 8990),
+        ("", None),
+        ("abc", None),
+        ("NaN", None),
+    ],
+)
+def test_parse_cents_rounds_half_up(text, cents):
+    assert parse_cents(text) == cents
+
+
+@pytest.mark.parametrize(
+    ("text", "quantity"),
+    [
+        ("3", 3),
+        ("1.000", 1000),
+        ("1.234.567", 1234567),
+        ("2,0", 2),
+        ("2,5", None),
+        ("1.5", None),
+        ("", None),
+        ("dois", None),
+    ],
+)
+def test_parse_quantity_reads_thousands(text, quantity):
+    assert parse_quantity(text) == quantity
+
+
+def test_format_cents_writes_pt_br():
+    assert format_cents(123456) == "1.234,56"
+    assert format_cents(150000) == "1.500,00"
+    assert format_cents(5) == "0,05"
+
+
+@pytest.mark.parametrize("cents", [5, 150, 150000, 123456, 123456700])
+def test_format_cents_round_trips(cents):
+    assert parse_cents(format_cents(cents)) == cents